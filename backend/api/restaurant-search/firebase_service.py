@@ -5,16 +5,149 @@ import os
 import json
 import asyncio
 import firebase_admin
-from firebase_admin import credentials, firestore
+from firebase_admin import credentials, firestore, firestore_async
 from google.cloud.firestore import GeoPoint, FieldFilter
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Callable, Awaitable
 import math
-from datetime import datetime, timedelta
+import numpy as np
+from utils import geohash_encode, geohash_query_bounds, haversine_meters, within_radius
+from spatial_index import SpatialIndex, CatalogSync
+from ttl_cache import TTLCache
+from write_buffer import BatchWriter, Write
+from models import tier_satisfies
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+
+# Firestore allows at most 30 values in an 'in' filter
+FIRESTORE_IN_LIMIT = 30
+
+# Reverse-geocoding results keyed by geohash cell, shared by all instances
+LOCATION_CACHE_COLLECTION = "location_cache"
+# Fields radius searches read from Firestore; enriched details are left on the server
+SEARCH_FIELDS = ("place_id", "name", "location")
+# Heavy details payload, kept in a sibling document keyed like the restaurant document
+# so the "hot" restaurants documents stay small for search, listing and the catalog index
+DETAILS_COLLECTION = "restaurant_details"
+COLD_DETAILS_FIELDS = (
+    "regular_opening_hours", "editorial_summary", "generative_summary", "review_summary",
+    "photos", "photo_names",
+)
+# Set on restaurants documents whose cold fields live in DETAILS_COLLECTION
+DETAILS_SPLIT_FIELD = "details_split"
+
+# Per-request state (e.g. the restaurant loader); None outside of a request scope
+_request_scope: ContextVar[Optional[Dict[str, Any]]] = ContextVar("firestore_request_scope", default=None)
+
+
+@contextmanager
+def request_scope():
+    """Open a request scope so Firestore reads are batched and memoized until it exits"""
+    token = _request_scope.set({})
+    try:
+        yield
+    finally:
+        _request_scope.reset(token)
+
+
+class RestaurantLoader:
+    """
+    Request-scoped DataLoader for restaurant documents keyed by place_id.
+    Loads requested in the same event loop tick are coalesced into one batched
+    Firestore read, and every result is memoized for the lifetime of the request.
+    """
+
+    def __init__(self, fetch_many):
+        self._fetch_many = fetch_many
+        self._futures: Dict[str, asyncio.Future] = {}
+        # Futures waiting for the next dispatch, captured so clear() cannot orphan them
+        self._queue: Dict[str, asyncio.Future] = {}
+        self._dispatches: set = set()
+        self.stats = {"loads": 0, "memoized": 0, "batches": 0}
+
+    async def load(self, place_id: str) -> Optional[Dict[str, Any]]:
+        self.stats["loads"] += 1
+        future = self._futures.get(place_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._futures[place_id] = future
+            self._queue[place_id] = future
+            if len(self._queue) == 1:
+                # First key this tick: dispatch once the other callers have queued theirs
+                loop.call_soon(self._start_dispatch)
+        else:
+            self.stats["memoized"] += 1
+
+        data = await asyncio.shield(future)
+        # Hand out copies so callers cannot mutate each other's view of the document
+        return dict(data) if data is not None else None
+
+    async def load_many(self, place_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        results = await asyncio.gather(*(self.load(place_id) for place_id in place_ids))
+        return dict(zip(place_ids, results))
+
+    def clear(self, place_id: str):
+        """Forget a memoized document (after it was written or deleted)"""
+        self._futures.pop(place_id, None)
+
+    def _start_dispatch(self):
+        # Keep a reference so the task is not garbage-collected mid-flight
+        task = asyncio.ensure_future(self._dispatch())
+        self._dispatches.add(task)
+        task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self):
+        batch, self._queue = self._queue, {}
+        self.stats["batches"] += 1
+        try:
+            found = await self._fetch_many(list(batch))
+        except Exception as e:
+            for place_id, future in batch.items():
+                # Do not memoize failures, a later load may succeed
+                if self._futures.get(place_id) is future:
+                    del self._futures[place_id]
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for place_id, future in batch.items():
+            if not future.done():
+                future.set_result(found.get(place_id))
 
 
 class FirebaseService:
     def __init__(self):
         self.db = None
+        # Native asyncio client; None keeps every Firestore call on the thread pool
+        self.async_db = None
+        # In-memory catalog index, served from once its snapshot listener has loaded
+        self.catalog_index = SpatialIndex()
+        self._catalog_sync = CatalogSync(self.catalog_index)
+        # Fresh details of hot restaurants, served without Firestore reads
+        self.details_cache = TTLCache(int(os.getenv("DETAILS_CACHE_MAX_ENTRIES", "5000")))
+        # Fall back to place_id queries for documents not yet keyed by place_id
+        self.legacy_place_id_lookup = os.getenv("FIRESTORE_LEGACY_PLACE_ID_LOOKUP", "true").lower() == "true"
+        # Radius search via geohash ranges; false falls back to the GeoPoint latitude band
+        self.geohash_search = os.getenv("FIRESTORE_GEOHASH_SEARCH", "true").lower() == "true"
+        # Write cold details fields to DETAILS_COLLECTION instead of the restaurant document
+        self.split_details = os.getenv("FIRESTORE_SPLIT_DETAILS", "true").lower() == "true"
+        # Details older than the soft TTL are refreshed; older than the hard TTL they are not served.
+        # Stale-while-revalidate is disabled while the hard TTL equals the soft TTL
+        self.soft_ttl_days = float(os.getenv("DETAILS_SOFT_TTL_DAYS", "7"))
+        self.hard_ttl_days = max(float(os.getenv("DETAILS_HARD_TTL_DAYS", self.soft_ttl_days)), self.soft_ttl_days)
+        # Refreshes one restaurant's details at a tier; stale details are only served once this is set
+        self.revalidate: Optional[Callable[[str, str], Awaitable[Any]]] = None
+        self._revalidations: Dict[str, asyncio.Task] = {}
+        self.revalidation_stats = {"stale_served": 0, "started": 0, "deduplicated": 0, "failed": 0}
+        self.details_write_stats = {"updates": 0, "changed_updates": 0, "fields_written": 0, "fields_unchanged": 0}
+        # Coalesces restaurant writes into batched commits; None writes each one directly
+        self.writer: Optional[BatchWriter] = None
+        if os.getenv("FIRESTORE_WRITE_BATCHING", "true").lower() == "true":
+            self.writer = BatchWriter(
+                self._commit_writes,
+                flush_interval_ms=float(os.getenv("FIRESTORE_WRITE_FLUSH_MS", "200")),
+                max_batch_docs=int(os.getenv("FIRESTORE_WRITE_MAX_DOCS", "500")),
+            )
         self._init_firebase()
 
     def _init_firebase(self):
@@ -40,6 +173,94 @@ class FirebaseService:
                         raise RuntimeError(f"Firebase initialization failed with ADC: {e}. For local development, set FIREBASE_SERVICE_ACCOUNT_JSON environment variable.")
         
         self.db = firestore.client()
+        # Request-path reads and writes run on the SDK's AsyncClient (one per app, so one
+        # gRPC channel for the process); the sync client keeps the catalog snapshot listener
+        if os.getenv("FIRESTORE_ASYNC_CLIENT", "true").lower() == "true":
+            try:
+                self.async_db = firestore_async.client()
+            except Exception as e:
+                print(f"Firestore AsyncClient unavailable, falling back to the thread pool: {e}")
+
+    def start_catalog_sync(self):
+        """Load the restaurant catalog into memory and keep it current with a snapshot listener"""
+        self._catalog_sync.start(self.db)
+
+    def stop_catalog_sync(self):
+        self._catalog_sync.stop()
+
+    def _collection(self, name: str):
+        """Collection reference on the async client if there is one, else on the sync client"""
+        return (self.async_db if self.async_db is not None else self.db).collection(name)
+
+    async def _call(self, method: Callable, *args, **kwargs) -> Any:
+        """Run a method of a reference from _collection(): awaited natively, or in the thread pool"""
+        if self.async_db is not None:
+            return await method(*args, **kwargs)
+        return await asyncio.to_thread(method, *args, **kwargs)
+
+    def _batch(self):
+        """Write batch on the same client as _collection(); commit it with _call(batch.commit)"""
+        return (self.async_db if self.async_db is not None else self.db).batch()
+
+    async def _commit_writes(self, writes: List[Write]):
+        """Commit (op, collection, doc_id, data, merge) writes as one atomic batch"""
+        batch = self._batch()
+        for op, collection, doc_id, data, merge in writes:
+            ref = self._collection(collection).document(doc_id)
+            if op == "delete":
+                batch.delete(ref)
+            elif op == "update":
+                batch.update(ref, data)
+            else:
+                batch.set(ref, data, merge=merge)
+        await self._call(batch.commit)
+
+    async def _write(self, *writes: Write):
+        """
+        Apply document writes: through the write buffer when enabled (merged with
+        other pending writes and committed with the next batch), else as one batch.
+        Returns once the writes are committed.
+        """
+        if self.writer is not None:
+            # Queued in the order given, so they commit in the same or consecutive batches
+            await asyncio.gather(*(self.writer.write(*write) for write in writes))
+        else:
+            await self._commit_writes(list(writes))
+
+    async def flush_writes(self):
+        """Commit buffered writes (on shutdown)"""
+        if self.writer is not None:
+            await self.writer.close()
+
+    async def _get_all(self, refs: List[Any], fields: Optional[Sequence[str]] = None) -> List[Any]:
+        """Batched document reads for references from _collection(), projected to `fields` if given"""
+        field_paths = list(fields) if fields else None
+        if self.async_db is not None:
+            return [snapshot async for snapshot in self.async_db.get_all(refs, field_paths=field_paths)]
+        return await asyncio.to_thread(lambda: list(self.db.get_all(refs, field_paths=field_paths)))
+
+    @staticmethod
+    def _project(query, fields: Optional[Sequence[str]]):
+        """Limit a query to the given fields (all fields when None)"""
+        return query.select(list(fields)) if fields else query
+
+    def _loader(self) -> Optional[RestaurantLoader]:
+        """Return the restaurant loader of the current request scope, if any"""
+        scope = _request_scope.get()
+        if scope is None:
+            return None
+        loader = scope.get("restaurants")
+        if loader is None:
+            loader = scope["restaurants"] = RestaurantLoader(self._fetch_restaurants_by_place_ids)
+        return loader
+
+    def _forget(self, place_id: str):
+        """Drop every in-memory copy of a restaurant after it was written"""
+        loader = self._loader()
+        if loader is not None:
+            loader.clear(place_id)
+        if self.details_cache is not None:
+            self.details_cache.invalidate(place_id)
 
     def _calculate_bounding_box(self, lat: float, lng: float, radius_km: float) -> Dict[str, float]:
         """Calculate bounding box for geohash filtering"""
@@ -58,150 +279,439 @@ class FirebaseService:
 
     def _haversine_distance(self, lat1: float, lng1: float, lat2: float, lng2: float) -> float:
         """Calculate distance between two points in kilometers"""
-        R = 6371  # Earth's radius in km
+        return haversine_meters(lat1, lng1, lat2, lng2) / 1000
+
+    def _dedupe_indices(self, results: List[Dict[str, Any]]) -> List[int]:
+        """Indices of the results to keep, one per place_id preferring the document keyed by place_id, in order"""
+        by_place_id: Dict[str, int] = {}
+        kept = []
+        for index, result in enumerate(results):
+            place_id = result.get("place_id")
+            if not place_id:
+                kept.append(index)
+                continue
+            existing = by_place_id.get(place_id)
+            if existing is None or result["doc_id"] == place_id:
+                by_place_id[place_id] = index
+        return sorted(kept + list(by_place_id.values()))
+
+    async def _query_geohash_ranges(self, center_lat: float, center_lng: float, radius_km: float,
+                                    fields: Optional[Sequence[str]] = None) -> List[Any]:
+        """Fetch candidate documents from the geohash prefix ranges covering the search circle"""
+        restaurants_ref = self._collection("restaurants")
+        bounds = geohash_query_bounds(center_lat, center_lng, radius_km * 1000)
+        queries = [
+            self._project(
+                restaurants_ref
+                .where(filter=FieldFilter("geohash", ">=", start))
+                .where(filter=FieldFilter("geohash", "<", end)),
+                fields
+            )
+            for start, end in bounds
+        ]
+        # Run every range query in parallel; merged ranges never overlap
+        chunks = await asyncio.gather(*(self._call(query.get) for query in queries))
+        return [doc for docs in chunks for doc in docs]
+
+    async def _query_location_band(self, center_lat: float, center_lng: float, radius_km: float,
+                                   fields: Optional[Sequence[str]] = None) -> List[Any]:
+        """Fetch candidate documents with a GeoPoint range (filters by latitude band only)"""
+        # Calculate bounding box for initial filtering
+        bbox = self._calculate_bounding_box(center_lat, center_lng, radius_km)
         
-        dlat = math.radians(lat2 - lat1)
-        dlng = math.radians(lng2 - lng1)
+        # Query restaurants with location field (GeoPoint)
+        restaurants_ref = self._collection("restaurants")
         
-        a = (math.sin(dlat/2) * math.sin(dlat/2) + 
-             math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * 
-             math.sin(dlng/2) * math.sin(dlng/2))
+        # Use compound query for bounding box filtering
+        query = (restaurants_ref
+                .where(filter=FieldFilter("location", ">=", GeoPoint(bbox["min_lat"], bbox["min_lng"])))
+                .where(filter=FieldFilter("location", "<=", GeoPoint(bbox["max_lat"], bbox["max_lng"]))))
         
-        return 2 * R * math.asin(math.sqrt(a))
+        return await self._call(self._project(query, fields).get)
 
-    async def search_restaurants(self, center_lat: float, center_lng: float, radius_km: float) -> List[Dict[str, Any]]:
-        """Search restaurants within radius using GeoPoint + geohash pattern"""
-        try:
-            # Calculate bounding box for initial filtering
-            bbox = self._calculate_bounding_box(center_lat, center_lng, radius_km)
-            
-            # Query restaurants with location field (GeoPoint)
-            restaurants_ref = self.db.collection("restaurants")
-            
-            # Use compound query for bounding box filtering
-            query = (restaurants_ref
-                    .where(filter=FieldFilter("location", ">=", GeoPoint(bbox["min_lat"], bbox["min_lng"])))
-                    .where(filter=FieldFilter("location", "<=", GeoPoint(bbox["max_lat"], bbox["max_lng"]))))
-            
-            import asyncio
-            docs = await asyncio.to_thread(query.get)
-            
-            # Post-filter with accurate Haversine distance
-            results = []
+    async def _radius_matches(self, center_lat: float, center_lng: float,
+                              radius_km: float) -> Tuple[List[Dict[str, Any]], Any]:
+        """
+        Restaurants within the radius and their distances in meters (an array),
+        nearest first and one per place_id. Served from the catalog index once it
+        is ready, else with Firestore queries.
+        """
+        if self.catalog_index is not None and self.catalog_index.ready:
+            # Served from memory, no Firestore reads
+            entries, distances_m = self.catalog_index.within(center_lat, center_lng, radius_km)
+        else:
+            # Only the fields of a search result are transferred and decoded
+            if self.geohash_search:
+                docs = await self._query_geohash_ranges(center_lat, center_lng, radius_km, SEARCH_FIELDS)
+            else:
+                docs = await self._query_location_band(center_lat, center_lng, radius_km, SEARCH_FIELDS)
+
+            # Post-filter with accurate Haversine distance, in one array operation
+            candidates = []
             for doc in docs:
                 data = doc.to_dict()
                 if not data or "location" not in data:
                     continue
-                
-                location = data["location"]
-                distance_km = self._haversine_distance(
-                    center_lat, center_lng,
-                    location.latitude, location.longitude
-                )
-                
-                if distance_km <= radius_km:
-                    results.append({
-                    "doc_id": doc.id,
+                candidates.append((doc.id, data))
+
+            indices, distances_m = within_radius(
+                center_lat, center_lng, radius_km * 1000,
+                [data["location"].latitude for _, data in candidates],
+                [data["location"].longitude for _, data in candidates]
+            )
+            entries = []
+            for index in indices.tolist():
+                doc_id, data = candidates[index]
+                entries.append({
+                    "doc_id": doc_id,
                     "place_id": data.get("place_id"),
-                        "name": data.get("name", "Unknown"),
-                        "location": location,  # GeoPoint object
-                        "distance_km": round(distance_km, 2)
-                    })
-            
-            # Sort by distance
-            results.sort(key=lambda x: x["distance_km"])
+                    "name": data.get("name", "Unknown"),
+                    "location": data["location"],  # GeoPoint object
+                })
+
+        # During the place_id re-keying migration a restaurant can exist twice
+        kept = self._dedupe_indices(entries)
+        if len(kept) < len(entries):
+            entries, distances_m = [entries[index] for index in kept], distances_m[kept]
+        return entries, distances_m
+
+    async def search_restaurants(self, center_lat: float, center_lng: float, radius_km: float) -> List[Dict[str, Any]]:
+        """Search restaurants within radius using GeoPoint + geohash pattern"""
+        try:
+            entries, distances_m = await self._radius_matches(center_lat, center_lng, radius_km)
+            distances_km = np.round(distances_m / 1000, 2).tolist()
+            results = [{**entry, "distance_km": distance_km} for entry, distance_km in zip(entries, distances_km)]
+            # Sort by distance (doc_id breaks ties so pages have a stable order)
+            results.sort(key=self._search_sort_key)
             return results
             
         except Exception as e:
             print(f"Error searching restaurants: {e}")
             return []
 
-    async def get_restaurant_by_place_id(self, place_id: str) -> Optional[Dict[str, Any]]:
-        """Get restaurant document by place_id"""
+    @staticmethod
+    def _search_sort_key(result: Dict[str, Any]) -> Tuple[float, str]:
+        return result["distance_km"], result["doc_id"]
+
+    async def search_restaurants_page(self, center_lat: float, center_lng: float, radius_km: float,
+                                      page_size: int, after: Optional[Tuple[float, str]] = None) -> Dict[str, Any]:
+        """
+        One page of search_restaurants results.
+        `after` is the (distance_km, doc_id) of the last result of the previous page;
+        `next_after` is None once the last page has been returned.
+        Matches come nearest first, so the page is located by binary search on the
+        rounded distances and only it (plus ties on its last distance) is built and sorted.
+        """
         try:
-            restaurants_ref = self.db.collection("restaurants")
-            query = restaurants_ref.where(filter=FieldFilter("place_id", "==", place_id)).limit(1)
-            # Use asyncio.to_thread to run the synchronous Firestore operation in a thread pool
-            import asyncio
-            docs = await asyncio.to_thread(query.get)
-            
-            if docs:
-                doc = docs[0]
+            entries, distances_m = await self._radius_matches(center_lat, center_lng, radius_km)
+        except Exception as e:
+            print(f"Error searching restaurants: {e}")
+            return {"restaurants": [], "total_found": 0, "next_after": None}
+        distances_km = np.round(distances_m / 1000, 2)
+
+        window: List[int] = []
+        start = 0
+        if after is not None:
+            after_km, after_doc_id = after
+            # Results at the cursor's distance are ordered by doc_id
+            ties_start = int(np.searchsorted(distances_km, after_km, side="left"))
+            start = int(np.searchsorted(distances_km, after_km, side="right"))
+            window = [index for index in range(ties_start, start) if entries[index]["doc_id"] > after_doc_id]
+        end = min(start + page_size + 1, len(entries))
+        if end > start:
+            # Take every result tied with the last one so doc_id decides between them
+            end = int(np.searchsorted(distances_km, distances_km[end - 1], side="right"))
+        window.extend(range(start, end))
+        window.sort(key=lambda index: (distances_km[index], entries[index]["doc_id"]))
+
+        page = [{**entries[index], "distance_km": float(distances_km[index])} for index in window[:page_size]]
+        has_more = len(window) > page_size
+        return {
+            "restaurants": page,
+            "total_found": len(entries),
+            "next_after": self._search_sort_key(page[-1]) if page and has_more else None,
+        }
+
+    async def get_nearby_restaurants(self, user_lat: float, user_lng: float, limit: int = 20) -> List[Dict[str, Any]]:
+        """Get the restaurants closest to a location, nearest first"""
+        if self.catalog_index is not None and self.catalog_index.ready:
+            restaurants = self.catalog_index.nearest(user_lat, user_lng, limit)
+        else:
+            restaurants = (await self.search_restaurants(user_lat, user_lng, 50))[:limit]
+
+        return [
+            {
+                "place_id": restaurant.get("place_id"),
+                "name": restaurant.get("name"),
+                "latitude": restaurant["location"].latitude,
+                "longitude": restaurant["location"].longitude,
+                "distance_meters": restaurant["distance_km"] * 1000,
+                "doc_id": restaurant["doc_id"],
+                "has_search_timestamp": restaurant.get("has_search_timestamp", False),
+            }
+            for restaurant in restaurants
+        ]
+
+    async def _fetch_restaurants_by_place_ids(self, place_ids: List[str],
+                                              fields: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch restaurant documents for many place_ids, projected to `fields` if given.
+        Documents are keyed by place_id, so this is one batched get_all of direct
+        document reads. Place_ids that are not found fall back to chunked 'in'
+        queries on the place_id field for documents not yet re-keyed by the
+        migration (scripts/migrate_restaurant_ids.py).
+        """
+        restaurants_ref = self._collection("restaurants")
+        refs = [restaurants_ref.document(place_id) for place_id in place_ids]
+        snapshots = await self._get_all(refs, fields)
+
+        found = {}
+        for snapshot in snapshots:
+            if snapshot.exists:
+                data = snapshot.to_dict()
+                data["doc_id"] = snapshot.id
+                data.setdefault("place_id", snapshot.id)
+                found[snapshot.id] = data
+
+        missing = [place_id for place_id in place_ids if place_id not in found]
+        if missing and self.legacy_place_id_lookup:
+            found.update(await self._query_restaurants_by_place_ids(missing, fields))
+        return found
+
+    async def _query_restaurants_by_place_ids(self, place_ids: List[str],
+                                              fields: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Find legacy (auto-ID) restaurant documents with chunked 'in' queries on place_id"""
+        restaurants_ref = self._collection("restaurants")
+        if fields and "place_id" not in fields:
+            fields = [*fields, "place_id"]  # Results are keyed by it
+        queries = [
+            self._project(restaurants_ref.where(filter=FieldFilter("place_id", "in", place_ids[i:i + FIRESTORE_IN_LIMIT])), fields)
+            for i in range(0, len(place_ids), FIRESTORE_IN_LIMIT)
+        ]
+        chunks = await asyncio.gather(*(self._call(query.get) for query in queries))
+
+        found = {}
+        for docs in chunks:
+            for doc in docs:
                 data = doc.to_dict()
                 data["doc_id"] = doc.id
-                return data
-            return None
+                found.setdefault(data.get("place_id"), data)
+        return found
+
+    async def get_restaurants_by_place_ids(self, place_ids: List[str],
+                                           fields: Optional[Sequence[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Restaurant documents of many place_ids, keyed by place_id.
+        Callers that only use a few fields pass them as `fields` so the rest of
+        each document is neither transferred nor decoded; whole documents are
+        shared with the request-scope loader.
+        """
+        if not place_ids:
+            return {}
+        if fields:
+            return await self._fetch_restaurants_by_place_ids(place_ids, fields)
+        loader = self._loader()
+        if loader is not None:
+            loaded = await loader.load_many(place_ids)
+            return {place_id: data for place_id, data in loaded.items() if data is not None}
+        return await self._fetch_restaurants_by_place_ids(place_ids)
+
+    async def _locate_restaurant(self, place_id: str) -> Optional[Dict[str, Any]]:
+        """Doc id and details split marker of a restaurant, all that deletes and photo name updates need"""
+        found = await self.get_restaurants_by_place_ids([place_id], fields=[DETAILS_SPLIT_FIELD])
+        return found.get(place_id)
+
+    async def get_restaurant_by_place_id(self, place_id: str) -> Optional[Dict[str, Any]]:
+        """Get restaurant document by place_id (memoized within a request scope)"""
+        try:
+            loader = self._loader()
+            if loader is not None:
+                return await loader.load(place_id)
+
+            found = await self._fetch_restaurants_by_place_ids([place_id])
+            return found.get(place_id)
         except Exception as e:
             print(f"Error getting restaurant by place_id: {e}")
             return None
 
+    async def _with_cold_details(self, restaurants: Dict[str, Optional[Dict[str, Any]]]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Merge the cold details documents into split restaurant documents.
+        Documents written before the split still hold every field and are
+        returned unchanged, without an extra read.
+        """
+        split = {place_id: restaurant for place_id, restaurant in restaurants.items()
+                 if restaurant and restaurant.get(DETAILS_SPLIT_FIELD)}
+        if not split:
+            return restaurants
+        details_ref = self._collection(DETAILS_COLLECTION)
+        snapshots = await self._get_all([details_ref.document(restaurant["doc_id"]) for restaurant in split.values()])
+        cold = {snapshot.id: snapshot.to_dict() for snapshot in snapshots if snapshot.exists}
+        merged = dict(restaurants)
+        for place_id, restaurant in split.items():
+            merged[place_id] = {**restaurant, **(cold.get(restaurant["doc_id"]) or {})}
+        return merged
+
+    def _document_age_days(self, restaurant: Optional[Dict[str, Any]]) -> Optional[float]:
+        """Age of an already-loaded restaurant document in days, or None if it cannot be told"""
+        if not restaurant:
+            return None
+        
+        search_timestamp = restaurant.get("search_timestamp")
+        if not search_timestamp:
+            return None
+        
+        print(f"DEBUG: search_timestamp type: {type(search_timestamp)}, value: {search_timestamp}")
+        
+        # Convert Firestore timestamp to datetime
+        if hasattr(search_timestamp, 'timestamp'):
+            # Firestore timestamp object
+            last_updated = datetime.fromtimestamp(search_timestamp.timestamp())
+        elif isinstance(search_timestamp, str):
+            # String timestamp - try to parse it
+            try:
+                last_updated = datetime.fromisoformat(search_timestamp.replace('Z', '+00:00'))
+            except ValueError:
+                return None
+        elif isinstance(search_timestamp, datetime):
+            # Already a datetime object
+            last_updated = search_timestamp
+        else:
+            # Unknown type
+            return None
+        
+        return (datetime.now() - last_updated) / timedelta(days=1)
+
+    def _is_document_stale(self, restaurant: Optional[Dict[str, Any]], days_threshold: float = 7) -> bool:
+        """Check if an already-loaded restaurant document is older than the threshold"""
+        # Missing documents, timestamps and unreadable timestamps are all stale
+        age_days = self._document_age_days(restaurant)
+        return age_days is None or age_days > days_threshold
+
+    def _schedule_revalidation(self, place_id: str, tier: str):
+        """Start a background refresh of a restaurant, unless one is already running"""
+        if place_id in self._revalidations:
+            self.revalidation_stats["deduplicated"] += 1
+            return
+        
+        async def run():
+            try:
+                await self.revalidate(place_id, tier)
+            except Exception as e:
+                self.revalidation_stats["failed"] += 1
+                print(f"Error revalidating restaurant details for place_id {place_id}: {e}")
+            finally:
+                self._revalidations.pop(place_id, None)
+        
+        self.revalidation_stats["started"] += 1
+        self._revalidations[place_id] = asyncio.get_running_loop().create_task(run())
+
     async def is_restaurant_details_stale(self, place_id: str, days_threshold: int = 7) -> bool:
         """Check if restaurant details are older than the threshold"""
         try:
             restaurant = await self.get_restaurant_by_place_id(place_id)
-            if not restaurant:
-                return True  # If restaurant doesn't exist, consider it stale
-            
-            search_timestamp = restaurant.get("search_timestamp")
-            if not search_timestamp:
-                return True  # If no timestamp, consider it stale
-            
-            print(f"DEBUG: search_timestamp type: {type(search_timestamp)}, value: {search_timestamp}")
-            
-            # Convert Firestore timestamp to datetime
-            if hasattr(search_timestamp, 'timestamp'):
-                # Firestore timestamp object
-                last_updated = datetime.fromtimestamp(search_timestamp.timestamp())
-            elif isinstance(search_timestamp, str):
-                # String timestamp - try to parse it
-                try:
-                    last_updated = datetime.fromisoformat(search_timestamp.replace('Z', '+00:00'))
-                except ValueError:
-                    # If parsing fails, consider it stale
-                    return True
-            elif isinstance(search_timestamp, datetime):
-                # Already a datetime object
-                last_updated = search_timestamp
-            else:
-                # Unknown type, consider it stale
-                return True
-            
-            # Check if it's older than the threshold
-            threshold_date = datetime.now() - timedelta(days=days_threshold)
-            return last_updated < threshold_date
+            return self._is_document_stale(restaurant, days_threshold)
             
         except Exception as e:
             print(f"Error checking if restaurant details are stale: {e}")
             return True  # If error, consider it stale
 
-    async def get_restaurant_details_from_firebase(self, place_id: str) -> Optional[Dict[str, Any]]:
-        """Get restaurant details from Firebase if they exist and are fresh"""
+    def _details_from_document(self, place_id: str, restaurant: Optional[Dict[str, Any]],
+                               tier: str = "atmosphere") -> Optional[Dict[str, Any]]:
+        """
+        Extract servable details from a restaurant document, or None if missing,
+        stale or fetched at a lower field-mask tier than requested.
+        Between the soft and hard TTL the details are still served while one
+        background refresh brings the document up to date (stale-while-revalidate).
+        """
+        if not restaurant or not tier_satisfies(restaurant.get("details_tier"), tier):
+            return None
+        
+        # Check if details are stale (on the document we already loaded)
+        age_days = self._document_age_days(restaurant)
+        if age_days is None or age_days > self.soft_ttl_days:
+            if age_days is None or age_days > self.hard_ttl_days or self.revalidate is None:
+                return None  # Data is too old to serve, need to fetch fresh data
+            self.revalidation_stats["stale_served"] += 1
+            self._schedule_revalidation(place_id, restaurant.get("details_tier") or "atmosphere")
+        
+        # Return the restaurant details (excluding internal fields)
+        details = {}
+        exclude_fields = {'doc_id', 'place_id', 'location', 'search_timestamp', 'last_updated', DETAILS_SPLIT_FIELD}
+        
+        for key, value in restaurant.items():
+            if key not in exclude_fields and value is not None:
+                details[key] = value
+        
+        if details and self.details_cache is not None:
+            # Cached until the document turns stale
+            self.details_cache.put(place_id, details, ttl_seconds=(self.soft_ttl_days - age_days) * 86400)
+        
+        return details if details else None
+
+    def _cached_details(self, place_id: str, tier: str) -> Optional[Dict[str, Any]]:
+        """Details from the in-memory cache if they cover the requested tier"""
+        if self.details_cache is None:
+            return None
+        details = self.details_cache.get(place_id)
+        if details is None or not tier_satisfies(details.get("details_tier"), tier):
+            return None
+        return details
+
+    async def get_restaurant_details_from_firebase(self, place_id: str, tier: str = "atmosphere") -> Optional[Dict[str, Any]]:
+        """Get restaurant details from Firebase if they exist, are fresh and cover the tier"""
+        details = self._cached_details(place_id, tier)
+        if details is not None:
+            return details
+        
         try:
             restaurant = await self.get_restaurant_by_place_id(place_id)
-            if not restaurant:
-                return None
-            
-            # Check if details are stale
-            is_stale = await self.is_restaurant_details_stale(place_id, days_threshold=7)
-            if is_stale:
-                return None  # Data is stale, need to fetch fresh data
-            
-            # Return the restaurant details (excluding internal fields)
-            details = {}
-            exclude_fields = {'doc_id', 'place_id', 'location', 'search_timestamp', 'last_updated'}
-            
-            for key, value in restaurant.items():
-                if key not in exclude_fields and value is not None:
-                    details[key] = value
-            
-            return details if details else None
+            restaurant = (await self._with_cold_details({place_id: restaurant}))[place_id]
+            return self._details_from_document(place_id, restaurant, tier)
             
         except Exception as e:
             print(f"Error getting restaurant details from Firebase: {e}")
             return None
 
+    async def get_restaurant_details_batch(self, place_ids: List[str], tier: str = "atmosphere") -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Get fresh restaurant details for many place_ids with batched Firestore reads.
+        Returns a dict of place_id -> details, with None for missing, stale or
+        lower-tier documents (stale-while-revalidate applies as in
+        get_restaurant_details_from_firebase).
+        """
+        unique_ids = list(dict.fromkeys(place_ids))
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        for place_id in unique_ids:
+            details = self._cached_details(place_id, tier)
+            if details is not None:
+                results[place_id] = details
+        to_load = [place_id for place_id in unique_ids if place_id not in results]
+        if not to_load:
+            return results
+        
+        try:
+            loader = self._loader()
+            if loader is not None:
+                restaurants = await loader.load_many(to_load)
+            else:
+                restaurants = await self._fetch_restaurants_by_place_ids(to_load)
+            restaurants = await self._with_cold_details(restaurants)
+        except Exception as e:
+            print(f"Error batch getting restaurant details from Firebase: {e}")
+            restaurants = {}
+
+        for place_id in to_load:
+            results[place_id] = self._details_from_document(place_id, restaurants.get(place_id), tier)
+        return {place_id: results[place_id] for place_id in unique_ids}
+
     async def update_restaurant_details(self, place_id: str, details: Dict[str, Any]) -> bool:
-        """Update restaurant details in Firebase"""
+        """
+        Update restaurant details in Firebase.
+        Only fields that differ from the stored document are written, plus the
+        timestamps; refreshes that change anything bump details_change_count
+        and details_changed_at on the restaurant document.
+        """
         try:
             restaurant = await self.get_restaurant_by_place_id(place_id)
             if not restaurant:
@@ -209,22 +719,54 @@ class FirebaseService:
                 return False
             
             doc_id = restaurant["doc_id"]
-            restaurants_ref = self.db.collection("restaurants")
+            current = (await self._with_cold_details({place_id: restaurant}))[place_id]
             
             # Prepare update data
+            now = datetime.now()
             update_data = {
-                "search_timestamp": datetime.now(),
-                "last_updated": datetime.now()
+                "search_timestamp": now,
+                "last_updated": now
             }
             
-            # Add all the details fields
-            for key, value in details.items():
-                if value is not None:  # Only update non-null values
-                    update_data[key] = value
+            # A refresh at a cheaper tier leaves the richer stored fields in place,
+            # so it must not lower the stored tier either
+            new_tier = details.get("details_tier")
+            if new_tier and not tier_satisfies(new_tier, current.get("details_tier") or "atmosphere"):
+                details = {key: value for key, value in details.items() if key != "details_tier"}
+
+            # Add the details fields that changed (only non-null values are written)
+            changed = {key: value for key, value in details.items()
+                       if value is not None and current.get(key) != value}
+            update_data.update(changed)
+            if changed:
+                update_data["details_change_count"] = firestore.Increment(1)
+                update_data["details_changed_at"] = now
+            self.details_write_stats["updates"] += 1
+            self.details_write_stats["changed_updates"] += bool(changed)
+            self.details_write_stats["fields_written"] += len(changed)
+            self.details_write_stats["fields_unchanged"] += sum(
+                1 for key, value in details.items() if value is not None and key not in changed
+            )
             
-            # Update the document
-            import asyncio
-            await asyncio.to_thread(restaurants_ref.document(doc_id).update, update_data)
+            if self.split_details:
+                # Heavy fields go to the details document; both writes commit together
+                cold_data = {key: update_data.pop(key) for key in COLD_DETAILS_FIELDS if key in update_data}
+                if not restaurant.get(DETAILS_SPLIT_FIELD):
+                    for key in COLD_DETAILS_FIELDS:
+                        if key in restaurant:
+                            # Move fields written before the split
+                            cold_data.setdefault(key, restaurant[key])
+                            update_data[key] = firestore.DELETE_FIELD
+                    update_data[DETAILS_SPLIT_FIELD] = True
+                if cold_data:
+                    await self._write(("set", DETAILS_COLLECTION, doc_id, cold_data, True),
+                                      ("update", "restaurants", doc_id, update_data, False))
+                else:
+                    await self._write(("update", "restaurants", doc_id, update_data, False))
+            else:
+                # Update the document
+                await self._write(("update", "restaurants", doc_id, update_data, False))
+            self._forget(place_id)
             print(f"Successfully updated restaurant details for place_id: {place_id}")
             return True
             
@@ -232,20 +774,45 @@ class FirebaseService:
             print(f"Error updating restaurant details: {e}")
             return False
 
+    async def update_photo_names(self, place_id: str, photo_names: List[str]) -> bool:
+        """
+        Replace the stored photo names of a restaurant after they expired.
+        Leaves the details timestamps alone, so the rest of the details age as before.
+        """
+        try:
+            restaurant = await self._locate_restaurant(place_id)
+            if not restaurant:
+                return False
+            doc_id = restaurant["doc_id"]
+            if restaurant.get(DETAILS_SPLIT_FIELD):
+                await self._write(("set", DETAILS_COLLECTION, doc_id, {"photo_names": photo_names}, True))
+            else:
+                await self._write(("update", "restaurants", doc_id, {"photo_names": photo_names}, False))
+            self._forget(place_id)
+            return True
+        except Exception as e:
+            print(f"Error updating photo names for place_id {place_id}: {e}")
+            return False
+
     async def add_restaurant(self, restaurant_data: Dict[str, Any]) -> bool:
         """Add a restaurant to Firebase with simplified data structure"""
         try:
-            restaurants_ref = self.db.collection('restaurants')
+            restaurants_ref = self._collection('restaurants')
             
             # Convert location to GeoPoint
             if 'location' in restaurant_data:
                 lat = restaurant_data['location'].get('latitude', 0.0)
                 lng = restaurant_data['location'].get('longitude', 0.0)
                 restaurant_data['location'] = GeoPoint(lat, lng)
+                restaurant_data['geohash'] = geohash_encode(lat, lng)
             
-            # Add the restaurant document
-            doc_ref = restaurants_ref.document()
-            await asyncio.to_thread(doc_ref.set, restaurant_data)
+            # Add the restaurant document, keyed by place_id for direct reads
+            place_id = restaurant_data.get('place_id')
+            if place_id:
+                await self._write(("set", "restaurants", place_id, restaurant_data, False))
+                self._forget(place_id)
+            else:
+                await self._call(restaurants_ref.document().set, restaurant_data)
             
             return True
             
@@ -257,16 +824,20 @@ class FirebaseService:
         """Delete a restaurant from Firebase by place_id"""
         try:
             # First, find the restaurant document by place_id
-            restaurant = await self.get_restaurant_by_place_id(place_id)
+            restaurant = await self._locate_restaurant(place_id)
             if not restaurant:
                 print(f"Restaurant with place_id {place_id} not found in Firebase")
                 return False
             
             doc_id = restaurant["doc_id"]
-            restaurants_ref = self.db.collection("restaurants")
             
-            # Delete the document
-            await asyncio.to_thread(restaurants_ref.document(doc_id).delete)
+            # Delete the document and its details document, if any
+            if restaurant.get(DETAILS_SPLIT_FIELD):
+                await self._write(("delete", "restaurants", doc_id, None, False),
+                                  ("delete", DETAILS_COLLECTION, doc_id, None, False))
+            else:
+                await self._write(("delete", "restaurants", doc_id, None, False))
+            self._forget(place_id)
             print(f"Successfully deleted restaurant with place_id: {place_id}")
             return True
             
@@ -274,6 +845,28 @@ class FirebaseService:
             print(f"Error deleting restaurant by place_id {place_id}: {e}")
             return False
 
+    async def get_cached_location(self, cell: str) -> Optional[Dict[str, Any]]:
+        """Get the cached reverse-geocoding result of a geohash cell, if not expired"""
+        snapshot = await self._call(self._collection(LOCATION_CACHE_COLLECTION).document(cell).get)
+        if not snapshot.exists:
+            return None
+        data = snapshot.to_dict() or {}
+        expires_at = data.get("expires_at")
+        if expires_at is None or expires_at <= datetime.now(timezone.utc):
+            return None
+        return {"neighborhood": data.get("neighborhood"), "city": data.get("city")}
+
+    async def cache_location(self, cell: str, location: Dict[str, Any], ttl_seconds: float):
+        """Store the reverse-geocoding result of a geohash cell"""
+        now = datetime.now(timezone.utc)
+        await self._call(self._collection(LOCATION_CACHE_COLLECTION).document(cell).set, {
+            "neighborhood": location.get("neighborhood"),
+            "city": location.get("city"),
+            "cached_at": now,
+            # Also usable as a Firestore TTL policy field
+            "expires_at": now + timedelta(seconds=ttl_seconds),
+        })
+
 
 # Singleton instance
 _firebase_service = None
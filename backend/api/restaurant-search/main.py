@@ -4,68 +4,112 @@ Optimized for Cloud Run deployment
 """
 import os
 import asyncio
-from fastapi import FastAPI, Request, HTTPException, BackgroundTasks
+import orjson
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, HTTPException, BackgroundTasks, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse, RedirectResponse
 from dotenv import load_dotenv
-from models import GeoPoint, LocationResponse, RestaurantSearchRequest, RestaurantSearchResponse, Restaurant, RestaurantDetailsRequest, RestaurantDetailsResponse, MultipleRestaurantDetailsRequest, MultipleRestaurantDetailsResponse, RestaurantDetailsItem, DeleteRestaurantRequest, DeleteRestaurantResponse
+from models import GeoPoint, LocationResponse, RestaurantSearchRequest, RestaurantSearchResponse, Restaurant, RestaurantDetailsRequest, RestaurantDetailsResponse, MultipleRestaurantDetailsRequest, MultipleRestaurantDetailsResponse, RestaurantDetailsItem, DETAILS_FIELD_NAMES, DeleteRestaurantRequest, DeleteRestaurantResponse
 from places_service import places_service
-from firebase_service import get_firebase_service
+from firebase_service import get_firebase_service, request_scope
+from single_flight import SingleFlight
+from utils import encode_search_cursor, decode_search_cursor
 
 # Load environment variables
 load_dotenv()
 
+# Base URL of this service in /photo handles; defaults to the request's base URL
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "").rstrip("/")
+
+# Default Place Details field-mask tier per endpoint (essentials, pro or atmosphere)
+RESTAURANT_DETAILS_TIER = os.getenv("RESTAURANT_DETAILS_TIER", "atmosphere")
+MULTIPLE_RESTAURANT_DETAILS_TIER = os.getenv("MULTIPLE_RESTAURANT_DETAILS_TIER", "atmosphere")
+
+# Page size used when a search sends a cursor without a page_size
+DEFAULT_SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_DEFAULT_PAGE_SIZE", "50"))
+
+# Counters for the write-through persistence path
+write_through_stats = {
+    "writes": 0,
+    "failed_writes": 0,
+    "upstream_fetches_saved": 0,
+    "upstream_refetches": 0,
+}
+
+# Concurrent Google Places fetches for the same place_id share one upstream call
+details_flight = SingleFlight()
+
+
+def fetch_details_once(place_id: str, tier: str = "atmosphere"):
+    """Fetch details from Google Places API, joining an in-flight fetch for the same place_id and tier"""
+    return details_flight.do(f"{place_id}:{tier}", lambda: places_service.get_restaurant_details(place_id, tier=tier))
+
 # Background task function for updating restaurant details
-async def update_restaurant_details_background(place_id: str):
+async def update_restaurant_details_background(place_id: str, details: dict = None):
     """
-    Background task to update restaurant details in Firebase.
+    Background task to persist restaurant details to Firebase (write-through).
     This runs after the API response is sent to the frontend.
-    Note: This only runs when fresh data was fetched from Google Places API.
+    The details already fetched from Google Places API for the response are
+    written as-is, so a cache miss costs exactly one upstream fetch. Details are
+    only re-fetched when a caller has none to hand over.
     """
     try:
         firebase_service = get_firebase_service()
         
         print(f"Background task: Updating Firebase with fresh data for place_id: {place_id}")
         
-        # Get fresh details from Google Places API
-        details = await places_service.get_restaurant_details(place_id)
+        if details is None:
+            # No details handed over, fetch them from Google Places API
+            details = await places_service.get_restaurant_details(place_id)
+            write_through_stats["upstream_refetches"] += 1
+        else:
+            write_through_stats["upstream_fetches_saved"] += 1
         
         # Update Firebase with fresh details
         success = await firebase_service.update_restaurant_details(place_id, details)
         
         if success:
+            write_through_stats["writes"] += 1
             print(f"Successfully updated restaurant details for place_id: {place_id}")
         else:
+            write_through_stats["failed_writes"] += 1
             print(f"Failed to update restaurant details for place_id: {place_id}")
             
     except Exception as e:
+        write_through_stats["failed_writes"] += 1
         print(f"Error in background update for place_id {place_id}: {str(e)}")
 
 
-async def get_single_restaurant_details(place_id: str, firebase_service) -> tuple[str, dict, str]:
+async def revalidate_restaurant_details(place_id: str, tier: str = "atmosphere"):
     """
-    Get restaurant details for a single place_id with caching logic.
-    Returns (place_id, details_dict, data_source)
+    Refresh a restaurant that was served stale (stale-while-revalidate).
+    FirebaseService deduplicates these, so each stale restaurant costs one upstream fetch.
+    """
+    print(f"Revalidating stale restaurant details for place_id: {place_id}")
+    details, coalesced = await fetch_details_once(place_id, tier)
+    if coalesced:
+        return  # The request that started the fetch writes it through
+    if not await get_firebase_service().update_restaurant_details(place_id, details):
+        raise RuntimeError("Firebase update failed")
+
+
+async def fetch_restaurant_details_from_google(place_id: str, tier: str = "atmosphere") -> tuple[str, dict, str]:
+    """
+    Fetch restaurant details for a single place_id from Google Places API.
+    Returns (place_id, details_dict, data_source); data_source is
+    "google_places_coalesced" when another caller's fetch was shared, in which
+    case that caller is responsible for writing the details through.
     """
     import time
     start_time = time.time()
     
     try:
-        # First, try to get details from Firebase if they exist and are fresh
-        details = await firebase_service.get_restaurant_details_from_firebase(place_id)
-        
-        if details:
-            # Data exists in Firebase and is fresh, use it
-            elapsed = round((time.time() - start_time) * 1000, 1)
-            print(f"[{elapsed}ms] Using fresh data from Firebase for place_id: {place_id}")
-            return place_id, details, "firebase"
-        else:
-            # Data doesn't exist or is stale, fetch from Google Places API
-            print(f"[START] Fetching fresh data from Google Places API for place_id: {place_id}")
-            details = await places_service.get_restaurant_details(place_id)
-            elapsed = round((time.time() - start_time) * 1000, 1)
-            print(f"[{elapsed}ms] Completed Google Places API fetch for place_id: {place_id}")
-            return place_id, details, "google_places"
+        print(f"[START] Fetching fresh data from Google Places API for place_id: {place_id}")
+        details, coalesced = await fetch_details_once(place_id, tier)
+        elapsed = round((time.time() - start_time) * 1000, 1)
+        print(f"[{elapsed}ms] Completed Google Places API fetch for place_id: {place_id}" + (" (coalesced)" if coalesced else ""))
+        return place_id, details, "google_places_coalesced" if coalesced else "google_places"
             
     except Exception as e:
         elapsed = round((time.time() - start_time) * 1000, 1)
@@ -73,8 +117,133 @@ async def get_single_restaurant_details(place_id: str, firebase_service) -> tupl
         # Return empty details with error info
         return place_id, {}, f"error: {str(e)}"
 
+
+def get_photo_base_url(http_request: Request = None) -> str:
+    """Public base URL for /photo handles (PUBLIC_BASE_URL, else the request's own)"""
+    if PUBLIC_BASE_URL:
+        return PUBLIC_BASE_URL
+    return str(http_request.base_url).rstrip("/") if http_request is not None else ""
+
+
+def photo_handles(place_id: str, details: dict, photo_base_url: str = "") -> list:
+    """
+    Photo URLs for a response: /photo/{place_id}/{index} handles resolved on
+    demand when the photo names are known, otherwise the stored photo URIs.
+    """
+    photo_names = details.get("photo_names")
+    if photo_names:
+        return [f"{photo_base_url}/photo/{place_id}/{index}" for index in range(len(photo_names))]
+    return details.get("photos")
+
+
+def restaurant_details_payload(place_id: str, details: dict, photo_base_url: str = "") -> dict:
+    """
+    Response dict of the shared details fields, ready for ORJSONResponse.
+    Details come from our own Places parsing or Firebase documents written from it,
+    so they are not validated again on the way out.
+    """
+    payload = {name: details.get(name) for name in DETAILS_FIELD_NAMES}
+    payload["photos"] = photo_handles(place_id, details, photo_base_url)
+    return payload
+
+
+# Content types for the streaming mode of /multiple_restaurant_details
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+def format_stream_event(stream_format: str, event: str, data: dict) -> str:
+    """Encode one streamed event as an NDJSON line or a server-sent event"""
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+    return orjson.dumps({"event": event, "data": data}).decode() + "\n"
+
+
+async def stream_restaurant_details(stream_format: str, cached: list, to_fetch: list,
+                                    background_tasks: BackgroundTasks, start_time: float,
+                                    photo_base_url: str = "", tier: str = "atmosphere"):
+    """
+    Yield each restaurant (or error) of a /multiple_restaurant_details request as
+    soon as it resolves, followed by a summary event.
+    Restaurants already resolved from Firebase are sent first; Google Places
+    fetches are sent in completion order and written through to Firebase once
+    the stream has finished.
+    """
+    import time
+    found = 0
+    errors = 0
+    
+    def encode(result) -> str:
+        nonlocal found, errors
+        if isinstance(result, Exception):
+            errors += 1
+            return format_stream_event(stream_format, "error", {"place_id": "unknown", "error": str(result)})
+        place_id, details, data_source = result
+        if data_source.startswith("error:"):
+            errors += 1
+            error_msg = data_source.replace("error: ", "")
+            return format_stream_event(stream_format, "error", {"place_id": place_id, "error": error_msg})
+        found += 1
+        if data_source == "google_places":
+            background_tasks.add_task(update_restaurant_details_background, place_id, details)
+        item = {"place_id": place_id, **restaurant_details_payload(place_id, details, photo_base_url)}
+        return format_stream_event(stream_format, "restaurant", item)
+    
+    for result in cached:
+        yield encode(result)
+    
+    tasks = [asyncio.create_task(fetch_restaurant_details_from_google(place_id, tier)) for place_id in to_fetch]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                result = await next_done
+            except Exception as e:
+                result = e
+            yield encode(result)
+    finally:
+        # The client may disconnect mid-stream
+        for task in tasks:
+            task.cancel()
+    
+    elapsed = round((time.time() - start_time) * 1000, 1)
+    print(f"✅ Streamed {found} restaurants, {errors} errors in {elapsed}ms")
+    yield format_stream_event(stream_format, "summary", {"total_found": found, "errors": errors, "elapsed_ms": elapsed})
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared upstream connection pools on startup and close them on shutdown"""
+    await places_service.start()
+    try:
+        # Serve aging details from Firestore while refreshing them in the background
+        get_firebase_service().revalidate = revalidate_restaurant_details
+    except Exception as e:
+        print(f"Stale-while-revalidate not enabled: {e}")
+    catalog_index_enabled = os.getenv("CATALOG_INDEX_ENABLED", "true").lower() == "true"
+    if catalog_index_enabled:
+        try:
+            get_firebase_service().start_catalog_sync()
+        except Exception as e:
+            # Searches fall back to Firestore queries
+            print(f"Catalog index not started: {e}")
+    yield
+    if catalog_index_enabled:
+        try:
+            get_firebase_service().stop_catalog_sync()
+        except Exception as e:
+            print(f"Error stopping catalog index: {e}")
+    try:
+        # Commit writes still waiting in the batched writer
+        await get_firebase_service().flush_writes()
+    except Exception as e:
+        print(f"Error flushing Firestore writes: {e}")
+    await places_service.close()
+
 # Create FastAPI app with Cloud Run optimizations
 app = FastAPI(
+    lifespan=lifespan,
     title="Restaurant Search API",
     version="1.0.0",
     description="A FastAPI application for restaurant search with Google Places API and Firebase integration",
@@ -108,6 +277,12 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Request-scoped Firestore loader: batches and memoizes place_id lookups per request
+@app.middleware("http")
+async def firestore_request_scope(request: Request, call_next):
+    with request_scope():
+        return await call_next(request)
+
 # Global exception handler for Cloud Run
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -144,6 +319,37 @@ async def readiness():
         "service": "restaurant-search-api"
     }
 
+# Runtime metrics (connection pools, caches, counters)
+@app.get("/metrics")
+async def metrics():
+    try:
+        firebase_service = get_firebase_service()
+        catalog_index = firebase_service.catalog_index.stats()
+        revalidation = dict(firebase_service.revalidation_stats)
+        details_cache = firebase_service.details_cache.metrics()
+        details_writes = dict(firebase_service.details_write_stats)
+        write_buffer = firebase_service.writer.metrics() if firebase_service.writer is not None else None
+    except Exception as e:
+        catalog_index = {"error": str(e)}
+        revalidation = {"error": str(e)}
+        details_cache = {"error": str(e)}
+        details_writes = {"error": str(e)}
+        write_buffer = {"error": str(e)}
+    
+    return {
+        "places_http": places_service.pool_stats(),
+        "location_cache": places_service.location_cache_stats(),
+        "photo_uri_cache": places_service.photo_uri_cache_stats(),
+        "photo_names_cache": places_service.photo_names_cache_stats(),
+        "write_through": dict(write_through_stats),
+        "details_writes": details_writes,
+        "write_buffer": write_buffer,
+        "catalog_index": catalog_index,
+        "revalidation": revalidation,
+        "details_cache": details_cache,
+        "single_flight": details_flight.metrics()
+    }
+
 # Location information endpoint
 @app.post("/location", response_model=LocationResponse)
 async def get_location_info(geopoint: GeoPoint):
@@ -182,18 +388,40 @@ async def search_restaurants(request: RestaurantSearchRequest):
     """
     Search restaurants within radius using Firebase GeoPoint + geohash pattern.
     Fast and accurate with Haversine post-filtering.
+    Pass page_size to page through results nearest first, sending back the
+    returned next_cursor until it is null.
     """
+    try:
+        after = decode_search_cursor(request.cursor) if request.cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     try:
         firebase_service = get_firebase_service()
         
         # Search restaurants within radius
-        restaurants_data = await firebase_service.search_restaurants(
-            center_lat=request.center.latitude,
-            center_lng=request.center.longitude,
-            radius_km=request.radius_km
-        )
+        next_cursor = None
+        if request.page_size is None and after is None:
+            restaurants_data = await firebase_service.search_restaurants(
+                center_lat=request.center.latitude,
+                center_lng=request.center.longitude,
+                radius_km=request.radius_km
+            )
+            total_found = len(restaurants_data)
+        else:
+            page = await firebase_service.search_restaurants_page(
+                center_lat=request.center.latitude,
+                center_lng=request.center.longitude,
+                radius_km=request.radius_km,
+                page_size=request.page_size or DEFAULT_SEARCH_PAGE_SIZE,
+                after=after
+            )
+            restaurants_data = page["restaurants"]
+            total_found = page["total_found"]
+            if page["next_after"] is not None:
+                next_cursor = encode_search_cursor(*page["next_after"])
         
-        # Convert to Restaurant models
+        # Convert only the returned restaurants to Restaurant models
         restaurants = []
         for restaurant in restaurants_data:
             # Convert GeoPoint to dictionary format for Pydantic
@@ -213,7 +441,8 @@ async def search_restaurants(request: RestaurantSearchRequest):
         
         return RestaurantSearchResponse(
             restaurants=restaurants,
-            total_found=len(restaurants)
+            total_found=total_found,
+            next_cursor=next_cursor
         )
         
     except Exception as e:
@@ -223,7 +452,7 @@ async def search_restaurants(request: RestaurantSearchRequest):
 
 # Restaurant details endpoint
 @app.post("/restaurant_details", response_model=RestaurantDetailsResponse)
-async def get_restaurant_details(request: RestaurantDetailsRequest, background_tasks: BackgroundTasks):
+async def get_restaurant_details(request: RestaurantDetailsRequest, background_tasks: BackgroundTasks, http_request: Request = None):
     """
     Get comprehensive restaurant details from Firebase (if fresh) or Google Places API.
     Returns essential and pro-level restaurant information.
@@ -232,7 +461,8 @@ async def get_restaurant_details(request: RestaurantDetailsRequest, background_t
         firebase_service = get_firebase_service()
         
         # First, try to get details from Firebase if they exist and are fresh
-        details = await firebase_service.get_restaurant_details_from_firebase(request.place_id)
+        tier = request.tier or RESTAURANT_DETAILS_TIER
+        details = await firebase_service.get_restaurant_details_from_firebase(request.place_id, tier=tier)
         
         if details:
             # Data exists in Firebase and is fresh, use it
@@ -241,84 +471,20 @@ async def get_restaurant_details(request: RestaurantDetailsRequest, background_t
         else:
             # Data doesn't exist or is stale, fetch from Google Places API
             print(f"Fetching fresh data from Google Places API for place_id: {request.place_id}")
-            details = await places_service.get_restaurant_details(request.place_id)
-            data_source = "google_places"
+            details, coalesced = await fetch_details_once(request.place_id, tier)
+            data_source = "google_places_coalesced" if coalesced else "google_places"
         
         # Location is required and can be used for additional context
         print(f"Location provided: {request.location.latitude}, {request.location.longitude}")
         
-        response = RestaurantDetailsResponse(
-            # Basic Info (Place Details Essentials)
-            name=details.get("name"),
-            business_status=details.get("business_status"),
-            rating=details.get("rating"),
-            price_level=details.get("price_level"),
-            
-            # Location & Contact (Place Details Essentials)
-            formatted_address=details.get("formatted_address"),
-            phone_number=details.get("phone_number"),
-            international_phone_number=details.get("international_phone_number"),
-            
-            # Categories & Types (Place Details Essentials)
-            primary_type=details.get("primary_type"),
-            types=details.get("types"),
-            
-            # Hours (Place Details Pro)
-            regular_opening_hours=details.get("regular_opening_hours"),
-            
-            # Reviews & Content (Place Details Pro)
-            editorial_summary=details.get("editorial_summary"),
-            generative_summary=details.get("generative_summary"),
-            review_summary=details.get("review_summary"),
-            
-            # Media (Place Details Pro)
-            photos=details.get("photos"),
-            
-            # Maps Integration (Place Details Essentials)
-            google_maps_uri=details.get("google_maps_uri"),
-            website_uri=details.get("website_uri"),
-            
-            # Enterprise Level Fields
-            user_rating_count=details.get("user_rating_count"),
-            
-            # Enterprise + Atmosphere Fields
-            # Service Options
-            takeout=details.get("takeout"),
-            delivery=details.get("delivery"),
-            dine_in=details.get("dine_in"),
-            curbside_pickup=details.get("curbside_pickup"),
-            reservable=details.get("reservable"),
-            
-            # Food & Beverage
-            serves_breakfast=details.get("serves_breakfast"),
-            serves_lunch=details.get("serves_lunch"),
-            serves_dinner=details.get("serves_dinner"),
-            serves_beer=details.get("serves_beer"),
-            serves_wine=details.get("serves_wine"),
-            serves_cocktails=details.get("serves_cocktails"),
-            serves_vegetarian_food=details.get("serves_vegetarian_food"),
-            
-            # Ambience & Amenities
-            outdoor_seating=details.get("outdoor_seating"),
-            live_music=details.get("live_music"),
-            good_for_groups=details.get("good_for_groups"),
-            good_for_children=details.get("good_for_children"),
-            good_for_watching_sports=details.get("good_for_watching_sports"),
-            allows_dogs=details.get("allows_dogs"),
-            restroom=details.get("restroom"),
-            
-            # Accessibility & Payment
-            accessibility_options=details.get("accessibility_options"),
-            payment_options=details.get("payment_options"),
-            parking_options=details.get("parking_options")
-        )
+        response = ORJSONResponse(restaurant_details_payload(request.place_id, details, get_photo_base_url(http_request)))
         
         # Add background task to update Firebase if we fetched fresh data from Google Places API
         if data_source == "google_places":
-            background_tasks.add_task(update_restaurant_details_background, request.place_id)
+            background_tasks.add_task(update_restaurant_details_background, request.place_id, details)
             print(f"Added background task to update Firebase for place_id: {request.place_id}")
         else:
-            print(f"No background task needed - using fresh Firebase data for place_id: {request.place_id}")
+            print(f"No background task needed - data source is {data_source} for place_id: {request.place_id}")
         
         return response
         
@@ -331,29 +497,59 @@ async def get_restaurant_details(request: RestaurantDetailsRequest, background_t
 
 # Multiple restaurant details endpoint with concurrent processing
 @app.post("/multiple_restaurant_details", response_model=MultipleRestaurantDetailsResponse)
-async def get_multiple_restaurant_details(request: MultipleRestaurantDetailsRequest, background_tasks: BackgroundTasks):
+async def get_multiple_restaurant_details(request: MultipleRestaurantDetailsRequest, background_tasks: BackgroundTasks, http_request: Request = None):
     """
     Get comprehensive restaurant details for multiple restaurants concurrently.
     Uses Firebase caching when available, otherwise fetches from Google Places API.
     Processes all requests concurrently for better performance.
+    Set stream to "ndjson" or "sse" to receive each restaurant as soon as it
+    resolves instead of waiting for the slowest fetch.
     """
     try:
         import time
         start_time = time.time()
         firebase_service = get_firebase_service()
         
-        # Process all place_ids concurrently
+        # Resolve all place_ids against Firebase with batched reads
         print(f"🚀 Processing {len(request.place_ids)} restaurant details concurrently")
+        tier = request.tier or MULTIPLE_RESTAURANT_DETAILS_TIER
+        cached_details = await firebase_service.get_restaurant_details_batch(request.place_ids, tier=tier)
+        
+        results = []
+        misses = []  # Indexes of place_ids that are missing or stale in Firebase
+        for index, place_id in enumerate(request.place_ids):
+            details = cached_details.get(place_id)
+            if details:
+                results.append((place_id, details, "firebase"))
+            else:
+                results.append(None)
+                misses.append(index)
+        
+        batch_elapsed = round((time.time() - start_time) * 1000, 1)
+        print(f"[{batch_elapsed}ms] Firebase batch lookup: {len(request.place_ids) - len(misses)} fresh, {len(misses)} to fetch")
+        
+        if request.stream:
+            # Cached restaurants go out immediately, fetches follow as they complete
+            cached = [result for result in results if result is not None]
+            to_fetch = [request.place_ids[index] for index in misses]
+            return StreamingResponse(
+                stream_restaurant_details(request.stream, cached, to_fetch, background_tasks, start_time,
+                                          get_photo_base_url(http_request), tier),
+                media_type=STREAM_MEDIA_TYPES[request.stream],
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
         
-        # Create tasks for concurrent execution
+        # Only misses and stale documents fan out to Google Places API
         tasks = [
-            get_single_restaurant_details(place_id, firebase_service) 
-            for place_id in request.place_ids
+            fetch_restaurant_details_from_google(request.place_ids[index], tier)
+            for index in misses
         ]
         
         # Execute all tasks concurrently
         print(f"⏱️  Starting concurrent execution of {len(tasks)} tasks...")
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        fetched = await asyncio.gather(*tasks, return_exceptions=True)
+        for index, result in zip(misses, fetched):
+            results[index] = result
         
         total_elapsed = round((time.time() - start_time) * 1000, 1)
         print(f"✅ All {len(tasks)} tasks completed in {total_elapsed}ms (concurrent)")
@@ -361,7 +557,8 @@ async def get_multiple_restaurant_details(request: MultipleRestaurantDetailsRequ
         # Process results and build response
         restaurants = []
         errors = []
-        place_ids_to_update = []  # For background tasks
+        details_to_persist = []  # For background tasks
+        photo_base_url = get_photo_base_url(http_request)
         
         for result in results:
             if isinstance(result, Exception):
@@ -378,93 +575,25 @@ async def get_multiple_restaurant_details(request: MultipleRestaurantDetailsRequ
                 errors.append({"place_id": place_id, "error": error_msg})
                 continue
             
-            # Create RestaurantDetailsItem from details
-            restaurant_item = RestaurantDetailsItem(
-                place_id=place_id,
-                # Basic Info (Place Details Essentials)
-                name=details.get("name"),
-                business_status=details.get("business_status"),
-                rating=details.get("rating"),
-                price_level=details.get("price_level"),
-                
-                # Location & Contact (Place Details Essentials)
-                formatted_address=details.get("formatted_address"),
-                phone_number=details.get("phone_number"),
-                international_phone_number=details.get("international_phone_number"),
-                
-                # Categories & Types (Place Details Essentials)
-                primary_type=details.get("primary_type"),
-                types=details.get("types"),
-                
-                # Hours (Place Details Pro)
-                regular_opening_hours=details.get("regular_opening_hours"),
-                
-                # Reviews & Content (Place Details Pro)
-                editorial_summary=details.get("editorial_summary"),
-                generative_summary=details.get("generative_summary"),
-                review_summary=details.get("review_summary"),
-                
-                # Media (Place Details Pro)
-                photos=details.get("photos"),
-                
-                # Maps Integration (Place Details Essentials)
-                google_maps_uri=details.get("google_maps_uri"),
-                website_uri=details.get("website_uri"),
-                
-                # Enterprise Level Fields
-                user_rating_count=details.get("user_rating_count"),
-                
-                # Enterprise + Atmosphere Fields
-                # Service Options
-                takeout=details.get("takeout"),
-                delivery=details.get("delivery"),
-                dine_in=details.get("dine_in"),
-                curbside_pickup=details.get("curbside_pickup"),
-                reservable=details.get("reservable"),
-                
-                # Food & Beverage
-                serves_breakfast=details.get("serves_breakfast"),
-                serves_lunch=details.get("serves_lunch"),
-                serves_dinner=details.get("serves_dinner"),
-                serves_beer=details.get("serves_beer"),
-                serves_wine=details.get("serves_wine"),
-                serves_cocktails=details.get("serves_cocktails"),
-                serves_vegetarian_food=details.get("serves_vegetarian_food"),
-                
-                # Ambience & Amenities
-                outdoor_seating=details.get("outdoor_seating"),
-                live_music=details.get("live_music"),
-                good_for_groups=details.get("good_for_groups"),
-                good_for_children=details.get("good_for_children"),
-                good_for_watching_sports=details.get("good_for_watching_sports"),
-                allows_dogs=details.get("allows_dogs"),
-                restroom=details.get("restroom"),
-                
-                # Accessibility & Payment
-                accessibility_options=details.get("accessibility_options"),
-                payment_options=details.get("payment_options"),
-                parking_options=details.get("parking_options")
-            )
-            
-            restaurants.append(restaurant_item)
+            restaurants.append({"place_id": place_id, **restaurant_details_payload(place_id, details, photo_base_url)})
             
-            # Track place_ids that need background updates
+            # Track fetched details that need to be written through to Firebase
             if data_source == "google_places":
-                place_ids_to_update.append(place_id)
+                details_to_persist.append((place_id, details))
         
         # Add background tasks for place_ids that were fetched from Google Places API
-        for place_id in place_ids_to_update:
-            background_tasks.add_task(update_restaurant_details_background, place_id)
+        for place_id, details in details_to_persist:
+            background_tasks.add_task(update_restaurant_details_background, place_id, details)
             print(f"Added background task to update Firebase for place_id: {place_id}")
         
         # Location is required and can be used for additional context
         print(f"Location provided: {request.location.latitude}, {request.location.longitude}")
         
-        response = MultipleRestaurantDetailsResponse(
-            restaurants=restaurants,
-            total_found=len(restaurants),
-            errors=errors if errors else None
-        )
+        response = ORJSONResponse({
+            "restaurants": restaurants,
+            "total_found": len(restaurants),
+            "errors": errors if errors else None
+        })
         
         print(f"Successfully processed {len(restaurants)} restaurants, {len(errors)} errors")
         return response
@@ -476,6 +605,54 @@ async def get_multiple_restaurant_details(request: MultipleRestaurantDetailsRequ
         raise HTTPException(status_code=500, detail="Failed to get multiple restaurant details")
 
 
+# Lazy photo endpoint behind the photo handles of details responses
+@app.get("/photo/{place_id}/{index}")
+async def get_photo(place_id: str, index: int, background_tasks: BackgroundTasks,
+                    max_height: int = Query(800, ge=1, le=4800)):
+    """
+    Resolve one photo of a restaurant on demand and redirect to its image URL.
+    Photo names come from the restaurant's Firebase details (or, for restaurants
+    not stored yet, a photos-only Places request); resolved URIs are cached.
+    Photo names expire, so when a name no longer resolves the current names are
+    fetched once, written back to Firebase and used for a retry.
+    """
+    try:
+        # Photo names are part of every tier
+        details = await get_firebase_service().get_restaurant_details_from_firebase(place_id, tier="essentials")
+    except Exception as e:
+        print(f"Error loading photo names from Firebase for place_id {place_id}: {e}")
+        details = None
+    
+    try:
+        stored_names = (details or {}).get("photo_names")
+        photo_names = stored_names or await places_service.get_photo_names(place_id)
+        if index < 0 or index >= len(photo_names):
+            raise HTTPException(status_code=404, detail="Photo not found")
+        
+        photo_uri = await places_service.resolve_photo_uri(photo_names[index], max_height)
+        if not photo_uri:
+            # The name may have expired: retry once with the place's current photo names
+            photo_names = await places_service.get_photo_names(place_id, refresh=True)
+            if stored_names and photo_names and photo_names != stored_names:
+                background_tasks.add_task(get_firebase_service().update_photo_names, place_id, photo_names)
+            if index >= len(photo_names):
+                raise HTTPException(status_code=404, detail="Photo not found")
+            photo_uri = await places_service.resolve_photo_uri(photo_names[index], max_height)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error in photo endpoint: {e}")
+        raise HTTPException(status_code=502, detail="Failed to resolve photo")
+    
+    if not photo_uri:
+        raise HTTPException(status_code=502, detail="Failed to resolve photo")
+    
+    # Google's photo URIs are short-lived, so clients should not cache the redirect for long
+    return RedirectResponse(photo_uri, status_code=302, headers={"Cache-Control": "private, max-age=300"})
+
+
 # Delete restaurant endpoint
 @app.delete("/restaurant", response_model=DeleteRestaurantResponse)
 async def delete_restaurant(request: DeleteRestaurantRequest):
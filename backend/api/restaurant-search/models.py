@@ -1,10 +1,21 @@
 """
 Data models for the restaurant search API
 """
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 from pydantic import BaseModel, Field
 
 
+# Place Details field-mask tiers, cheapest first; each tier includes the fields of the previous ones
+DETAILS_TIERS = ("essentials", "pro", "atmosphere")
+DetailsTier = Literal["essentials", "pro", "atmosphere"]
+
+
+def tier_satisfies(available: Optional[str], requested: str) -> bool:
+    """Whether details fetched at the available tier cover the requested tier"""
+    # Details stored before tiers existed were fetched with the full mask
+    return DETAILS_TIERS.index(available or "atmosphere") >= DETAILS_TIERS.index(requested)
+
+
 class GeoPoint(BaseModel):
     """GeoPoint model for coordinates"""
     latitude: float = Field(..., description="Latitude coordinate", ge=-90, le=90)
@@ -29,6 +40,8 @@ class RestaurantSearchRequest(BaseModel):
     """Request model for restaurant search by radius"""
     center: GeoPoint = Field(..., description="Center point for search")
     radius_km: float = Field(..., description="Search radius in kilometers", gt=0, le=50)
+    page_size: Optional[int] = Field(None, description="Results per page (omit to return every result)", ge=1, le=500)
+    cursor: Optional[str] = Field(None, description="next_cursor from the previous page")
 
 
 class Restaurant(BaseModel):
@@ -44,12 +57,16 @@ class RestaurantSearchResponse(BaseModel):
     """Response model for restaurant search endpoint"""
     restaurants: List[Restaurant] = Field(..., description="List of restaurants found")
     total_found: int = Field(..., description="Total number of restaurants found")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, or null on the last page")
 
 
 class RestaurantDetailsRequest(BaseModel):
     """Request model for restaurant details endpoint"""
     place_id: str = Field(..., description="Google Place ID")
     location: GeoPoint = Field(..., description="Location coordinates (required)")
+    tier: Optional[DetailsTier] = Field(None, description="Field-mask tier to fetch (defaults per endpoint); "
+                                        "billed as Place Details Pro (essentials), Enterprise (pro) "
+                                        "or Enterprise + Atmosphere (atmosphere)")
 
 
 class DeleteRestaurantRequest(BaseModel):
@@ -68,11 +85,16 @@ class MultipleRestaurantDetailsRequest(BaseModel):
     """Request model for multiple restaurant details endpoint"""
     place_ids: List[str] = Field(..., description="List of Google Place IDs", min_length=1, max_length=20)
     location: GeoPoint = Field(..., description="Location coordinates (required)")
+    tier: Optional[DetailsTier] = Field(None, description="Field-mask tier to fetch (defaults per endpoint); "
+                                        "billed as Place Details Pro (essentials), Enterprise (pro) "
+                                        "or Enterprise + Atmosphere (atmosphere)")
+    stream: Optional[Literal["ndjson", "sse"]] = Field(
+        None, description="Stream each restaurant as soon as it resolves (NDJSON lines or server-sent events)"
+    )
 
 
-class RestaurantDetailsItem(BaseModel):
-    """Individual restaurant details item with place_id for identification"""
-    place_id: str = Field(..., description="Google Place ID")
+class RestaurantDetailsFields(BaseModel):
+    """Restaurant details fields shared by the single and multiple details responses"""
     # Basic Info (Place Details Essentials)
     name: Optional[str] = Field(None, description="Restaurant name")
     business_status: Optional[str] = Field(None, description="Business status")
@@ -138,6 +160,15 @@ class RestaurantDetailsItem(BaseModel):
     parking_options: Optional[Dict[str, Any]] = Field(None, description="Parking options")
 
 
+class RestaurantDetailsItem(RestaurantDetailsFields):
+    """Individual restaurant details item with place_id for identification"""
+    place_id: str = Field(..., description="Google Place ID")
+
+
+# Detail keys copied into responses, in model order
+DETAILS_FIELD_NAMES = tuple(RestaurantDetailsFields.model_fields)
+
+
 class MultipleRestaurantDetailsResponse(BaseModel):
     """Response model for multiple restaurant details endpoint"""
     restaurants: List[RestaurantDetailsItem] = Field(..., description="List of restaurant details")
@@ -145,68 +176,5 @@ class MultipleRestaurantDetailsResponse(BaseModel):
     errors: Optional[List[Dict[str, str]]] = Field(None, description="List of errors for failed place_ids")
 
 
-class RestaurantDetailsResponse(BaseModel):
+class RestaurantDetailsResponse(RestaurantDetailsFields):
     """Response model for comprehensive restaurant details including Enterprise and Enterprise + Atmosphere"""
-    # Basic Info (Place Details Essentials)
-    name: Optional[str] = Field(None, description="Restaurant name")
-    business_status: Optional[str] = Field(None, description="Business status")
-    rating: Optional[float] = Field(None, description="Restaurant rating")
-    price_level: Optional[int] = Field(None, description="Price level (0-4)")
-    
-    # Location & Contact (Place Details Essentials)
-    formatted_address: Optional[str] = Field(None, description="Full formatted address")
-    phone_number: Optional[str] = Field(None, description="Phone number")
-    international_phone_number: Optional[str] = Field(None, description="International phone number")
-    
-    # Categories & Types (Place Details Essentials)
-    primary_type: Optional[str] = Field(None, description="Primary business type")
-    types: Optional[List[str]] = Field(None, description="All business types")
-    
-    # Hours (Place Details Pro)
-    regular_opening_hours: Optional[Dict[str, Any]] = Field(None, description="Regular opening hours")
-    
-    # Reviews & Content (Place Details Pro)
-    editorial_summary: Optional[Dict[str, Any]] = Field(None, description="Editorial summary")
-    generative_summary: Optional[Dict[str, Any]] = Field(None, description="AI-generated summary")
-    review_summary: Optional[Dict[str, Any]] = Field(None, description="Review summary")
-    
-    # Media (Place Details Pro)
-    photos: Optional[List[str]] = Field(None, description="Photo URLs")
-    
-    # Maps Integration (Place Details Essentials)
-    google_maps_uri: Optional[str] = Field(None, description="Google Maps URI")
-    website_uri: Optional[str] = Field(None, description="Website URI")
-    
-    # Enterprise Level Fields
-    user_rating_count: Optional[int] = Field(None, description="Number of user ratings")
-    
-    # Enterprise + Atmosphere Fields
-    # Service Options
-    takeout: Optional[bool] = Field(None, description="Takeout available")
-    delivery: Optional[bool] = Field(None, description="Delivery available")
-    dine_in: Optional[bool] = Field(None, description="Dine-in available")
-    curbside_pickup: Optional[bool] = Field(None, description="Curbside pickup available")
-    reservable: Optional[bool] = Field(None, description="Reservations available")
-    
-    # Food & Beverage
-    serves_breakfast: Optional[bool] = Field(None, description="Serves breakfast")
-    serves_lunch: Optional[bool] = Field(None, description="Serves lunch")
-    serves_dinner: Optional[bool] = Field(None, description="Serves dinner")
-    serves_beer: Optional[bool] = Field(None, description="Serves beer")
-    serves_wine: Optional[bool] = Field(None, description="Serves wine")
-    serves_cocktails: Optional[bool] = Field(None, description="Serves cocktails")
-    serves_vegetarian_food: Optional[bool] = Field(None, description="Serves vegetarian food")
-    
-    # Ambience & Amenities
-    outdoor_seating: Optional[bool] = Field(None, description="Has outdoor seating")
-    live_music: Optional[bool] = Field(None, description="Has live music")
-    good_for_groups: Optional[bool] = Field(None, description="Good for groups")
-    good_for_children: Optional[bool] = Field(None, description="Good for children")
-    good_for_watching_sports: Optional[bool] = Field(None, description="Good for watching sports")
-    allows_dogs: Optional[bool] = Field(None, description="Allows dogs")
-    restroom: Optional[bool] = Field(None, description="Has restroom")
-    
-    # Accessibility & Payment
-    accessibility_options: Optional[Dict[str, Any]] = Field(None, description="Accessibility options")
-    payment_options: Optional[Dict[str, Any]] = Field(None, description="Payment options")
-    parking_options: Optional[Dict[str, Any]] = Field(None, description="Parking options")
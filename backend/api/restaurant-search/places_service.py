@@ -1,13 +1,67 @@
 """
 Google Places API service
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from collections import defaultdict
+from urllib.parse import urlsplit
+import asyncio
+import random
 import httpx
 import os
-from utils import haversine_meters
+from utils import haversine_meters, geohash_encode
+from rate_limiter import TokenBucket, AdaptiveConcurrencyLimiter
+from ttl_cache import TTLCache
+from models import DETAILS_TIERS
 from dotenv import load_dotenv
 load_dotenv()
 
+# Place Details fields added by each tier (see models.DETAILS_TIERS). A request
+# is billed at the SKU of its most expensive field, so each tier only adds
+# fields of the SKU it is billed at.
+DETAILS_TIER_FIELDS = {
+    # Pro SKU: what list views render, name, status, address, type and photos
+    "essentials": [
+        "id", "displayName", "businessStatus",
+        "formattedAddress", "primaryType", "types", "googleMapsUri", "accessibilityOptions",
+        "photos.name", "photos.heightPx", "photos.widthPx",
+    ],
+    # Enterprise SKU: rating, price, contact and hours of the details view
+    "pro": [
+        "rating", "priceLevel", "userRatingCount",
+        "nationalPhoneNumber", "internationalPhoneNumber", "websiteUri",
+        "regularOpeningHours",
+    ],
+    # Enterprise + Atmosphere SKU: summaries, service options and amenities
+    "atmosphere": [
+        "editorialSummary", "generativeSummary", "reviewSummary",
+        "takeout", "delivery", "dineIn", "curbsidePickup", "reservable",
+        "servesBreakfast", "servesLunch", "servesDinner", "servesBeer", "servesWine",
+        "servesCocktails", "servesVegetarianFood",
+        "outdoorSeating", "liveMusic", "goodForGroups", "goodForChildren",
+        "goodForWatchingSports", "allowsDogs", "restroom",
+        "paymentOptions", "parkingOptions",
+    ],
+}
+
+# Place Details SKU each tier is billed at. The tier names are ours, not Google's:
+# each one bills one SKU above its name
+DETAILS_TIER_SKUS = {"essentials": "Pro", "pro": "Enterprise", "atmosphere": "Enterprise + Atmosphere"}
+
+
+def details_field_mask(tier: str) -> List[str]:
+    """Fields to request for a tier: its own fields plus those of every cheaper tier"""
+    if tier not in DETAILS_TIERS:
+        raise ValueError(f"Unknown details tier: {tier}")
+    return [
+        field
+        for name in DETAILS_TIERS[:DETAILS_TIERS.index(tier) + 1]
+        for field in DETAILS_TIER_FIELDS[name]
+    ]
+
+# Upstream statuses worth retrying; 429/503 (and transport errors) also shrink the concurrency window
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+OVERLOAD_STATUS_CODES = {429, 503}
+
 class PlacesService:
     """Service class for Google Places API operations"""
     
@@ -15,6 +69,160 @@ class PlacesService:
         self.api_key = os.getenv("GOOGLE_MAPS_API_KEY")
         self.base_url = "https://places.googleapis.com/v1"
         self.geocoding_url = "https://maps.googleapis.com/maps/api/geocode/json"
+
+        # Shared connection pool settings (one pooled client per process)
+        self.http2 = os.getenv("PLACES_HTTP2", "true").lower() == "true"
+        self.max_connections = int(os.getenv("PLACES_MAX_CONNECTIONS", "100"))
+        self.max_keepalive_connections = int(os.getenv("PLACES_MAX_KEEPALIVE_CONNECTIONS", "20"))
+        self.keepalive_expiry = float(os.getenv("PLACES_KEEPALIVE_EXPIRY_SECONDS", "60"))
+        self._client: Optional[httpx.AsyncClient] = None
+        self._request_counts: Dict[str, int] = defaultdict(int)
+        self._error_counts: Dict[str, int] = defaultdict(int)
+
+        # Photo media resolution fan-out caps
+        self.photo_concurrency_per_place = int(os.getenv("PLACES_PHOTO_CONCURRENCY_PER_PLACE", "4"))
+        self.photo_concurrency = int(os.getenv("PLACES_PHOTO_CONCURRENCY", "32"))
+        self._photo_semaphore = asyncio.Semaphore(self.photo_concurrency)
+        # Resolved photoUris by photo name and max height; Google's URIs are
+        # short-lived, so keep the TTL well below their expiry
+        self.photo_uri_ttl = float(os.getenv("PLACES_PHOTO_URI_TTL_SECONDS", "1800"))
+        self._photo_uri_cache = TTLCache(int(os.getenv("PLACES_PHOTO_URI_CACHE_MAX_ENTRIES", "20000")))
+        # Photo names per place for the lazy /photo endpoint; one small entry per
+        # place, and names outlive URIs but still expire
+        self.photo_names_ttl = float(os.getenv("PLACES_PHOTO_NAMES_TTL_SECONDS", "3600"))
+        self._photo_names_cache = TTLCache(int(os.getenv("PLACES_PHOTO_NAMES_CACHE_MAX_ENTRIES", "5000")))
+        # Return photo names for /photo handles instead of resolving URIs up front
+        self.lazy_photos = os.getenv("PLACES_LAZY_PHOTOS", "true").lower() == "true"
+
+        # Process-wide rate limit sized to our quota, adaptive concurrency and retries
+        self._rate_limiter = TokenBucket(
+            rate=float(os.getenv("PLACES_RATE_LIMIT_QPS", "100")),
+            burst=float(os.getenv("PLACES_RATE_LIMIT_BURST", "100")),
+        )
+        self._concurrency = AdaptiveConcurrencyLimiter(
+            initial=int(os.getenv("PLACES_CONCURRENCY_INITIAL", "32")),
+            minimum=int(os.getenv("PLACES_CONCURRENCY_MIN", "4")),
+            maximum=int(os.getenv("PLACES_CONCURRENCY_MAX", "128")),
+        )
+        self.max_retries = int(os.getenv("PLACES_MAX_RETRIES", "3"))
+        self.retry_base_delay = float(os.getenv("PLACES_RETRY_BASE_SECONDS", "0.2"))
+        self.retry_max_delay = float(os.getenv("PLACES_RETRY_MAX_SECONDS", "5"))
+        self._retry_counts: Dict[str, int] = defaultdict(int)
+
+        # Reverse-geocoding results cached per geohash cell (precision 7 is ~150 m)
+        self.location_cache_precision = int(os.getenv("LOCATION_CACHE_PRECISION", "7"))
+        self.location_cache_ttl = float(os.getenv("LOCATION_CACHE_TTL_DAYS", "30")) * 86400
+        self.location_cache_firestore = os.getenv("LOCATION_CACHE_FIRESTORE", "false").lower() == "true"
+        self._location_cache = TTLCache(int(os.getenv("LOCATION_CACHE_MAX_ENTRIES", "10000")))
+        self.location_stats = {"firestore_hits": 0, "upstream": 0}
+
+    def _build_client(self) -> httpx.AsyncClient:
+        """Create the pooled HTTP client shared by every Places/Geocoding call"""
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        return httpx.AsyncClient(http2=self.http2, limits=limits, timeout=15)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Return the shared client, creating it lazily if the app lifespan did not"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    async def start(self):
+        """Open the shared connection pool (called from the FastAPI lifespan)"""
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+
+    async def close(self):
+        """Close the shared connection pool (called on application shutdown)"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        """Exponential backoff with full jitter, never shorter than a Retry-After header"""
+        delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), self.retry_max_delay))
+        return delay
+
+    async def _get(self, url: str, **kwargs) -> httpx.Response:
+        """
+        Issue a GET through the shared pool and record per-host stats.
+        Every attempt waits for the rate limiter and a concurrency slot.
+        429/5xx responses and transport errors are retried with jittered
+        backoff; the last response (or error) is returned to the caller.
+        """
+        host = urlsplit(url).netloc
+        for attempt in range(self.max_retries + 1):
+            await self._rate_limiter.acquire()
+            started = await self._concurrency.acquire()
+            self._request_counts[host] += 1
+            response = None
+            overloaded = False
+            try:
+                response = await self.client.get(url, **kwargs)
+                overloaded = response.status_code in OVERLOAD_STATUS_CODES
+            except httpx.TransportError:
+                # Timeouts and resets mean the upstream is struggling, same as a 429/503
+                overloaded = True
+                self._error_counts[host] += 1
+                if attempt == self.max_retries:
+                    raise
+            except httpx.HTTPError:
+                self._error_counts[host] += 1
+                raise
+            finally:
+                self._concurrency.release(started, overloaded)
+
+            if response is not None and (response.status_code not in RETRYABLE_STATUS_CODES or attempt == self.max_retries):
+                return response
+            self._retry_counts[host] += 1
+            await asyncio.sleep(self._retry_delay(attempt, response))
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Per-pool stats: configuration, request counts and open connections per host"""
+        connections: Dict[str, Dict[str, int]] = defaultdict(lambda: {"open": 0, "idle": 0, "http2": 0})
+        # httpx does not expose pool internals publicly, so read them defensively
+        transport = getattr(self._client, "_transport", None)
+        pool = getattr(transport, "_pool", None)
+        for conn in list(getattr(pool, "connections", []) or []):
+            origin = getattr(conn, "_origin", None)
+            host = origin.host.decode() if origin is not None else "unknown"
+            connections[host]["open"] += 1
+            if conn.is_idle():
+                connections[host]["idle"] += 1
+            if type(getattr(conn, "_connection", None)).__name__ == "AsyncHTTP2Connection":
+                connections[host]["http2"] += 1
+
+        hosts = set(self._request_counts) | set(connections)
+        return {
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections,
+            "keepalive_expiry_seconds": self.keepalive_expiry,
+            "client_open": self._client is not None and not self._client.is_closed,
+            "rate_limit": {
+                "qps": self._rate_limiter.rate,
+                "burst": self._rate_limiter.burst,
+                "waits": self._rate_limiter.waits,
+            },
+            "concurrency": self._concurrency.metrics(),
+            "hosts": {
+                host: {
+                    "requests": self._request_counts.get(host, 0),
+                    "errors": self._error_counts.get(host, 0),
+                    "retries": self._retry_counts.get(host, 0),
+                    **connections.get(host, {"open": 0, "idle": 0, "http2": 0}),
+                }
+                for host in sorted(hosts)
+            },
+        }
     
     def _get_required_fields(self) -> str:
         """Get the required fields for the Places API request"""
@@ -88,55 +296,94 @@ class PlacesService:
         print(f"DEBUG: Making API call to: {details_url}")
         print(f"DEBUG: Headers: {headers}")
         
-        async with httpx.AsyncClient(timeout=15) as client:
-            response = await client.get(details_url, headers=headers)
-            print(f"DEBUG: API response status: {response.status_code}")
-            print(f"DEBUG: API response headers: {dict(response.headers)}")
-            
-            if response.status_code != 200:
-                error_text = response.text
-                print(f"DEBUG: API error response: {error_text}")
-                raise Exception(f"Places API error: {response.status_code} - {error_text}")
-            
-            json_response = response.json()
-            print(f"DEBUG: API response type: {type(json_response)}")
-            print(f"DEBUG: API response keys: {list(json_response.keys()) if isinstance(json_response, dict) else 'Not a dict'}")
-            print(f"DEBUG: API response: {json_response}")
-            return json_response
+        response = await self._get(details_url, headers=headers)
+        print(f"DEBUG: API response status: {response.status_code}")
+        print(f"DEBUG: API response headers: {dict(response.headers)}")
+        
+        if response.status_code != 200:
+            error_text = response.text
+            print(f"DEBUG: API error response: {error_text}")
+            raise Exception(f"Places API error: {response.status_code} - {error_text}")
+        
+        json_response = response.json()
+        print(f"DEBUG: API response type: {type(json_response)}")
+        print(f"DEBUG: API response keys: {list(json_response.keys()) if isinstance(json_response, dict) else 'Not a dict'}")
+        print(f"DEBUG: API response: {json_response}")
+        return json_response
     
-    async def _get_photo_urls(self, place: Dict[str, Any], min_photo_height: int, max_photos: int) -> List[str]:
-        """Get photo URLs for a place"""
+    def _select_photo_names(self, place: Dict[str, Any], min_photo_height: int, max_photos: int) -> List[str]:
+        """Names of the first max_photos photos of a place that are tall enough"""
         raw_photos = place.get("photos", []) or []
-        use_photos = [
-            p for p in raw_photos
-            if (p.get("heightPx") or 0) >= min_photo_height
+        return [
+            p.get("name") for p in raw_photos
+            if (p.get("heightPx") or 0) >= min_photo_height and p.get("name")
         ][:max_photos]
 
-        photo_urls: List[str] = []
-        async with httpx.AsyncClient(timeout=15) as client:
-            for p in use_photos:
-                name = p.get("name")
-                if not name:
-                    continue
-                
-                media_url = f"{self.base_url}/{name}/media"
-                media_params = {
-                    "maxHeightPx": max(min_photo_height, 800),
-                    "skipHttpRedirect": "true",
-                }
-                
-                response = await client.get(
-                    media_url, 
-                    headers={"X-Goog-Api-Key": self.api_key}, 
+    async def resolve_photo_uri(self, name: str, max_height_px: int,
+                                place_semaphore: Optional[asyncio.Semaphore] = None) -> Optional[str]:
+        """
+        Resolve a photo resource name to its short-lived photoUri, through the photo URI cache.
+        Returns None if the photo cannot be resolved.
+        """
+        cache_key = f"{name}@{max_height_px}"
+        cached = self._photo_uri_cache.get(cache_key)
+        if cached is not None:
+            return cached["photoUri"]
+        
+        media_params = {
+            "maxHeightPx": max_height_px,
+            "skipHttpRedirect": "true",
+        }
+        try:
+            async with place_semaphore or asyncio.Semaphore(1), self._photo_semaphore:
+                response = await self._get(
+                    f"{self.base_url}/{name}/media",
+                    headers={"X-Goog-Api-Key": self.api_key},
                     params=media_params
                 )
-                
-                if response.status_code == 200:
-                    photo_uri = response.json().get("photoUri")
-                    if photo_uri:
-                        photo_urls.append(photo_uri)
+            if response.status_code == 200:
+                photo_uri = response.json().get("photoUri")
+                if photo_uri:
+                    self._photo_uri_cache.put(cache_key, {"photoUri": photo_uri}, self.photo_uri_ttl)
+                return photo_uri
+        except Exception as e:
+            # A single failed photo must not fail the whole place
+            print(f"Error resolving photo {name}: {str(e)}")
+        return None
+
+    async def _get_photo_urls(self, place: Dict[str, Any], min_photo_height: int, max_photos: int) -> List[str]:
+        """Get photo URLs for a place"""
+        names = self._select_photo_names(place, min_photo_height, max_photos)
+        max_height_px = max(min_photo_height, 800)
+        place_semaphore = asyncio.Semaphore(self.photo_concurrency_per_place)
+
+        # Resolve all photos concurrently; gather keeps the original photo order
+        photo_uris = await asyncio.gather(*(
+            self.resolve_photo_uri(name, max_height_px, place_semaphore) for name in names
+        ))
+        return [uri for uri in photo_uris if uri]
+
+    async def get_photo_names(self, place_id: str, refresh: bool = False) -> List[str]:
+        """
+        Photo resource names of a place, as stored in details["photo_names"].
+        Used by the lazy photo endpoint when the restaurant is not in Firebase yet,
+        and with refresh=True (skipping the cache) when stored names have expired.
+        """
+        if not self.api_key:
+            raise ValueError("GOOGLE_MAPS_API_KEY environment variable is required")
+        cached = None if refresh else self._photo_names_cache.get(place_id)
+        if cached is not None:
+            return cached["names"]
         
-        return photo_urls
+        response = await self._get(
+            f"{self.base_url}/places/{place_id}",
+            headers={"X-Goog-Api-Key": self.api_key, "X-Goog-FieldMask": "photos.name,photos.heightPx"}
+        )
+        if response.status_code != 200:
+            raise Exception(f"Places API error: {response.status_code} - {response.text}")
+        names = self._select_photo_names(response.json(), 400, 4)
+        self._photo_names_cache.put(place_id, {"names": names}, self.photo_names_ttl)
+        return names
     
     def _calculate_distance(self, place: Dict[str, Any], user_lat: float, user_lng: float) -> float:
         """Calculate distance between user location and place"""
@@ -402,7 +649,9 @@ class PlacesService:
 
     async def get_location_info(self, latitude: float, longitude: float) -> Dict[str, Any]:
         """
-        Get neighborhood and city information using reverse geocoding
+        Get neighborhood and city information using reverse geocoding.
+        Results are cached per geohash cell in memory and, when
+        LOCATION_CACHE_FIRESTORE is enabled, in Firestore shared by all instances.
         
         Args:
             latitude: Latitude coordinate
@@ -411,6 +660,50 @@ class PlacesService:
         Returns:
             Dictionary containing neighborhood and city information
         """
+        cell = geohash_encode(latitude, longitude, self.location_cache_precision)
+        cached = self._location_cache.get(cell)
+        if cached is not None:
+            return cached
+        
+        firebase_service = None
+        if self.location_cache_firestore:
+            try:
+                from firebase_service import get_firebase_service
+                firebase_service = get_firebase_service()
+                cached = await firebase_service.get_cached_location(cell)
+            except Exception as e:
+                print(f"Error reading location cache from Firebase: {e}")
+            if cached is not None:
+                self.location_stats["firestore_hits"] += 1
+                self._location_cache.put(cell, cached, self.location_cache_ttl)
+                return cached
+        
+        self.location_stats["upstream"] += 1
+        location = await self._reverse_geocode(latitude, longitude)
+        self._location_cache.put(cell, location, self.location_cache_ttl)
+        if firebase_service is not None:
+            try:
+                await firebase_service.cache_location(cell, location, self.location_cache_ttl)
+            except Exception as e:
+                print(f"Error writing location cache to Firebase: {e}")
+        return location
+
+    def photo_uri_cache_stats(self) -> Dict[str, Any]:
+        return {**self._photo_uri_cache.metrics(), "ttl_seconds": self.photo_uri_ttl}
+
+    def photo_names_cache_stats(self) -> Dict[str, Any]:
+        return {**self._photo_names_cache.metrics(), "ttl_seconds": self.photo_names_ttl}
+
+    def location_cache_stats(self) -> Dict[str, Any]:
+        return {
+            **self._location_cache.metrics(),
+            **self.location_stats,
+            "precision": self.location_cache_precision,
+            "firestore_tier": self.location_cache_firestore,
+        }
+
+    async def _reverse_geocode(self, latitude: float, longitude: float) -> Dict[str, Any]:
+        """Call the Geocoding API and extract the neighborhood and city"""
         try:
             if not self.api_key:
                 raise ValueError("GOOGLE_MAPS_API_KEY environment variable is required")
@@ -422,57 +715,58 @@ class PlacesService:
                 "result_type": "neighborhood|sublocality|locality|administrative_area_level_2"
             }
             
-            async with httpx.AsyncClient(timeout=10) as client:
-                response = await client.get(self.geocoding_url, params=params)
-                
-                if response.status_code != 200:
-                    raise Exception(f"Geocoding API error: {response.status_code} - {response.text}")
-                
-                data = response.json()
-                
-                if data.get("status") != "OK":
-                    raise Exception(f"Geocoding API error: {data.get('status')} - {data.get('error_message', 'Unknown error')}")
-                
-                results = data.get("results", [])
-                if not results:
-                    return {
-                        "neighborhood": None,
-                        "city": None
-                    }
-                
-                # Parse address components to find neighborhood and city
-                neighborhood = None
-                city = None
-                
-                for result in results:
-                    address_components = result.get("address_components", [])
-                    
-                    for component in address_components:
-                        types = component.get("types", [])
-                        long_name = component.get("long_name")
-                        
-                        # Look for neighborhood (most specific)
-                        if ("neighborhood" in types or "sublocality" in types) and not neighborhood:
-                            neighborhood = long_name
-                        # Look for city (locality or administrative_area_level_2)
-                        elif ("locality" in types or "administrative_area_level_2" in types) and not city:
-                            city = long_name
-                
+            response = await self._get(self.geocoding_url, params=params, timeout=10)
+            
+            if response.status_code != 200:
+                raise Exception(f"Geocoding API error: {response.status_code} - {response.text}")
+            
+            data = response.json()
+            
+            if data.get("status") != "OK":
+                raise Exception(f"Geocoding API error: {data.get('status')} - {data.get('error_message', 'Unknown error')}")
+            
+            results = data.get("results", [])
+            if not results:
                 return {
-                    "neighborhood": neighborhood,
-                    "city": city
+                    "neighborhood": None,
+                    "city": None
                 }
+            
+            # Parse address components to find neighborhood and city
+            neighborhood = None
+            city = None
+            
+            for result in results:
+                address_components = result.get("address_components", [])
                 
+                for component in address_components:
+                    types = component.get("types", [])
+                    long_name = component.get("long_name")
+                    
+                    # Look for neighborhood (most specific)
+                    if ("neighborhood" in types or "sublocality" in types) and not neighborhood:
+                        neighborhood = long_name
+                    # Look for city (locality or administrative_area_level_2)
+                    elif ("locality" in types or "administrative_area_level_2" in types) and not city:
+                        city = long_name
+            
+            return {
+                "neighborhood": neighborhood,
+                "city": city
+            }
+            
         except Exception as e:
             print(f"Error getting location info: {str(e)}")
             raise e
 
-    async def get_restaurant_details(self, place_id: str) -> Dict[str, Any]:
+    async def get_restaurant_details(self, place_id: str, tier: str = "atmosphere") -> Dict[str, Any]:
         """
         Get comprehensive restaurant details from Google Places API
         
         Args:
             place_id: Google Place ID
+            tier: Field-mask tier (essentials, pro or atmosphere); fields above
+                the tier are None and details_tier records what was fetched
         
         Returns:
             Dictionary containing comprehensive restaurant information
@@ -481,136 +775,110 @@ class PlacesService:
             if not self.api_key:
                 raise ValueError("GOOGLE_MAPS_API_KEY environment variable is required")
             
-            # All fields including Enterprise and Enterprise + Atmosphere
-            fields = ",".join([
+            fields = ",".join(details_field_mask(tier))
+            
+            headers = {
+                "X-Goog-Api-Key": self.api_key,
+                "X-Goog-FieldMask": fields,
+            }
+            
+            url = f"{self.base_url}/places/{place_id}"
+            
+            response = await self._get(url, headers=headers)
+            
+            if response.status_code != 200:
+                raise Exception(f"Places API error: {response.status_code} - {response.text}")
+            
+            data = response.json()
+            
+            # Get photos: names only (resolved on demand by /photo) or resolved URIs
+            if self.lazy_photos:
+                photo_names = self._select_photo_names(data, 400, 4)
+                photo_urls = None
+            else:
+                photo_names = None
+                photo_urls = await self._get_photo_urls(data, 400, 4)
+            
+            # Helper function to convert price level string to integer
+            def parse_price_level(price_level):
+                if price_level is None:
+                    return None
+                if isinstance(price_level, int):
+                    return price_level
+                if isinstance(price_level, str):
+                    price_mapping = {
+                        "PRICE_LEVEL_FREE": 0,
+                        "PRICE_LEVEL_INEXPENSIVE": 1,
+                        "PRICE_LEVEL_MODERATE": 2,
+                        "PRICE_LEVEL_EXPENSIVE": 3,
+                        "PRICE_LEVEL_VERY_EXPENSIVE": 4
+                    }
+                    return price_mapping.get(price_level)
+                return None
+
+            # Extract all information including Enterprise and Enterprise + Atmosphere
+            return {
+                "details_tier": tier,
+                
                 # Basic Info (Place Details Essentials)
-                "id", "displayName", "businessStatus", "rating", "priceLevel",
+                "name": (data.get("displayName") or {}).get("text"),
+                "business_status": data.get("businessStatus"),
+                "rating": data.get("rating"),
+                "price_level": parse_price_level(data.get("priceLevel")),
                 
                 # Location & Contact (Place Details Essentials)
-                "formattedAddress", "nationalPhoneNumber", "internationalPhoneNumber",
+                "formatted_address": data.get("formattedAddress"),
+                "phone_number": data.get("nationalPhoneNumber"),
+                "international_phone_number": data.get("internationalPhoneNumber"),
                 
                 # Categories & Types (Place Details Essentials)
-                "primaryType", "types",
+                "primary_type": data.get("primaryType"),
+                "types": data.get("types", []),
                 
                 # Hours (Place Details Pro)
-                "regularOpeningHours",
+                "regular_opening_hours": data.get("regularOpeningHours"),
                 
                 # Reviews & Content (Place Details Pro)
-                "editorialSummary", "generativeSummary", "reviewSummary",
+                "editorial_summary": data.get("editorialSummary"),
+                "generative_summary": data.get("generativeSummary"),
+                "review_summary": data.get("reviewSummary"),
                 
                 # Media (Place Details Pro)
-                "photos.name", "photos.heightPx", "photos.widthPx",
+                "photos": photo_urls,
+                "photo_names": photo_names,
                 
                 # Maps Integration (Place Details Essentials)
-                "googleMapsUri", "websiteUri",
+                "google_maps_uri": data.get("googleMapsUri"),
+                "website_uri": data.get("websiteUri"),
                 
                 # Enterprise Level Fields
-                "userRatingCount", "websiteUri",
+                "user_rating_count": data.get("userRatingCount"),
                 
                 # Enterprise + Atmosphere Fields
-                "takeout", "delivery", "dineIn", "curbsidePickup", "reservable",
-                "servesBreakfast", "servesLunch", "servesDinner", "servesBeer", "servesWine", 
-                "servesCocktails", "servesVegetarianFood",
-                "outdoorSeating", "liveMusic", "goodForGroups", "goodForChildren", 
-                "goodForWatchingSports", "allowsDogs", "restroom",
-                "accessibilityOptions", "paymentOptions", "parkingOptions"
-            ])
-            
-            headers = {
-                "X-Goog-Api-Key": self.api_key,
-                "X-Goog-FieldMask": fields,
+                "takeout": data.get("takeout"),
+                "delivery": data.get("delivery"),
+                "dine_in": data.get("dineIn"),
+                "curbside_pickup": data.get("curbsidePickup"),
+                "reservable": data.get("reservable"),
+                "serves_breakfast": data.get("servesBreakfast"),
+                "serves_lunch": data.get("servesLunch"),
+                "serves_dinner": data.get("servesDinner"),
+                "serves_beer": data.get("servesBeer"),
+                "serves_wine": data.get("servesWine"),
+                "serves_cocktails": data.get("servesCocktails"),
+                "serves_vegetarian_food": data.get("servesVegetarianFood"),
+                "outdoor_seating": data.get("outdoorSeating"),
+                "live_music": data.get("liveMusic"),
+                "good_for_groups": data.get("goodForGroups"),
+                "good_for_children": data.get("goodForChildren"),
+                "good_for_watching_sports": data.get("goodForWatchingSports"),
+                "allows_dogs": data.get("allowsDogs"),
+                "restroom": data.get("restroom"),
+                "accessibility_options": data.get("accessibilityOptions"),
+                "payment_options": data.get("paymentOptions"),
+                "parking_options": data.get("parkingOptions")
             }
             
-            url = f"{self.base_url}/places/{place_id}"
-            
-            async with httpx.AsyncClient(timeout=15) as client:
-                response = await client.get(url, headers=headers)
-                
-                if response.status_code != 200:
-                    raise Exception(f"Places API error: {response.status_code} - {response.text}")
-                
-                data = response.json()
-                
-                # Get photos
-                photo_urls = await self._get_photo_urls(data, 400, 4)
-                
-                # Helper function to convert price level string to integer
-                def parse_price_level(price_level):
-                    if price_level is None:
-                        return None
-                    if isinstance(price_level, int):
-                        return price_level
-                    if isinstance(price_level, str):
-                        price_mapping = {
-                            "PRICE_LEVEL_FREE": 0,
-                            "PRICE_LEVEL_INEXPENSIVE": 1,
-                            "PRICE_LEVEL_MODERATE": 2,
-                            "PRICE_LEVEL_EXPENSIVE": 3,
-                            "PRICE_LEVEL_VERY_EXPENSIVE": 4
-                        }
-                        return price_mapping.get(price_level)
-                    return None
-
-                # Extract all information including Enterprise and Enterprise + Atmosphere
-                return {
-                    # Basic Info (Place Details Essentials)
-                    "name": (data.get("displayName") or {}).get("text"),
-                    "business_status": data.get("businessStatus"),
-                    "rating": data.get("rating"),
-                    "price_level": parse_price_level(data.get("priceLevel")),
-                    
-                    # Location & Contact (Place Details Essentials)
-                    "formatted_address": data.get("formattedAddress"),
-                    "phone_number": data.get("nationalPhoneNumber"),
-                    "international_phone_number": data.get("internationalPhoneNumber"),
-                    
-                    # Categories & Types (Place Details Essentials)
-                    "primary_type": data.get("primaryType"),
-                    "types": data.get("types", []),
-                    
-                    # Hours (Place Details Pro)
-                    "regular_opening_hours": data.get("regularOpeningHours"),
-                    
-                    # Reviews & Content (Place Details Pro)
-                    "editorial_summary": data.get("editorialSummary"),
-                    "generative_summary": data.get("generativeSummary"),
-                    "review_summary": data.get("reviewSummary"),
-                    
-                    # Media (Place Details Pro)
-                    "photos": photo_urls,
-                    
-                    # Maps Integration (Place Details Essentials)
-                    "google_maps_uri": data.get("googleMapsUri"),
-                    "website_uri": data.get("websiteUri"),
-                    
-                    # Enterprise Level Fields
-                    "user_rating_count": data.get("userRatingCount"),
-                    
-                    # Enterprise + Atmosphere Fields
-                    "takeout": data.get("takeout"),
-                    "delivery": data.get("delivery"),
-                    "dine_in": data.get("dineIn"),
-                    "curbside_pickup": data.get("curbsidePickup"),
-                    "reservable": data.get("reservable"),
-                    "serves_breakfast": data.get("servesBreakfast"),
-                    "serves_lunch": data.get("servesLunch"),
-                    "serves_dinner": data.get("servesDinner"),
-                    "serves_beer": data.get("servesBeer"),
-                    "serves_wine": data.get("servesWine"),
-                    "serves_cocktails": data.get("servesCocktails"),
-                    "serves_vegetarian_food": data.get("servesVegetarianFood"),
-                    "outdoor_seating": data.get("outdoorSeating"),
-                    "live_music": data.get("liveMusic"),
-                    "good_for_groups": data.get("goodForGroups"),
-                    "good_for_children": data.get("goodForChildren"),
-                    "good_for_watching_sports": data.get("goodForWatchingSports"),
-                    "allows_dogs": data.get("allowsDogs"),
-                    "restroom": data.get("restroom"),
-                    "accessibility_options": data.get("accessibilityOptions"),
-                    "payment_options": data.get("paymentOptions"),
-                    "parking_options": data.get("parkingOptions")
-                }
-                
         except Exception as e:
             print(f"Error getting restaurant details: {str(e)}")
             raise e
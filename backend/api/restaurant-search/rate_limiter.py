@@ -0,0 +1,111 @@
+"""
+Client-side rate limiting for upstream API calls: a token bucket for request
+rate and an AIMD adaptive concurrency window that backs off when overloaded
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict
+
+
+class TokenBucket:
+    """
+    Async token bucket: refills `rate` tokens per second up to `burst`.
+    acquire() waits until a token is available. Waiters are served in order.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waits = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return  # Unlimited
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                self.waits += 1
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Concurrency window with additive increase / multiplicative decrease (AIMD).
+    Every successful call grows the window by 1/limit (about +1 per window of
+    calls); an overloaded call (429/503, timeout or connection error) shrinks
+    it by `backoff`. Only calls started after the last decrease can shrink it
+    again, so one burst of rejections counts as a single congestion signal.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, backoff: float = 0.5):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.backoff = backoff
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        self.stats = {"successes": 0, "overloads": 0, "decreases": 0, "waits": 0}
+
+    def _has_capacity(self) -> bool:
+        return self._in_flight < int(self.limit)
+
+    def _wake(self):
+        while self._waiters and self._has_capacity():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+
+    async def acquire(self) -> float:
+        """Wait for a slot; returns the start time to hand back to release()"""
+        if self._has_capacity() and not self._waiters:
+            self._in_flight += 1
+            return time.monotonic()
+
+        self.stats["waits"] += 1
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just before the cancellation landed
+                self._in_flight -= 1
+                self._wake()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+        return time.monotonic()
+
+    def release(self, started: float, overloaded: bool = False):
+        self._in_flight -= 1
+        if overloaded:
+            self.stats["overloads"] += 1
+            if started >= self._last_decrease:
+                self.limit = max(self.minimum, self.limit * self.backoff)
+                self._last_decrease = time.monotonic()
+                self.stats["decreases"] += 1
+        else:
+            self.stats["successes"] += 1
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        self._wake()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "limit": round(self.limit, 2),
+            "in_flight": self._in_flight,
+            "queued": len(self._waiters),
+        }
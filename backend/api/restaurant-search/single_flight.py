@@ -0,0 +1,47 @@
+"""
+In-process single-flight coalescing of concurrent calls that share a key
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time.
+    Callers that arrive while a call for their key is in flight wait for it and
+    share its result (or exception) instead of starting their own. Nothing is
+    cached: once the call finishes, the next caller starts a new one.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.stats = {"calls": 0, "executions": 0, "coalesced": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Return (result, coalesced) for fn(), sharing an in-flight call for the same key.
+        coalesced is True for callers that joined another caller's call, so side
+        effects such as persisting the result are left to the caller that started it.
+        """
+        self.stats["calls"] += 1
+        task = self._in_flight.get(key)
+        coalesced = task is not None
+        if coalesced:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["executions"] += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        # Shielded so one caller going away does not cancel the call for the others
+        result = await asyncio.shield(task)
+        return (dict(result) if coalesced and isinstance(result, dict) else result), coalesced
+
+    def metrics(self) -> Dict[str, Any]:
+        calls = self.stats["calls"]
+        return {
+            **self.stats,
+            "in_flight": len(self._in_flight),
+            "coalescing_ratio": round(self.stats["coalesced"] / calls, 4) if calls else 0.0,
+        }
@@ -0,0 +1,226 @@
+"""
+In-memory spatial index of the restaurant catalog, kept current by a Firestore snapshot listener
+"""
+import heapq
+import math
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+from google.cloud.firestore import GeoPoint
+from utils import within_radius, nearest_k
+
+# Meters per degree of latitude (and of longitude at the equator)
+METERS_PER_DEGREE = 111320.0
+
+
+class SpatialIndex:
+    """
+    Uniform latitude/longitude grid of restaurants.
+    Each cell holds the restaurants whose location falls inside it, so radius
+    and nearest-neighbour searches only look at nearby cells. Snapshot listener
+    callbacks run on a background thread, so all access is guarded by a lock.
+    """
+
+    def __init__(self, cell_size_deg: float = 0.01):
+        self.cell_size_deg = cell_size_deg
+        self._cells: Dict[Tuple[int, int], Dict[str, Dict[str, Any]]] = {}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_size_deg), math.floor(lng / self.cell_size_deg)
+
+    def upsert(self, doc_id: str, data: Dict[str, Any]):
+        """Add or replace a restaurant from its Firestore document data"""
+        location = data.get("location")
+        if not hasattr(location, "latitude"):
+            # Not searchable without a GeoPoint
+            self.remove(doc_id)
+            return
+
+        entry = {
+            "doc_id": doc_id,
+            "place_id": data.get("place_id"),
+            "name": data.get("name", "Unknown"),
+            "location": GeoPoint(location.latitude, location.longitude),
+            "has_search_timestamp": data.get("search_timestamp") is not None,
+        }
+        cell = self._cell(location.latitude, location.longitude)
+        with self._lock:
+            self._remove_locked(doc_id)
+            self._entries[doc_id] = entry
+            self._cells.setdefault(cell, {})[doc_id] = entry
+
+    def remove(self, doc_id: str):
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: str):
+        entry = self._entries.pop(doc_id, None)
+        if entry is None:
+            return
+        cell = self._cell(entry["location"].latitude, entry["location"].longitude)
+        members = self._cells.get(cell)
+        if members is not None:
+            members.pop(doc_id, None)
+            if not members:
+                del self._cells[cell]
+
+    def _candidates(self, lat: float, lng: float, radius_m: float) -> List[Dict[str, Any]]:
+        """Entries in every cell overlapping the bounding box of the circle"""
+        lat_delta = radius_m / METERS_PER_DEGREE
+        lng_delta = radius_m / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        min_row, min_col = self._cell(lat - lat_delta, lng - lng_delta)
+        max_row, max_col = self._cell(lat + lat_delta, lng + lng_delta)
+
+        with self._lock:
+            box_cells = (max_row - min_row + 1) * (max_col - min_col + 1)
+            if box_cells > len(self._cells):
+                # Large radius: scanning the occupied cells is cheaper than the box
+                cells = [
+                    members for (row, col), members in self._cells.items()
+                    if min_row <= row <= max_row and min_col <= col <= max_col
+                ]
+            else:
+                cells = [
+                    self._cells[(row, col)]
+                    for row in range(min_row, max_row + 1)
+                    for col in range(min_col, max_col + 1)
+                    if (row, col) in self._cells
+                ]
+            return [entry for members in cells for entry in members.values()]
+
+    def within(self, lat: float, lng: float, radius_km: float) -> Tuple[List[Dict[str, Any]], Any]:
+        """Index entries within radius_km of the center and their distances in meters (an array), nearest first"""
+        candidates = self._candidates(lat, lng, radius_km * 1000)
+        indices, distances_m = within_radius(
+            lat, lng, radius_km * 1000,
+            [entry["location"].latitude for entry in candidates],
+            [entry["location"].longitude for entry in candidates]
+        )
+        return [candidates[index] for index in indices.tolist()], distances_m
+
+    def search_radius(self, lat: float, lng: float, radius_km: float) -> List[Dict[str, Any]]:
+        """Restaurants within radius_km of the center, sorted by distance"""
+        entries, distances_m = self.within(lat, lng, radius_km)
+        return [
+            {**entry, "distance_km": round(distance_m / 1000, 2)}
+            for entry, distance_m in zip(entries, distances_m.tolist())
+        ]
+
+    @staticmethod
+    def _ring_cells(center_row: int, center_col: int, ring: int):
+        """Cells on the perimeter of the square ring cells away from the center"""
+        if ring == 0:
+            yield center_row, center_col
+            return
+        for col in range(center_col - ring, center_col + ring + 1):
+            yield center_row - ring, col
+            yield center_row + ring, col
+        for row in range(center_row - ring + 1, center_row + ring):
+            yield row, center_col - ring
+            yield row, center_col + ring
+
+    def nearest(self, lat: float, lng: float, k: int, max_radius_km: Optional[float] = None) -> List[Dict[str, Any]]:
+        """The k restaurants closest to the center, expanding outwards ring by ring"""
+        center_row, center_col = self._cell(lat, lng)
+        max_radius_m = max_radius_km * 1000 if max_radius_km is not None else float("inf")
+
+        with self._lock:
+            if not self._cells:
+                return []
+            rows = [row for row, _ in self._cells]
+            cols = [col for _, col in self._cells]
+            max_ring = max(abs(center_row - min(rows)), abs(center_row - max(rows)),
+                           abs(center_col - min(cols)), abs(center_col - max(cols)))
+
+            best: List[Tuple[float, str, Dict[str, Any]]] = []  # max-heap via negated distance
+            for ring in range(max_ring + 1):
+                # Cells in this ring are at least (ring - 1) cell widths away;
+                # the narrowest width is longitude at the ring's poleward edge
+                poleward_lat = min(abs(lat) + ring * self.cell_size_deg, 90)
+                ring_min_m = (ring - 1) * self.cell_size_deg * METERS_PER_DEGREE * math.cos(math.radians(poleward_lat))
+                if ring_min_m > max_radius_m or (len(best) == k and ring_min_m > -best[0][0]):
+                    break
+                last_pass = 8 * ring >= len(self._cells)
+                if last_pass:
+                    # Far from the catalog, rings would mostly visit empty cells:
+                    # take every occupied cell not yet visited in one pass instead
+                    ring_cells = [
+                        members for (row, col), members in self._cells.items()
+                        if max(abs(row - center_row), abs(col - center_col)) >= ring
+                    ]
+                else:
+                    ring_cells = [
+                        self._cells[cell] for cell in self._ring_cells(center_row, center_col, ring)
+                        if cell in self._cells
+                    ]
+                ring_entries = [entry for members in ring_cells for entry in members.values()]
+                # Only this ring's k nearest can improve on what earlier rings found
+                indices, distances_m = nearest_k(
+                    lat, lng,
+                    [entry["location"].latitude for entry in ring_entries],
+                    [entry["location"].longitude for entry in ring_entries],
+                    k
+                )
+                for index, distance_m in zip(indices.tolist(), distances_m.tolist()):
+                    if distance_m > max_radius_m:
+                        break  # Sorted by distance
+                    entry = ring_entries[index]
+                    item = (-distance_m, entry["doc_id"], entry)
+                    if len(best) < k:
+                        heapq.heappush(best, item)
+                    elif distance_m < -best[0][0]:
+                        heapq.heapreplace(best, item)
+                if last_pass:
+                    break
+
+        return [
+            {**entry, "distance_km": round(-neg_distance / 1000, 2)}
+            for neg_distance, _, entry in sorted(best, reverse=True)
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "restaurants": len(self._entries),
+                "cells": len(self._cells),
+                "cell_size_deg": self.cell_size_deg,
+            }
+
+
+class CatalogSync:
+    """Loads the restaurants collection into a SpatialIndex and keeps it current"""
+
+    def __init__(self, index: SpatialIndex, collection_name: str = "restaurants"):
+        self.index = index
+        self.collection_name = collection_name
+        self._watch = None
+        self.snapshots = 0
+
+    def start(self, db):
+        """Start the snapshot listener; its first snapshot is the full initial load"""
+        if self._watch is None:
+            self._watch = db.collection(self.collection_name).on_snapshot(self._on_snapshot)
+
+    def stop(self):
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+        self.index.ready = False
+
+    def _on_snapshot(self, docs, changes, read_time):
+        for change in changes:
+            doc = change.document
+            if change.type.name == "REMOVED":
+                self.index.remove(doc.id)
+            else:
+                self.index.upsert(doc.id, doc.to_dict() or {})
+        self.snapshots += 1
+        if not self.index.ready:
+            self.index.ready = True
+            print(f"Catalog index loaded: {len(self.index)} restaurants")
@@ -13,6 +13,15 @@ fs_mod = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(fs_mod)
 
 
+@pytest.fixture
+def service(monkeypatch):
+    """FirebaseService built by its constructor, without a Firebase app; tests set db themselves"""
+    monkeypatch.setattr(fs_mod.FirebaseService, "_init_firebase", lambda self: None)
+    # Writes commit directly unless a test sets up its own writer
+    monkeypatch.setenv("FIRESTORE_WRITE_BATCHING", "false")
+    return fs_mod.FirebaseService()
+
+
 def test_calculate_bounding_box_and_haversine():
     # Create instance without running __init__
     inst = object.__new__(fs_mod.FirebaseService)
@@ -44,3 +53,630 @@ async def test_is_restaurant_details_stale_various_timestamp_types():
     inst.get_restaurant_by_place_id = fake_get_restaurant_by_place_id_dt
     stale = await fs_mod.FirebaseService.is_restaurant_details_stale(inst, "p1", days_threshold=1)
     assert stale is False
+
+
+@pytest.mark.asyncio
+async def test_request_scope_shares_one_read_per_place_id(service):
+    from datetime import datetime
+
+    inst = service
+    batches = []
+
+    async def fake_fetch_many(place_ids):
+        batches.append(list(place_ids))
+        return {pid: {"place_id": pid, "doc_id": f"d-{pid}", "name": pid.upper(),
+                      "search_timestamp": datetime.now()} for pid in place_ids if pid != "missing"}
+
+    inst._fetch_restaurants_by_place_ids = fake_fetch_many
+
+    with fs_mod.request_scope():
+        details, doc, missing, stale = await asyncio.gather(
+            inst.get_restaurant_details_from_firebase("a"),
+            inst.get_restaurant_by_place_id("b"),
+            inst.get_restaurant_by_place_id("missing"),
+            inst.is_restaurant_details_stale("a"),
+        )
+        assert details == {"name": "A"}
+        assert doc["doc_id"] == "d-b"
+        assert missing is None
+        assert stale is False
+
+        # Memoized: loading again inside the scope does not hit Firestore
+        await inst.get_restaurant_by_place_id("a")
+        assert batches == [["a", "b", "missing"]]
+
+        # Writes invalidate the memoized document
+        inst._forget("a")
+        await inst.get_restaurant_by_place_id("a")
+        assert batches[-1] == ["a"]
+
+    # Outside the scope there is no loader
+    assert inst._loader() is None
+
+
+@pytest.mark.asyncio
+async def test_loader_resolves_loads_cleared_while_dispatch_is_in_flight():
+    release = asyncio.Event()
+
+    async def slow_fetch_many(place_ids):
+        await release.wait()
+        return {pid: {"place_id": pid} for pid in place_ids}
+
+    loader = fs_mod.RestaurantLoader(slow_fetch_many)
+    pending = asyncio.ensure_future(loader.load("a"))
+    await asyncio.sleep(0.01)
+    assert len(loader._dispatches) == 1  # The dispatch task is referenced while in flight
+
+    loader.clear("a")  # A write lands mid-dispatch
+    release.set()
+    assert await asyncio.wait_for(pending, 1) == {"place_id": "a"}
+    await asyncio.sleep(0)
+    assert loader._dispatches == set()
+
+
+@pytest.mark.asyncio
+async def test_get_restaurant_details_batch_marks_missing_and_stale(service):
+    from datetime import datetime
+
+    inst = service
+
+    async def fake_fetch_many(place_ids):
+        assert place_ids == ["fresh", "stale", "missing"]
+        return {
+            "fresh": {"place_id": "fresh", "name": "Fresh", "search_timestamp": datetime.now()},
+            "stale": {"place_id": "stale", "name": "Stale", "search_timestamp": "2000-01-01T00:00:00"},
+        }
+
+    inst._fetch_restaurants_by_place_ids = fake_fetch_many
+
+    details = await inst.get_restaurant_details_batch(["fresh", "stale", "missing", "fresh"])
+    assert details == {"fresh": {"name": "Fresh"}, "stale": None, "missing": None}
+
+
+
+@pytest.mark.asyncio
+async def test_stale_details_served_with_one_background_revalidation(service):
+    from datetime import datetime, timedelta
+
+    inst = service
+    inst.soft_ttl_days, inst.hard_ttl_days = 7, 30
+
+    refreshed = []
+    release = asyncio.Event()
+
+    async def revalidate(place_id, tier):
+        await release.wait()
+        refreshed.append(place_id)
+
+    inst.revalidate = revalidate
+
+    async def fake_fetch_many(place_ids):
+        return {
+            "aging": {"place_id": "aging", "name": "Aging", "search_timestamp": datetime.now() - timedelta(days=10)},
+            "expired": {"place_id": "expired", "name": "Old", "search_timestamp": datetime.now() - timedelta(days=40)},
+        }
+
+    inst._fetch_restaurants_by_place_ids = fake_fetch_many
+
+    first = await inst.get_restaurant_details_batch(["aging", "expired"])
+    second = await inst.get_restaurant_details_batch(["aging"])
+    assert first == {"aging": {"name": "Aging"}, "expired": None}
+    assert second == {"aging": {"name": "Aging"}}
+
+    release.set()
+    await asyncio.gather(*inst._revalidations.values())
+    assert refreshed == ["aging"]
+    assert inst.revalidation_stats == {"stale_served": 2, "started": 1, "deduplicated": 1, "failed": 0}
+    assert inst._revalidations == {}
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeRestaurantsDB:
+    """Keyed documents are read with get_all, legacy ones through a place_id query"""
+
+    def __init__(self, keyed, legacy):
+        self.keyed = keyed
+        self.legacy = legacy
+        self.get_all_calls = []
+        self.queried = []
+        self.projections = []
+
+    def collection(self, name):
+        db = self
+
+        class Collection:
+            def document(self, doc_id):
+                return types.SimpleNamespace(id=doc_id)
+
+            def where(self, filter):
+                db.queried.append(list(filter.value))
+                matches = [FakeSnapshot(doc_id, data) for doc_id, data in db.legacy.items()
+                           if data["place_id"] in filter.value]
+
+                def select(field_paths):
+                    db.projections.append(list(field_paths))
+                    projected = [FakeSnapshot(m.id, {k: v for k, v in m._data.items() if k in field_paths}) for m in matches]
+                    return types.SimpleNamespace(get=lambda: projected)
+
+                return types.SimpleNamespace(get=lambda: matches, select=select)
+
+        return Collection()
+
+    def get_all(self, refs, field_paths=None):
+        self.get_all_calls.append([ref.id for ref in refs])
+        if field_paths is not None:
+            self.projections.append(list(field_paths))
+        return iter([
+            FakeSnapshot(ref.id, self.keyed.get(ref.id) if field_paths is None or ref.id not in self.keyed
+                         else {k: v for k, v in self.keyed[ref.id].items() if k in field_paths})
+            for ref in refs
+        ])
+
+
+@pytest.mark.asyncio
+async def test_fetch_by_place_ids_uses_direct_reads_with_legacy_fallback(service):
+    inst = service
+    inst.db = FakeRestaurantsDB(
+        keyed={"p1": {"place_id": "p1", "name": "Keyed"}},
+        legacy={"auto-123": {"place_id": "p2", "name": "Legacy"}},
+    )
+
+    found = await inst._fetch_restaurants_by_place_ids(["p1", "p2", "p3"])
+
+    assert inst.db.get_all_calls == [["p1", "p2", "p3"]]
+    assert inst.db.queried == [["p2", "p3"]]
+    assert found["p1"]["doc_id"] == "p1"
+    assert found["p2"]["doc_id"] == "auto-123"
+    assert "p3" not in found
+
+    # Callers that only need a few fields get projected documents
+    inst.db.queried.clear()
+    found = await inst.get_restaurants_by_place_ids(["p1", "p2"], fields=["name"])
+    assert inst.db.projections == [["name"], ["name", "place_id"]]
+    assert found == {
+        "p1": {"name": "Keyed", "doc_id": "p1", "place_id": "p1"},
+        "p2": {"name": "Legacy", "place_id": "p2", "doc_id": "auto-123"},
+    }
+
+    # Once the migration is done the fallback query can be switched off
+    inst.legacy_place_id_lookup = False
+    inst.db.queried.clear()
+    found = await inst._fetch_restaurants_by_place_ids(["p2"])
+    assert found == {}
+    assert inst.db.queried == []
+
+
+
+class FakeAsyncRestaurantsDB(FakeRestaurantsDB):
+    """Same documents behind the AsyncClient API: awaitable gets and an async get_all"""
+
+    def collection(self, name):
+        sync_collection = super().collection(name)
+
+        async def get(matches):
+            return matches
+
+        class Collection:
+            def document(self, doc_id):
+                return sync_collection.document(doc_id)
+
+            def where(self, filter):
+                return types.SimpleNamespace(get=lambda: get(sync_collection.where(filter=filter).get()))
+
+        return Collection()
+
+    async def get_all(self, refs, field_paths=None):
+        for snapshot in super().get_all(refs, field_paths):
+            yield snapshot
+
+
+@pytest.mark.asyncio
+async def test_fetch_by_place_ids_on_async_client_skips_the_thread_pool(monkeypatch, service):
+    async def no_threads(*args, **kwargs):
+        raise AssertionError("AsyncClient calls must not go through the thread pool")
+
+    monkeypatch.setattr(fs_mod.asyncio, "to_thread", no_threads)
+    inst = service
+    inst.db = None
+    inst.async_db = FakeAsyncRestaurantsDB(
+        keyed={"p1": {"place_id": "p1", "name": "Keyed"}},
+        legacy={"auto-123": {"place_id": "p2", "name": "Legacy"}},
+    )
+
+    found = await inst._fetch_restaurants_by_place_ids(["p1", "p2", "p3"])
+
+    assert inst.async_db.get_all_calls == [["p1", "p2", "p3"]]
+    assert inst.async_db.queried == [["p2", "p3"]]
+    assert found["p1"]["name"] == "Keyed" and found["p2"]["doc_id"] == "auto-123"
+    assert "p3" not in found
+
+@pytest.mark.asyncio
+async def test_search_restaurants_runs_geohash_range_queries(service):
+    from google.cloud.firestore import GeoPoint
+    from utils import geohash_encode
+
+    restaurants = {
+        "near": (43.6540, -79.3800),
+        "edge": (43.6600, -79.3832),
+        "far": (43.7000, -79.3832),
+    }
+    ranges = []
+    selected = []
+
+    class Query:
+        def __init__(self, bounds=()):
+            self.bounds = bounds
+
+        def where(self, filter):
+            return Query(self.bounds + (filter.value,))
+
+        def select(self, field_paths):
+            selected.append(tuple(field_paths))
+            return self
+
+        def get(self):
+            start, end = self.bounds
+            ranges.append((start, end))
+            return [
+                FakeSnapshot(doc_id, {"place_id": doc_id, "name": doc_id, "location": GeoPoint(lat, lng)})
+                for doc_id, (lat, lng) in restaurants.items()
+                if start <= geohash_encode(lat, lng) < end
+            ]
+
+    inst = service
+    inst.db = types.SimpleNamespace(collection=lambda name: Query())
+
+    results = await inst.search_restaurants(43.6532, -79.3832, 1.0)
+
+    assert [r["place_id"] for r in results] == ["near", "edge"]
+    assert 1 <= len(ranges) <= 9
+    # Every range query only reads the fields of a search result
+    assert selected == [fs_mod.SEARCH_FIELDS] * len(ranges)
+
+
+@pytest.mark.asyncio
+async def test_search_and_nearby_served_from_ready_catalog_index(service):
+    from google.cloud.firestore import GeoPoint
+    from spatial_index import SpatialIndex
+
+    inst = service
+    inst.db = None  # Any Firestore access would fail
+    inst.catalog_index = SpatialIndex()
+    inst.catalog_index.upsert("near", {"place_id": "near", "name": "Near", "location": GeoPoint(43.6540, -79.3800)})
+    inst.catalog_index.upsert("far", {"place_id": "far", "name": "Far", "location": GeoPoint(43.7000, -79.3832)})
+    inst.catalog_index.ready = True
+
+    results = await inst.search_restaurants(43.6532, -79.3832, 1.0)
+    assert [r["place_id"] for r in results] == ["near"]
+
+    nearby = await inst.get_nearby_restaurants(43.6532, -79.3832, limit=2)
+    assert [r["place_id"] for r in nearby] == ["near", "far"]
+    assert nearby[0]["latitude"] == pytest.approx(43.6540)
+
+
+@pytest.mark.asyncio
+async def test_search_restaurants_page_walks_results_in_stable_order(service):
+    from google.cloud.firestore import GeoPoint
+    from spatial_index import SpatialIndex
+
+    inst = service
+    inst.db = None
+    inst.catalog_index = SpatialIndex()
+    # "b" and "c" share a location, so doc_id breaks the distance tie
+    for doc_id, lat in [("c", 43.6600), ("a", 43.6540), ("b", 43.6600), ("d", 43.6700)]:
+        inst.catalog_index.upsert(doc_id, {"place_id": doc_id, "name": doc_id, "location": GeoPoint(lat, -79.3832)})
+    inst.catalog_index.ready = True
+
+    seen, after = [], None
+    while True:
+        page = await inst.search_restaurants_page(43.6532, -79.3832, 5.0, page_size=2, after=after)
+        assert page["total_found"] == 4
+        seen.extend(r["doc_id"] for r in page["restaurants"])
+        after = page["next_after"]
+        if after is None:
+            break
+
+    assert seen == ["a", "b", "c", "d"]
+
+
+@pytest.mark.asyncio
+async def test_search_pages_match_the_full_search_with_many_distance_ties(service):
+    import random
+    from google.cloud.firestore import GeoPoint
+    from spatial_index import SpatialIndex
+
+    random.seed(3)
+    inst = service
+    inst.catalog_index = SpatialIndex()
+    for i in range(400):
+        # Coarse coordinates, so many results share a rounded distance
+        lat, lng = 43.65 + random.randint(-20, 20) * 0.001, -79.38 + random.randint(-20, 20) * 0.001
+        inst.catalog_index.upsert(f"d{i:03d}", {"place_id": f"p{i}", "name": f"R{i}", "location": GeoPoint(lat, lng)})
+    inst.catalog_index.ready = True
+
+    full = await inst.search_restaurants(43.65, -79.38, 2.0)
+    for page_size in (1, 7, 50, 1000):
+        seen, after = [], None
+        while True:
+            page = await inst.search_restaurants_page(43.65, -79.38, 2.0, page_size=page_size, after=after)
+            assert page["total_found"] == len(full)
+            assert len(page["restaurants"]) <= page_size
+            seen.extend((r["distance_km"], r["doc_id"]) for r in page["restaurants"])
+            after = page["next_after"]
+            if after is None:
+                break
+        assert seen == [(r["distance_km"], r["doc_id"]) for r in full]
+
+
+@pytest.mark.asyncio
+async def test_details_cache_serves_fresh_details_until_written(service):
+    from datetime import datetime
+    from ttl_cache import TTLCache
+
+    inst = service
+    inst.details_cache = TTLCache()
+    reads = []
+
+    async def fake_fetch_many(place_ids):
+        reads.append(list(place_ids))
+        return {place_id: {"place_id": place_id, "name": place_id.upper(), "search_timestamp": datetime.now()}
+                for place_id in place_ids}
+
+    inst._fetch_restaurants_by_place_ids = fake_fetch_many
+
+    async def fake_get_by_place_id(place_id):
+        return (await fake_fetch_many([place_id]))[place_id]
+
+    inst.get_restaurant_by_place_id = fake_get_by_place_id
+
+    assert await inst.get_restaurant_details_batch(["a", "b"]) == {"a": {"name": "A"}, "b": {"name": "B"}}
+    assert await inst.get_restaurant_details_from_firebase("a") == {"name": "A"}
+    assert await inst.get_restaurant_details_batch(["b", "c"]) == {"b": {"name": "B"}, "c": {"name": "C"}}
+    assert reads == [["a", "b"], ["c"]]
+
+    inst._forget("a")
+    assert await inst.get_restaurant_details_from_firebase("a") == {"name": "A"}
+    assert reads[-1] == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_details_only_served_when_stored_tier_covers_request(service):
+    from datetime import datetime
+    from ttl_cache import TTLCache
+
+    inst = service
+    inst.details_cache = TTLCache()
+
+    async def fake_fetch_many(place_ids):
+        return {
+            "list": {"place_id": "list", "name": "L", "details_tier": "essentials", "search_timestamp": datetime.now()},
+            "legacy": {"place_id": "legacy", "name": "Old", "search_timestamp": datetime.now()},
+        }
+
+    inst._fetch_restaurants_by_place_ids = fake_fetch_many
+
+    essentials = await inst.get_restaurant_details_batch(["list", "legacy"], tier="essentials")
+    assert essentials == {"list": {"name": "L", "details_tier": "essentials"}, "legacy": {"name": "Old"}}
+
+    # The cached essentials entry does not satisfy a full details request
+    full = await inst.get_restaurant_details_batch(["list", "legacy"])
+    assert full == {"list": None, "legacy": {"name": "Old"}}
+
+
+class FakeFirestore:
+    """In-memory documents keyed by (collection, doc_id); every commit records its writes"""
+
+    def __init__(self, docs=None):
+        self.docs = {key: dict(data) for key, data in (docs or {}).items()}
+        self.commits = []
+        self.projections = []
+
+    def collection(self, name):
+        db = self
+
+        class Ref:
+            def __init__(self, doc_id):
+                self.id = doc_id
+                self.key = (name, doc_id)
+
+            def update(self, data):
+                db._commit([("update", self.key, data)])
+
+            def set(self, data, merge=False):
+                db._commit([("set", self.key, data)])
+
+            def delete(self):
+                db._commit([("delete", self.key, None)])
+
+        return types.SimpleNamespace(document=Ref)
+
+    def get_all(self, refs, field_paths=None):
+        if field_paths is not None:
+            self.projections.append(list(field_paths))
+        return iter([
+            FakeSnapshot(ref.id, None if ref.key not in self.docs else
+                         {k: v for k, v in self.docs[ref.key].items() if field_paths is None or k in field_paths})
+            for ref in refs
+        ])
+
+    def _commit(self, writes):
+        self.commits.append(list(writes))
+        for op, key, data in writes:
+            if op == "delete":
+                self.docs.pop(key, None)
+                continue
+            doc = self.docs.setdefault(key, {})
+            for field, value in data.items():
+                if value is fs_mod.firestore.DELETE_FIELD:
+                    doc.pop(field, None)
+                elif isinstance(value, fs_mod.firestore.Increment):
+                    doc[field] = doc.get(field, 0) + value.value
+                else:
+                    doc[field] = value
+
+    def batch(self):
+        db = self
+        writes = []
+
+        class Batch:
+            def set(self, ref, data, merge=False):
+                writes.append(("set", ref.key, data))
+
+            def update(self, ref, data):
+                writes.append(("update", ref.key, data))
+
+            def delete(self, ref):
+                writes.append(("delete", ref.key, None))
+
+            def commit(self):
+                db._commit(writes)
+
+        return Batch()
+
+
+@pytest.mark.asyncio
+async def test_split_details_keep_restaurant_documents_small(service):
+    from datetime import datetime
+
+    inst = service
+    inst.db = FakeFirestore({
+        # Written before the split: the heavy fields are inline
+        ("restaurants", "p1"): {"place_id": "p1", "name": "Old", "editorial_summary": "old", "photos": ["a"],
+                                "search_timestamp": datetime.now()},
+    })
+    inst.legacy_place_id_lookup = False
+
+    # Unsplit documents are served as they are, without reading a details document
+    assert await inst.get_restaurant_details_from_firebase("p1") == {"name": "Old", "editorial_summary": "old", "photos": ["a"]}
+
+    assert await inst.update_restaurant_details("p1", {"name": "New", "rating": 4.5, "editorial_summary": "fresh",
+                                                       "photo_names": ["places/p1/photos/x"]})
+    hot = inst.db.docs[("restaurants", "p1")]
+    assert set(hot) == {"place_id", "name", "rating", "search_timestamp", "last_updated", fs_mod.DETAILS_SPLIT_FIELD,
+                        "details_change_count", "details_changed_at"}
+    # Inline fields the refresh did not return are moved, not dropped
+    assert inst.db.docs[("restaurant_details", "p1")] == {"editorial_summary": "fresh", "photos": ["a"],
+                                                          "photo_names": ["places/p1/photos/x"]}
+    assert len(inst.db.commits) == 1  # Both documents in one atomic batch
+
+    details = await inst.get_restaurant_details_batch(["p1"])
+    assert details["p1"] == {"name": "New", "rating": 4.5, "editorial_summary": "fresh", "photos": ["a"],
+                             "photo_names": ["places/p1/photos/x"], "details_change_count": 1,
+                             "details_changed_at": hot["details_changed_at"]}
+
+    assert await inst.delete_restaurant_by_place_id("p1")
+    assert inst.db.docs == {}
+
+
+@pytest.mark.asyncio
+async def test_update_restaurant_details_writes_only_changed_fields(service):
+    from datetime import datetime, timedelta
+
+    week_ago = datetime.now() - timedelta(days=7)
+    inst = service
+    inst.db = FakeFirestore({
+        ("restaurants", "p1"): {"place_id": "p1", "name": "Cafe", "rating": 4.5, "types": ["cafe"],
+                                "details_split": True, "details_change_count": 3, "search_timestamp": week_ago},
+        ("restaurant_details", "p1"): {"editorial_summary": "cozy", "photo_names": ["a"]},
+    })
+    inst.legacy_place_id_lookup = False
+
+    # Same data as last week: only the timestamps are written
+    same = {"name": "Cafe", "rating": 4.5, "types": ["cafe"], "editorial_summary": "cozy", "photo_names": ["a"]}
+    assert await inst.update_restaurant_details("p1", same)
+    assert [sorted(data) for _, _, data in inst.db.commits[-1]] == [["last_updated", "search_timestamp"]]
+    assert inst.db.docs[("restaurants", "p1")]["details_change_count"] == 3
+    assert inst.db.docs[("restaurants", "p1")]["search_timestamp"] > week_ago
+
+    # A new rating and summary: just those fields, and one more change
+    assert await inst.update_restaurant_details("p1", {**same, "rating": 4.6, "editorial_summary": "cosy", "phone_number": None})
+    writes = {key: data for _, key, data in inst.db.commits[-1]}
+    assert writes[("restaurant_details", "p1")] == {"editorial_summary": "cosy"}
+    assert set(writes[("restaurants", "p1")]) == {"rating", "search_timestamp", "last_updated",
+                                                  "details_change_count", "details_changed_at"}
+    assert inst.db.docs[("restaurants", "p1")]["details_change_count"] == 4
+    assert inst.details_write_stats == {"updates": 2, "changed_updates": 1, "fields_written": 2, "fields_unchanged": 8}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_refreshes_share_one_batched_commit(service):
+    from datetime import datetime
+    from write_buffer import BatchWriter
+
+    inst = service
+    inst.db = FakeFirestore({
+        ("restaurants", "p1"): {"place_id": "p1", "name": "One", "details_split": True, "search_timestamp": datetime.now()},
+        ("restaurants", "p2"): {"place_id": "p2", "name": "Two", "details_split": True, "search_timestamp": datetime.now()},
+    })
+    inst.legacy_place_id_lookup = False
+    inst.writer = BatchWriter(inst._commit_writes, flush_interval_ms=10)
+
+    updated = await asyncio.gather(
+        inst.update_restaurant_details("p1", {"rating": 4.0, "review_summary": "good"}),
+        inst.update_restaurant_details("p2", {"rating": 3.5}),
+    )
+
+    assert updated == [True, True]
+    assert len(inst.db.commits) == 1
+    assert [key for _, key, _ in inst.db.commits[0]] == [
+        ("restaurant_details", "p1"), ("restaurants", "p1"), ("restaurants", "p2"),
+    ]
+    assert inst.db.docs[("restaurant_details", "p1")] == {"review_summary": "good"}
+    assert inst.db.docs[("restaurants", "p2")]["rating"] == 3.5
+
+
+@pytest.mark.asyncio
+async def test_update_photo_names_keeps_details_timestamps(service):
+    from datetime import datetime, timedelta
+
+    week_ago = datetime.now() - timedelta(days=7)
+    inst = service
+    inst.db = FakeFirestore({
+        ("restaurants", "p1"): {"place_id": "p1", "details_split": True, "search_timestamp": week_ago},
+        ("restaurant_details", "p1"): {"photo_names": ["old"], "review_summary": "ok"},
+        ("restaurants", "p2"): {"place_id": "p2", "photo_names": ["old"], "search_timestamp": week_ago},
+    })
+    inst.legacy_place_id_lookup = False
+
+    assert await inst.update_photo_names("p1", ["new"])
+    assert await inst.update_photo_names("p2", ["new"])
+    assert not await inst.update_photo_names("missing", ["new"])
+
+    assert inst.db.docs[("restaurant_details", "p1")] == {"photo_names": ["new"], "review_summary": "ok"}
+    assert inst.db.docs[("restaurants", "p2")]["photo_names"] == ["new"]
+    assert inst.db.docs[("restaurants", "p1")]["search_timestamp"] == week_ago
+    # Only the split marker is read to find where the names live
+    assert inst.db.projections == [[fs_mod.DETAILS_SPLIT_FIELD]] * 3
+
+
+@pytest.mark.asyncio
+async def test_cheaper_refresh_keeps_the_stored_details_tier(service):
+    from datetime import datetime
+
+    inst = service
+    inst.db = FakeFirestore({
+        ("restaurants", "p1"): {"place_id": "p1", "name": "Cafe", "details_tier": "atmosphere", "details_split": True,
+                                "search_timestamp": datetime.now()},
+        ("restaurant_details", "p1"): {"generative_summary": "lively"},
+        ("restaurants", "p2"): {"place_id": "p2", "name": "Bar", "details_tier": "essentials",
+                                "search_timestamp": datetime.now()},
+    })
+    inst.legacy_place_id_lookup = False
+
+    # Essentials leave the atmosphere fields untouched, so the document still covers atmosphere
+    assert await inst.update_restaurant_details("p1", {"name": "Cafe", "details_tier": "essentials", "generative_summary": None})
+    assert inst.db.docs[("restaurants", "p1")]["details_tier"] == "atmosphere"
+    assert await inst.get_restaurant_details_from_firebase("p1", tier="atmosphere") is not None
+
+    # A richer refresh raises the tier
+    assert await inst.update_restaurant_details("p2", {"name": "Bar", "details_tier": "pro"})
+    assert inst.db.docs[("restaurants", "p2")]["details_tier"] == "pro"
@@ -1,5 +1,6 @@
 import sys
 import os
+import json
 import types
 import asyncio
 
@@ -23,47 +24,17 @@ class DummyBackgroundTasks:
         self.tasks.append((func, args, kwargs))
 
 
-@pytest.mark.asyncio
-async def test_get_single_restaurant_details_uses_firebase():
-    # Fake firebase service that returns fresh details
-    class FakeFirebase:
-        async def get_restaurant_details_from_firebase(self, place_id):
-            return {"name": "FromFirebase"}
-
-    place_id, details, source = await main.get_single_restaurant_details("p1", FakeFirebase())
-    assert place_id == "p1"
-    assert source == "firebase"
-    assert details["name"] == "FromFirebase"
-
-
-@pytest.mark.asyncio
-async def test_get_single_restaurant_details_falls_back_to_google(monkeypatch):
-    # Fake firebase service that returns None
-    class FakeFirebase:
-        async def get_restaurant_details_from_firebase(self, place_id):
-            return None
-
-    async def fake_places_detail(place_id):
-        return {"name": "FromGoogle"}
-
-    monkeypatch.setattr(main, "places_service", types.SimpleNamespace(get_restaurant_details=fake_places_detail))
-
-    place_id, details, source = await main.get_single_restaurant_details("p2", FakeFirebase())
-    assert source == "google_places"
-    assert details["name"] == "FromGoogle"
-
-
 @pytest.mark.asyncio
 async def test_get_multiple_restaurant_details_concurrent(monkeypatch):
     # Fake firebase that always returns None to force google fetch
     class FakeFirebase:
-        async def get_restaurant_details_from_firebase(self, place_id):
-            return None
+        async def get_restaurant_details_batch(self, place_ids, tier="atmosphere"):
+            return {place_id: None for place_id in place_ids}
 
         async def update_restaurant_details(self, place_id, details):
             return True
 
-    async def fake_places_detail(place_id):
+    async def fake_places_detail(place_id, tier="atmosphere"):
         return {"name": f"G-{place_id}", "price_level": 2}
 
     monkeypatch.setattr(main, "places_service", types.SimpleNamespace(get_restaurant_details=fake_places_detail))
@@ -74,13 +45,20 @@ async def test_get_multiple_restaurant_details_concurrent(monkeypatch):
         def __init__(self):
             self.place_ids = ["a", "b"]
             self.location = types.SimpleNamespace(latitude=0.0, longitude=0.0)
+            self.stream = None
+            self.tier = None
 
     bg = DummyBackgroundTasks()
     res = await main.get_multiple_restaurant_details(Req(), bg)
-    assert res.total_found == 2
+    assert json.loads(res.body)["total_found"] == 2
 
     # background tasks should be added for both place_ids (google_places)
     assert len(bg.tasks) == 2
+    # and carry the already-fetched details for write-through
+    assert sorted((args for _, args, _ in bg.tasks), key=lambda a: a[0]) == [
+        ("a", {"name": "G-a", "price_level": 2}),
+        ("b", {"name": "G-b", "price_level": 2}),
+    ]
 
 
 @pytest.mark.asyncio
@@ -92,7 +70,7 @@ async def test_update_restaurant_details_background_calls_update(monkeypatch):
             recorded['updated'] = place_id
             return True
 
-    async def fake_places_detail(place_id):
+    async def fake_places_detail(place_id, tier="atmosphere"):
         return {"name": "X"}
 
     monkeypatch.setattr(main, "places_service", types.SimpleNamespace(get_restaurant_details=fake_places_detail))
@@ -100,3 +78,241 @@ async def test_update_restaurant_details_background_calls_update(monkeypatch):
 
     await main.update_restaurant_details_background("p-upd")
     assert recorded.get('updated') == "p-upd"
+
+
+@pytest.mark.asyncio
+async def test_update_restaurant_details_background_writes_through(monkeypatch):
+    recorded = {}
+
+    class FakeFirebase:
+        async def update_restaurant_details(self, place_id, details):
+            recorded[place_id] = details
+            return True
+
+    async def fail_places_detail(place_id):
+        raise AssertionError("write-through must not re-fetch from Google")
+
+    monkeypatch.setattr(main, "places_service", types.SimpleNamespace(get_restaurant_details=fail_places_detail))
+    monkeypatch.setattr(main, "get_firebase_service", lambda: FakeFirebase())
+    saved_before = main.write_through_stats["upstream_fetches_saved"]
+
+    await main.update_restaurant_details_background("p-wt", {"name": "Fetched"})
+    assert recorded == {"p-wt": {"name": "Fetched"}}
+    assert main.write_through_stats["upstream_fetches_saved"] == saved_before + 1
+
+
+@pytest.mark.asyncio
+async def test_get_multiple_restaurant_details_only_fetches_misses(monkeypatch):
+    fetched = []
+
+    class FakeFirebase:
+        async def get_restaurant_details_batch(self, place_ids, tier="atmosphere"):
+            return {place_id: ({"name": "Cached"} if place_id == "hit" else None) for place_id in place_ids}
+
+    async def fake_places_detail(place_id, tier="atmosphere"):
+        fetched.append(place_id)
+        return {"name": f"G-{place_id}"}
+
+    monkeypatch.setattr(main, "places_service", types.SimpleNamespace(get_restaurant_details=fake_places_detail))
+    monkeypatch.setattr(main, "get_firebase_service", lambda: FakeFirebase())
+
+    class Req:
+        def __init__(self):
+            self.place_ids = ["miss", "hit"]
+            self.location = types.SimpleNamespace(latitude=0.0, longitude=0.0)
+            self.stream = None
+            self.tier = None
+
+    bg = DummyBackgroundTasks()
+    res = await main.get_multiple_restaurant_details(Req(), bg)
+
+    assert fetched == ["miss"]
+    # Response keeps the request order
+    assert [r["name"] for r in json.loads(res.body)["restaurants"]] == ["G-miss", "Cached"]
+    assert [args[0] for _, args, _ in bg.tasks] == ["miss"]
+
+
+@pytest.mark.asyncio
+async def test_get_multiple_restaurant_details_streams_as_results_resolve(monkeypatch):
+
+    release_slow = asyncio.Event()
+
+    class FakeFirebase:
+        async def get_restaurant_details_batch(self, place_ids, tier="atmosphere"):
+            return {place_id: ({"name": "Cached"} if place_id == "hit" else None) for place_id in place_ids}
+
+    async def fake_places_detail(place_id, tier="atmosphere"):
+        if place_id == "slow":
+            await release_slow.wait()
+        if place_id == "broken":
+            raise RuntimeError("upstream down")
+        return {"name": f"G-{place_id}"}
+
+    monkeypatch.setattr(main, "places_service", types.SimpleNamespace(get_restaurant_details=fake_places_detail))
+    monkeypatch.setattr(main, "get_firebase_service", lambda: FakeFirebase())
+
+    class Req:
+        def __init__(self):
+            self.place_ids = ["slow", "hit", "fast", "broken"]
+            self.location = types.SimpleNamespace(latitude=0.0, longitude=0.0)
+            self.stream = "ndjson"
+            self.tier = None
+
+    bg = DummyBackgroundTasks()
+    res = await main.get_multiple_restaurant_details(Req(), bg)
+    assert res.media_type == "application/x-ndjson"
+
+    events = []
+    async for chunk in res.body_iterator:
+        events.append(json.loads(chunk))
+        if len(events) == 3:
+            # The slow fetch has not resolved yet
+            release_slow.set()
+
+    assert [e["event"] for e in events] == ["restaurant", "restaurant", "error", "restaurant", "summary"]
+    assert [e["data"].get("name") for e in events[:2]] == ["Cached", "G-fast"]
+    assert events[2]["data"] == {"place_id": "broken", "error": "upstream down"}
+    assert events[3]["data"]["name"] == "G-slow"
+    assert events[4]["data"]["total_found"] == 3 and events[4]["data"]["errors"] == 1
+    assert sorted(args[0] for _, args, _ in bg.tasks) == ["fast", "slow"]
+
+
+def test_format_stream_event_sse():
+    assert main.format_stream_event("sse", "summary", {"total_found": 1}) == 'event: summary\ndata: {"total_found":1}\n\n'
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_fetch_and_one_write(monkeypatch):
+    release = asyncio.Event()
+    fetched = []
+
+    async def fake_places_detail(place_id, tier="atmosphere"):
+        fetched.append(place_id)
+        await release.wait()
+        return {"name": "Popular"}
+
+    monkeypatch.setattr(main, "places_service", types.SimpleNamespace(get_restaurant_details=fake_places_detail))
+    monkeypatch.setattr(main, "details_flight", main.SingleFlight())
+
+    calls = [asyncio.create_task(main.fetch_restaurant_details_from_google("p1")) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*calls)
+
+    assert fetched == ["p1"]
+    assert [source for _, _, source in results] == ["google_places", "google_places_coalesced", "google_places_coalesced"]
+    assert all(details == {"name": "Popular"} for _, details, _ in results)
+
+
+def test_details_payload_carries_photo_handles_when_photo_names_are_known():
+    lazy = main.restaurant_details_payload("p1", {"photo_names": ["places/p1/photos/a", "places/p1/photos/b"]},
+                                           "https://api.example.com")
+    eager = main.restaurant_details_payload("p2", {"photos": ["https://img/1"]}, "https://api.example.com")
+
+    assert lazy["photos"] == ["https://api.example.com/photo/p1/0", "https://api.example.com/photo/p1/1"]
+    assert eager["photos"] == ["https://img/1"]
+
+
+@pytest.mark.asyncio
+async def test_photo_endpoint_redirects_to_resolved_uri(monkeypatch):
+    resolved = []
+
+    class FakeFirebase:
+        async def get_restaurant_details_from_firebase(self, place_id, tier="atmosphere"):
+            return {"name": "Stored", "photo_names": ["places/p1/photos/a", "places/p1/photos/b"]} if place_id == "p1" else None
+
+    async def fake_get_photo_names(place_id):
+        return ["places/p2/photos/z"]
+
+    async def fake_resolve(name, max_height):
+        resolved.append((name, max_height))
+        return f"https://img/{name.split('/')[-1]}"
+
+    monkeypatch.setattr(main, "get_firebase_service", lambda: FakeFirebase())
+    monkeypatch.setattr(main, "places_service", types.SimpleNamespace(
+        get_photo_names=fake_get_photo_names, resolve_photo_uri=fake_resolve))
+
+    res = await main.get_photo("p1", 1, DummyBackgroundTasks(), max_height=800)
+    assert res.status_code == 302
+    assert res.headers["location"] == "https://img/b"
+
+    res = await main.get_photo("p2", 0, DummyBackgroundTasks(), max_height=400)
+    assert res.headers["location"] == "https://img/z"
+    assert resolved == [("places/p1/photos/b", 800), ("places/p2/photos/z", 400)]
+
+    with pytest.raises(main.HTTPException) as exc:
+        await main.get_photo("p1", 5, DummyBackgroundTasks(), max_height=800)
+    assert exc.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_photo_endpoint_refreshes_expired_photo_names(monkeypatch):
+    refreshed = []
+
+    class FakeFirebase:
+        async def get_restaurant_details_from_firebase(self, place_id, tier="atmosphere"):
+            return {"name": "Stored", "photo_names": ["places/p1/photos/expired"]}
+
+        async def update_photo_names(self, place_id, photo_names):
+            return True
+
+    async def fake_get_photo_names(place_id, refresh=False):
+        refreshed.append(refresh)
+        return ["places/p1/photos/current"]
+
+    async def fake_resolve(name, max_height):
+        return None if name.endswith("expired") else f"https://img/{name.split('/')[-1]}"
+
+    firebase = FakeFirebase()
+    monkeypatch.setattr(main, "get_firebase_service", lambda: firebase)
+    monkeypatch.setattr(main, "places_service", types.SimpleNamespace(
+        get_photo_names=fake_get_photo_names, resolve_photo_uri=fake_resolve))
+
+    bg = DummyBackgroundTasks()
+    res = await main.get_photo("p1", 0, bg, max_height=800)
+
+    assert res.headers["location"] == "https://img/current"
+    assert refreshed == [True]
+    # The current names are written back so later requests skip the expired one
+    assert [(func.__name__, args) for func, args, _ in bg.tasks] == [("update_photo_names", ("p1", ["places/p1/photos/current"]))]
+
+    # Names that still do not resolve after the refresh are a 502
+    async def never_resolves(name, max_height):
+        return None
+
+    main.places_service.resolve_photo_uri = never_resolves
+    with pytest.raises(main.HTTPException) as exc:
+        await main.get_photo("p1", 0, DummyBackgroundTasks(), max_height=800)
+    assert exc.value.status_code == 502
+
+
+def test_details_payload_matches_response_models():
+    RestaurantDetailsResponse = main.RestaurantDetailsResponse
+
+    payload = main.restaurant_details_payload("p1", {"name": "Cafe", "rating": 4.5, "types": ["cafe"], "photo_names": ["a"]})
+    assert set(payload) == set(RestaurantDetailsResponse.model_fields)
+    assert RestaurantDetailsResponse.model_validate(payload).model_dump() == payload
+    assert payload["photos"] == ["/photo/p1/0"]
+
+
+@pytest.mark.asyncio
+async def test_multiple_details_response_matches_response_model(monkeypatch):
+    class FakeFirebase:
+        async def get_restaurant_details_batch(self, place_ids, tier="atmosphere"):
+            return {place_id: {"name": "Cafe", "rating": 4.5} for place_id in place_ids}
+
+    monkeypatch.setattr(main, "get_firebase_service", lambda: FakeFirebase())
+
+    class Req:
+        def __init__(self):
+            self.place_ids = ["p1"]
+            self.location = types.SimpleNamespace(latitude=0.0, longitude=0.0)
+            self.stream = None
+            self.tier = None
+
+    res = await main.get_multiple_restaurant_details(Req(), DummyBackgroundTasks())
+    body = json.loads(res.body)
+
+    assert set(main.RestaurantDetailsItem.model_fields) == set(main.RestaurantDetailsResponse.model_fields) | {"place_id"}
+    assert main.MultipleRestaurantDetailsResponse.model_validate(body).model_dump() == body
+    assert body["restaurants"] == [{"place_id": "p1", **main.restaurant_details_payload("p1", {"name": "Cafe", "rating": 4.5})}]
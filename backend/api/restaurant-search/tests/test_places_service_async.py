@@ -59,3 +59,315 @@ async def test_search_nearby_restaurants_uses_firebase(monkeypatch):
     # Only the close restaurant should be returned (within 5000m)
     assert any(r["place_id"] == "p_close" for r in res)
     assert not any(r["place_id"] == "p_far" for r in res)
+
+
+@pytest.mark.asyncio
+async def test_requests_share_one_pooled_client():
+    import httpx
+
+    s = PlacesService()
+    s.api_key = "fake_key"
+    seen_clients = set()
+
+    def handler(request):
+        return httpx.Response(200, json={
+            "status": "OK",
+            "results": [{"address_components": [
+                {"types": ["neighborhood"], "long_name": "Annex"},
+                {"types": ["locality"], "long_name": "Toronto"},
+            ]}],
+        })
+
+    s._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    for i in range(3):
+        seen_clients.add(id(s.client))
+        # Different neighbourhoods, so the location cache does not answer
+        info = await s.get_location_info(43.67 + i * 0.01, -79.40)
+        assert info == {"neighborhood": "Annex", "city": "Toronto"}
+
+    assert len(seen_clients) == 1
+    stats = s.pool_stats()
+    assert stats["client_open"] is True
+    assert stats["hosts"]["maps.googleapis.com"]["requests"] == 3
+
+    await s.close()
+    assert s.pool_stats()["client_open"] is False
+
+
+@pytest.mark.asyncio
+async def test_photo_urls_resolve_concurrently_in_order():
+    import httpx
+
+    s = PlacesService()
+    s.api_key = "fake_key"
+    s.photo_concurrency_per_place = 2
+    in_flight = {"now": 0, "max": 0}
+
+    async def handler(request):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        name = request.url.path.split("/")[-2]
+        # Later photos answer first so ordering must come from the input
+        await asyncio.sleep(0.01 * (5 - int(name[-1])))
+        in_flight["now"] -= 1
+        if name == "p2":
+            return httpx.Response(500)
+        return httpx.Response(200, json={"photoUri": f"http://img/{name}"})
+
+    s._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    place = {"photos": [{"name": f"places/x/photos/p{i}", "heightPx": 900} for i in range(1, 5)]}
+
+    urls = await s._get_photo_urls(place, 400, 8)
+
+    assert urls == ["http://img/p1", "http://img/p3", "http://img/p4"]
+    assert in_flight["max"] == 2
+    await s.close()
+
+
+@pytest.mark.asyncio
+async def test_get_retries_throttled_requests_and_backs_off(monkeypatch):
+    import httpx
+    import places_service as ps_mod
+
+    s = PlacesService()
+    s.max_retries = 2
+    attempts = []
+
+    def handler(request):
+        attempts.append(request.url.path)
+        if len(attempts) == 1:
+            return httpx.Response(429, headers={"Retry-After": "1"})
+        if len(attempts) == 2:
+            raise httpx.ConnectError("reset", request=request)
+        return httpx.Response(200, json={"ok": True})
+
+    delays = []
+
+    async def fake_sleep(seconds):
+        delays.append(seconds)
+
+    monkeypatch.setattr(ps_mod.asyncio, "sleep", fake_sleep)
+    s._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    limit_before = s._concurrency.limit
+
+    response = await s._get("https://places.googleapis.com/v1/places/p1")
+
+    assert response.status_code == 200
+    assert len(attempts) == 3
+    assert delays[0] >= 1  # Honours Retry-After
+    assert s._concurrency.limit < limit_before
+    stats = s.pool_stats()
+    assert stats["hosts"]["places.googleapis.com"]["retries"] == 2
+    assert stats["concurrency"]["overloads"] == 2  # The 429 and the reset
+    await s.close()
+
+
+@pytest.mark.asyncio
+async def test_transport_errors_shrink_the_concurrency_window(monkeypatch):
+    import httpx
+    import places_service as ps_mod
+
+    s = PlacesService()
+    s.max_retries = 3
+
+    def handler(request):
+        raise httpx.ConnectTimeout("timed out", request=request)
+
+    async def fake_sleep(seconds):
+        pass
+
+    monkeypatch.setattr(ps_mod.asyncio, "sleep", fake_sleep)
+    s._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    limit_before = s._concurrency.limit
+
+    with pytest.raises(httpx.ConnectTimeout):
+        await s._get("https://places.googleapis.com/v1/places/p1")
+
+    stats = s.pool_stats()["concurrency"]
+    assert stats["overloads"] == 4
+    assert stats["successes"] == 0
+    assert s._concurrency.limit < limit_before
+    await s.close()
+
+
+@pytest.mark.asyncio
+async def test_location_info_cached_per_geohash_cell(monkeypatch):
+    s = PlacesService()
+    s.location_cache_firestore = True
+    geocoded = []
+    stored = {}
+
+    async def fake_reverse_geocode(latitude, longitude):
+        geocoded.append((latitude, longitude))
+        return {"neighborhood": "Annex", "city": "Toronto"}
+
+    class FakeFirebase:
+        async def get_cached_location(self, cell):
+            return stored.get(cell)
+
+        async def cache_location(self, cell, location, ttl_seconds):
+            stored[cell] = dict(location)
+
+    import types
+    monkeypatch.setitem(sys.modules, "firebase_service", types.SimpleNamespace(get_firebase_service=lambda: FakeFirebase()))
+    monkeypatch.setattr(s, "_reverse_geocode", fake_reverse_geocode)
+
+    first = await s.get_location_info(43.67010, -79.40010)
+    # ~20 m away, same precision-7 cell
+    second = await s.get_location_info(43.67020, -79.40020)
+    assert first == second == {"neighborhood": "Annex", "city": "Toronto"}
+    assert len(geocoded) == 1
+    assert [len(cell) for cell in stored] == [7]
+
+    # A new instance (e.g. another Cloud Run replica) is served by the Firestore tier
+    other = PlacesService()
+    other.location_cache_firestore = True
+    monkeypatch.setattr(other, "_reverse_geocode", fake_reverse_geocode)
+    assert await other.get_location_info(43.67010, -79.40010) == first
+    assert len(geocoded) == 1
+    assert other.location_cache_stats()["firestore_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_photo_uris_cached_by_name_and_height():
+    import httpx
+
+    s = PlacesService()
+    s.api_key = "fake_key"
+    requested = []
+
+    def handler(request):
+        requested.append((request.url.path, request.url.params["maxHeightPx"]))
+        if request.url.path.endswith("/bad/media"):
+            return httpx.Response(404)
+        return httpx.Response(200, json={"photoUri": f"http://img{request.url.path}"})
+
+    s._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    place = {"photos": [{"name": f"places/x/photos/{n}", "heightPx": 900} for n in ("a", "b", "bad")]}
+
+    first = await s._get_photo_urls(place, 400, 8)
+    second = await s._get_photo_urls(place, 400, 8)
+    taller = await s._get_photo_urls(place, 900, 1)
+
+    assert first == second == ["http://img/v1/places/x/photos/a/media", "http://img/v1/places/x/photos/b/media"]
+    assert len(taller) == 1
+    # Failed photos are not cached; a different max height is a different URI
+    assert [path.split("/")[-2] for path, _ in requested] == ["a", "b", "bad", "bad", "a"]
+    stats = s.photo_uri_cache_stats()
+    assert (stats["hits"], stats["entries"]) == (2, 3)
+    await s.close()
+
+
+@pytest.mark.asyncio
+async def test_photo_names_cached_with_their_own_ttl(monkeypatch):
+    import httpx
+
+    monkeypatch.setenv("PLACES_PHOTO_NAMES_TTL_SECONDS", "60")
+    monkeypatch.setenv("PLACES_PHOTO_NAMES_CACHE_MAX_ENTRIES", "7")
+    s = PlacesService()
+    s.api_key = "fake_key"
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(200, json={"photos": [{"name": "places/p1/photos/a", "heightPx": 900}]})
+
+    s._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    assert await s.get_photo_names("p1") == ["places/p1/photos/a"]
+    assert await s.get_photo_names("p1") == ["places/p1/photos/a"]
+    assert len(calls) == 1
+    stats = s.photo_names_cache_stats()
+    assert (stats["ttl_seconds"], stats["max_entries"], stats["hits"]) == (60.0, 7, 1)
+    assert s.photo_uri_cache_stats()["entries"] == 0
+    await s.close()
+
+
+@pytest.mark.asyncio
+async def test_restaurant_details_return_photo_names_without_resolving():
+    import httpx
+
+    s = PlacesService()
+    s.api_key = "fake_key"
+    requested = []
+
+    def handler(request):
+        requested.append(request.url.path)
+        return httpx.Response(200, json={
+            "id": "p1",
+            "displayName": {"text": "Lazy"},
+            "photos": [{"name": "places/p1/photos/a", "heightPx": 900}, {"name": "places/p1/photos/small", "heightPx": 100}],
+        })
+
+    s._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    details = await s.get_restaurant_details("p1")
+
+    assert details["photo_names"] == ["places/p1/photos/a"]
+    assert details["photos"] is None
+    assert requested == ["/v1/places/p1"]  # No media requests on the critical path
+    await s.close()
+
+
+@pytest.mark.asyncio
+async def test_restaurant_details_request_only_the_tier_field_mask():
+    import httpx
+    from places_service import details_field_mask
+
+    s = PlacesService()
+    s.api_key = "fake_key"
+    masks = []
+
+    def handler(request):
+        masks.append(request.headers["X-Goog-FieldMask"].split(","))
+        return httpx.Response(200, json={"id": "p1", "displayName": {"text": "Tiered"}})
+
+    s._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    details = await s.get_restaurant_details("p1", tier="essentials")
+    await s.get_restaurant_details("p1")
+
+    assert details["details_tier"] == "essentials"
+    assert details["name"] == "Tiered" and details["generative_summary"] is None
+    assert "generativeSummary" not in masks[0] and "rating" not in masks[0]
+    assert set(details_field_mask("essentials")) < set(details_field_mask("pro")) < set(masks[1])
+    with pytest.raises(ValueError):
+        details_field_mask("platinum")
+    await s.close()
+
+
+# Place Details fields by billing SKU, cheapest first
+PLACE_DETAILS_SKU_FIELDS = [
+    ("Essentials IDs Only", {"id", "name", "attributions", "photos"}),
+    ("Essentials", {"addressComponents", "adrFormatAddress", "formattedAddress", "location", "plusCode",
+                    "postalAddress", "shortFormattedAddress", "types", "viewport"}),
+    ("Pro", {"accessibilityOptions", "businessStatus", "containingPlaces", "displayName", "googleMapsLinks",
+             "googleMapsUri", "iconBackgroundColor", "iconMaskBaseUri", "primaryType", "primaryTypeDisplayName",
+             "pureServiceAreaBusiness", "subDestinations", "utcOffsetMinutes"}),
+    ("Enterprise", {"currentOpeningHours", "currentSecondaryOpeningHours", "internationalPhoneNumber",
+                    "nationalPhoneNumber", "priceLevel", "priceRange", "rating", "regularOpeningHours",
+                    "regularSecondaryOpeningHours", "userRatingCount", "websiteUri"}),
+    ("Enterprise + Atmosphere", {"allowsDogs", "curbsidePickup", "delivery", "dineIn", "editorialSummary",
+                                 "generativeSummary", "goodForChildren", "goodForGroups", "goodForWatchingSports",
+                                 "liveMusic", "menuForChildren", "outdoorSeating", "parkingOptions", "paymentOptions",
+                                 "reservable", "restroom", "reviews", "reviewSummary", "servesBeer", "servesBreakfast",
+                                 "servesBrunch", "servesCocktails", "servesCoffee", "servesDessert", "servesDinner",
+                                 "servesLunch", "servesVegetarianFood", "servesWine", "takeout"}),
+]
+
+
+@pytest.mark.parametrize("tier", ["essentials", "pro", "atmosphere"])
+def test_details_tier_masks_are_billed_at_their_sku(tier):
+    from places_service import DETAILS_TIER_FIELDS, DETAILS_TIER_SKUS, details_field_mask
+
+    sku = DETAILS_TIER_SKUS[tier]
+
+    skus = [name for name, _ in PLACE_DETAILS_SKU_FIELDS]
+    sku_of = {field: name for name, fields in PLACE_DETAILS_SKU_FIELDS for field in fields}
+
+    def field_skus(fields):
+        return {skus.index(sku_of[field.split(".")[0]]) for field in fields}
+
+    # The most expensive field of the mask is billed at the tier's SKU...
+    assert max(field_skus(details_field_mask(tier))) == skus.index(sku)
+    # ...and the fields a paid tier adds are all billed at that SKU
+    if tier != "essentials":
+        assert field_skus(DETAILS_TIER_FIELDS[tier]) == {skus.index(sku)}
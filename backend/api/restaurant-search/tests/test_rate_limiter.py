@@ -0,0 +1,69 @@
+import sys
+import os
+import asyncio
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+import rate_limiter as rl_mod
+from rate_limiter import TokenBucket, AdaptiveConcurrencyLimiter
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_waits_once_burst_is_spent(monkeypatch):
+    now = [100.0]
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    monkeypatch.setattr(rl_mod.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(rl_mod.asyncio, "sleep", fake_sleep)
+
+    bucket = TokenBucket(rate=10, burst=2)
+    for _ in range(3):
+        await bucket.acquire()
+
+    assert slept == [pytest.approx(0.1)]
+    assert bucket.waits == 1
+
+
+@pytest.mark.asyncio
+async def test_aimd_window_grows_on_success_and_halves_once_per_burst():
+    limiter = AdaptiveConcurrencyLimiter(initial=4, minimum=1, maximum=8)
+
+    starts = [await limiter.acquire() for _ in range(4)]
+    # A fifth caller has to wait for a slot
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    # A burst of 429s from calls started before the first decrease counts once
+    for started in starts[:3]:
+        limiter.release(started, overloaded=True)
+    assert limiter.limit == 2
+    assert limiter.stats["decreases"] == 1
+    await asyncio.sleep(0)
+    assert waiter.done()
+
+    limiter.release(starts[3])
+    limiter.release(waiter.result())
+    assert limiter.limit == pytest.approx(2 + 1 / 2 + 1 / 2.5)
+    assert limiter.metrics()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_gives_up_its_place():
+    limiter = AdaptiveConcurrencyLimiter(initial=1, minimum=1, maximum=1)
+    started = await limiter.acquire()
+    waiter = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    limiter.release(started)
+    assert limiter.metrics()["in_flight"] == 0
+    assert limiter.metrics()["queued"] == 0
@@ -0,0 +1,55 @@
+import sys
+import os
+import asyncio
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    release = asyncio.Event()
+    executions = []
+
+    async def fetch():
+        executions.append(1)
+        await release.wait()
+        return {"name": "Shared"}
+
+    calls = [asyncio.create_task(flight.do("p1", fetch)) for _ in range(4)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*calls)
+
+    assert len(executions) == 1
+    assert [coalesced for _, coalesced in results] == [False, True, True, True]
+    assert all(result == {"name": "Shared"} for result, _ in results)
+    assert flight.metrics()["coalescing_ratio"] == 0.75
+
+    # Nothing is cached once the call has finished
+    await flight.do("p1", fetch)
+    assert len(executions) == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_cancelling_one_caller_keeps_the_call():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def failing():
+        await release.wait()
+        raise RuntimeError("upstream down")
+
+    leader = asyncio.create_task(flight.do("p1", failing))
+    follower = asyncio.create_task(flight.do("p1", failing))
+    await asyncio.sleep(0)
+    leader.cancel()
+    release.set()
+
+    with pytest.raises(RuntimeError):
+        await follower
+    assert flight.metrics()["in_flight"] == 0
@@ -0,0 +1,95 @@
+import sys
+import os
+import types
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from google.cloud.firestore import GeoPoint
+
+from spatial_index import SpatialIndex, CatalogSync
+from utils import haversine_meters
+
+
+def _doc(place_id, lat, lng):
+    return {"place_id": place_id, "name": place_id.upper(), "location": GeoPoint(lat, lng)}
+
+
+def test_search_radius_matches_brute_force():
+    import random
+
+    random.seed(7)
+    index = SpatialIndex()
+    points = {}
+    for i in range(500):
+        lat, lng = 43.65 + random.uniform(-0.1, 0.1), -79.38 + random.uniform(-0.1, 0.1)
+        index.upsert(f"d{i}", _doc(f"p{i}", lat, lng))
+        points[f"d{i}"] = (lat, lng)
+
+    for radius_km in (0.3, 2.0, 50.0):
+        results = index.search_radius(43.65, -79.38, radius_km)
+        expected = {d for d, p in points.items() if haversine_meters(43.65, -79.38, *p) <= radius_km * 1000}
+        assert {r["doc_id"] for r in results} == expected
+        assert [r["distance_km"] for r in results] == sorted(r["distance_km"] for r in results)
+
+
+def test_nearest_matches_brute_force():
+    import random
+
+    random.seed(11)
+    index = SpatialIndex()
+    points = {}
+    for i in range(300):
+        lat, lng = 43.65 + random.uniform(-0.2, 0.2), -79.38 + random.uniform(-0.2, 0.2)
+        index.upsert(f"d{i}", _doc(f"p{i}", lat, lng))
+        points[f"d{i}"] = (lat, lng)
+
+    center = (43.70, -79.30)
+    expected = sorted(points, key=lambda d: haversine_meters(*center, *points[d]))[:7]
+    assert [r["doc_id"] for r in index.nearest(*center, 7)] == expected
+    assert index.nearest(*center, 7, max_radius_km=0.001) == []
+
+
+def test_nearest_from_far_outside_the_catalog_is_fast():
+    import random
+    import time
+
+    random.seed(5)
+    index = SpatialIndex()
+    points = {}
+    for i in range(2000):
+        lat, lng = 43.65 + random.uniform(-0.3, 0.3), -79.38 + random.uniform(-0.3, 0.3)
+        index.upsert(f"d{i}", _doc(f"p{i}", lat, lng))
+        points[f"d{i}"] = (lat, lng)
+
+    montreal = (45.5, -73.6)
+    started = time.perf_counter()
+    results = index.nearest(*montreal, 20)
+    everything = index.nearest(*montreal, 10000)
+    # Hundreds of empty rings lie between Montreal and the catalog; they must not be walked cell by cell
+    assert time.perf_counter() - started < 1.0
+
+    expected = sorted(points, key=lambda d: haversine_meters(*montreal, *points[d]))
+    assert [r["doc_id"] for r in results] == expected[:20]
+    assert [r["doc_id"] for r in everything] == expected
+
+
+def test_catalog_sync_applies_snapshot_changes():
+    index = SpatialIndex()
+    sync = CatalogSync(index)
+
+    def change(kind, doc_id, data=None):
+        document = types.SimpleNamespace(id=doc_id, to_dict=lambda: data)
+        return types.SimpleNamespace(type=types.SimpleNamespace(name=kind), document=document)
+
+    sync._on_snapshot([], [change("ADDED", "a", _doc("a", 43.65, -79.38)),
+                           change("ADDED", "b", _doc("b", 43.66, -79.38))], None)
+    assert index.ready is True
+    assert len(index) == 2
+
+    # A moved restaurant leaves its old cell
+    sync._on_snapshot([], [change("MODIFIED", "a", _doc("a", 45.0, -75.0)),
+                           change("REMOVED", "b")], None)
+    assert index.search_radius(43.65, -79.38, 5) == []
+    assert [r["doc_id"] for r in index.search_radius(45.0, -75.0, 1)] == ["a"]
+    assert index.stats()["cells"] == 1
@@ -0,0 +1,43 @@
+import sys
+import os
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+import ttl_cache as cache_mod
+from ttl_cache import TTLCache
+
+
+def test_lru_eviction_and_copies():
+    cache = TTLCache(max_entries=2)
+    cache.put("a", {"name": "A"}, ttl_seconds=60)
+    cache.put("b", {"name": "B"}, ttl_seconds=60)
+
+    hit = cache.get("a")  # "a" becomes most recently used
+    hit["name"] = "mutated"
+    cache.put("c", {"name": "C"}, ttl_seconds=60)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"name": "A"}
+    assert cache.get("c") == {"name": "C"}
+    assert cache.metrics()["evictions"] == 1
+
+
+def test_ttl_expiry_and_invalidation(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_mod.time, "monotonic", lambda: now[0])
+
+    cache = TTLCache()
+    cache.put("a", {"name": "A"}, ttl_seconds=10)
+    cache.put("b", {"name": "B"}, ttl_seconds=100)
+    cache.put("expired", {"name": "X"}, ttl_seconds=0)
+
+    now[0] += 11
+    assert cache.get("a") is None
+    assert cache.get("expired") is None
+    cache.invalidate("b")
+    assert cache.get("b") is None
+
+    metrics = cache.metrics()
+    assert (metrics["hits"], metrics["misses"], metrics["expirations"], metrics["invalidations"]) == (0, 3, 1, 1)
@@ -5,7 +5,10 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 import pytest
 
-from utils import haversine_meters
+from utils import (
+    haversine_meters, haversine_meters_many, bounding_box_mask, within_radius, nearest_k,
+    geohash_encode, geohash_query_bounds, encode_search_cursor, decode_search_cursor,
+)
 
 
 def test_haversine_zero_distance():
@@ -16,3 +19,57 @@ def test_haversine_known_distance():
     # Distance between (0,0) and (0,1) is ~111.32 km -> ~111320 meters
     dist = haversine_meters(0.0, 0.0, 0.0, 1.0)
     assert 111000 < dist < 112000
+
+
+def test_geohash_encode_known_value():
+    assert geohash_encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert len(geohash_encode(43.6532, -79.3832)) == 10
+
+
+def test_geohash_query_bounds_cover_the_circle():
+    import math
+
+    center = (43.6532, -79.3832)
+    for radius_m in (500, 5000, 50000):
+        bounds = geohash_query_bounds(*center, radius_m)
+        # Ranges are sorted and disjoint after merging
+        assert all(a[1] < b[0] for a, b in zip(bounds, bounds[1:]))
+        for step in range(36):
+            bearing = math.radians(step * 10)
+            lat = center[0] + 0.999 * radius_m * math.cos(bearing) / 111320
+            lng = center[1] + 0.999 * radius_m * math.sin(bearing) / (111320 * math.cos(math.radians(center[0])))
+            geohash = geohash_encode(lat, lng)
+            assert any(start <= geohash < end for start, end in bounds)
+
+
+def test_batch_haversine_matches_scalar():
+    lats = [43.65, 43.70, -33.86, 0.0]
+    lons = [-79.38, -79.40, 151.21, 0.0]
+    batch = haversine_meters_many(43.6532, -79.3832, lats, lons)
+    for distance, lat, lon in zip(batch, lats, lons):
+        assert distance == pytest.approx(haversine_meters(43.6532, -79.3832, lat, lon))
+
+
+def test_within_radius_and_nearest_k():
+    lats = [43.70, 43.6533, 43.66, 45.0]
+    lons = [-79.40, -79.3832, -79.3832, -75.0]
+
+    assert bounding_box_mask(43.6532, -79.3832, 1000, lats, lons).tolist() == [False, True, True, False]
+
+    indices, distances = within_radius(43.6532, -79.3832, 1000, lats, lons)
+    assert indices.tolist() == [1, 2]
+    assert distances[0] < distances[1] <= 1000
+
+    indices, distances = nearest_k(43.6532, -79.3832, lats, lons, 3)
+    assert indices.tolist() == [1, 2, 0]
+    assert nearest_k(43.6532, -79.3832, lats, lons, 10)[0].tolist() == [1, 2, 0, 3]
+    assert nearest_k(43.6532, -79.3832, [], [], 3)[0].tolist() == []
+
+
+def test_search_cursor_round_trip_and_rejects_garbage():
+    cursor = encode_search_cursor(1.25, "ChIJ-abc_123")
+    assert decode_search_cursor(cursor) == (1.25, "ChIJ-abc_123")
+
+    for bad in ["not a cursor", encode_search_cursor(1.0, "x")[:-3], "WyJhIiwiYiJd"]:
+        with pytest.raises(ValueError):
+            decode_search_cursor(bad)
@@ -0,0 +1,146 @@
+import sys
+import os
+import asyncio
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from google.cloud.firestore import DELETE_FIELD, Increment
+
+from google.api_core.exceptions import NotFound
+
+from write_buffer import BatchWriter
+
+
+@pytest.mark.asyncio
+async def test_repeat_writes_are_merged_into_one_batch():
+    commits = []
+
+    async def commit(writes):
+        commits.append(writes)
+
+    writer = BatchWriter(commit, flush_interval_ms=10)
+    waiters = [
+        writer.write("update", "restaurants", "p1", {"rating": 4.5, "count": Increment(1)}),
+        writer.write("set", "restaurants", "p2", {"name": "New"}),
+        writer.write("update", "restaurants", "p1", {"rating": 4.6, "count": Increment(2), "old": DELETE_FIELD}),
+        writer.write("update", "restaurants", "p2", {"rating": 3.0, "gone": DELETE_FIELD}),
+    ]
+    assert commits == []
+
+    await asyncio.gather(*waiters)
+
+    assert len(commits) == 1
+    (op1, _, doc1, data1, merge1), (op2, _, doc2, data2, merge2) = commits[0]
+    assert (op1, doc1, merge1) == ("update", "p1", False)
+    assert data1["rating"] == 4.6 and data1["count"].value == 3 and data1["old"] is DELETE_FIELD
+    # Updates of a pending full set are folded into the set
+    assert (op2, doc2, data2, merge2) == ("set", "p2", {"name": "New", "rating": 3.0}, False)
+    assert writer.metrics() == {"writes": 4, "merged": 2, "batches": 1, "documents": 2, "failed_batches": 0, "dropped": 0, "pending": 0}
+
+
+@pytest.mark.asyncio
+async def test_full_buffer_flushes_without_waiting_and_close_flushes_the_rest():
+    commits = []
+
+    async def commit(writes):
+        commits.append([doc_id for _, _, doc_id, _, _ in writes])
+
+    writer = BatchWriter(commit, flush_interval_ms=60_000, max_batch_docs=2)
+    first = [writer.write("set", "restaurants", doc_id, {"n": 1}) for doc_id in ("a", "b")]
+    await asyncio.gather(*first)
+    assert commits == [["a", "b"]]
+
+    last = writer.write("delete", "restaurants", "c")
+    await writer.close()
+    await last
+    assert commits == [["a", "b"], ["c"]]
+
+
+@pytest.mark.asyncio
+async def test_close_waits_for_every_full_buffer_flush():
+    release = asyncio.Event()
+    commits = []
+
+    async def commit(writes):
+        await release.wait()
+        commits.append([doc_id for _, _, doc_id, _, _ in writes])
+
+    writer = BatchWriter(commit, flush_interval_ms=60_000, max_batch_docs=1)
+    waiters = [writer.write("set", "restaurants", doc_id, {"n": 1}) for doc_id in ("a", "b", "c")]
+    # Every full-buffer flush stays referenced while it waits on the commit
+    assert len(writer._full_flushes) == 3
+
+    closing = asyncio.ensure_future(writer.close())
+    await asyncio.sleep(0)
+    release.set()
+    await closing
+
+    assert all(waiter.done() for waiter in waiters)
+    assert sorted(commits) == [["a"], ["b"], ["c"]]
+    assert writer._full_flushes == set()
+
+
+@pytest.mark.asyncio
+async def test_delete_wins_and_commit_errors_reach_every_writer():
+    attempts = []
+
+    async def commit(writes):
+        assert writes == [("delete", "restaurants", "p1", None, False)]
+        attempts.append(writes)
+        raise RuntimeError("unavailable")
+
+    writer = BatchWriter(commit, flush_interval_ms=5)
+    waiters = [
+        writer.write("update", "restaurants", "p1", {"name": "x"}),
+        writer.write("delete", "restaurants", "p1"),
+        writer.write("update", "restaurants", "p1", {"name": "y"}),
+    ]
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in results[:2])
+    # The update after the delete could never apply, so it fails on its own
+    assert isinstance(results[2], NotFound)
+    # The batch is retried once, then the write is tried on its own
+    assert len(attempts) == 3
+    assert writer.metrics()["failed_batches"] == 1
+
+
+@pytest.mark.asyncio
+async def test_update_after_pending_delete_fails_even_when_the_delete_commits():
+    commits = []
+
+    async def commit(writes):
+        commits.append(writes)
+
+    writer = BatchWriter(commit, flush_interval_ms=5)
+    deleted = writer.write("delete", "restaurants", "p1")
+    dropped = writer.write("update", "restaurants", "p1", {"name": "y"})
+    recreated = writer.write("set", "restaurants", "p2", {"name": "z"})
+    results = await asyncio.gather(deleted, dropped, recreated, return_exceptions=True)
+
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], NotFound)
+    assert commits == [[("delete", "restaurants", "p1", None, False), ("set", "restaurants", "p2", {"name": "z"}, False)]]
+    assert writer.metrics()["dropped"] == 1 and writer.metrics()["merged"] == 0
+
+
+@pytest.mark.asyncio
+async def test_one_bad_write_only_fails_its_own_writers():
+    commits = []
+
+    async def commit(writes):
+        if any(doc_id == "bad" for _, _, doc_id, _, _ in writes):
+            raise ValueError("invalid field path")
+        commits.append([doc_id for _, _, doc_id, _, _ in writes])
+
+    writer = BatchWriter(commit, flush_interval_ms=5)
+    good = writer.write("set", "restaurants", "p1", {"name": "x"})
+    bad = writer.write("update", "restaurants", "bad", {"": 1})
+    other = writer.write("delete", "restaurants", "p2")
+    results = await asyncio.gather(good, bad, other, return_exceptions=True)
+
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], ValueError)
+    assert commits == [["p1"], ["p2"]]
+    assert writer.metrics() == {"writes": 3, "merged": 0, "batches": 0, "documents": 2, "failed_batches": 1, "dropped": 0, "pending": 0}
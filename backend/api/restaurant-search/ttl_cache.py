@@ -0,0 +1,61 @@
+"""
+Bounded in-memory LRU + TTL cache
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+class TTLCache:
+    """
+    LRU cache of dicts keyed by string (restaurant details by place_id,
+    reverse-geocoding results by geohash cell). Each entry carries its own
+    expiry, so e.g. details are cached only until their document turns stale.
+    Entries are copied in and out, so callers can never mutate what is cached.
+    Only used from the event loop, so no locking.
+    """
+
+    def __init__(self, max_entries: int = 5000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.stats["expirations"] += 1
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return dict(value)
+
+    def put(self, key: str, value: Dict[str, Any], ttl_seconds: float):
+        if ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl_seconds, dict(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def invalidate(self, key: str):
+        if self._entries.pop(key, None) is not None:
+            self.stats["invalidations"] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
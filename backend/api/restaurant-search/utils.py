@@ -1,7 +1,12 @@
 """
 Utility functions for the restaurant search API
 """
+import base64
+import json
 import math
+import numpy as np
+
+EARTH_RADIUS_METERS = 6371000.0
 
 
 def haversine_meters(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -15,9 +20,266 @@ def haversine_meters(lat1: float, lon1: float, lat2: float, lon2: float) -> floa
     Returns:
         Distance in meters
     """
-    R = 6371000.0  # Earth's radius in meters
+    R = EARTH_RADIUS_METERS
     phi1, phi2 = math.radians(lat1), math.radians(lat2)
     dphi = phi2 - phi1
     dl = math.radians(lon2 - lon1)
     a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dl/2)**2
     return 2*R*math.asin(math.sqrt(a))
+
+
+def haversine_meters_many(lat: float, lon: float, lats, lons) -> np.ndarray:
+    """
+    Great circle distances in meters from one center to N points, in one array operation.
+    
+    Args:
+        lat, lon: Center in decimal degrees
+        lats, lons: Sequences (or arrays) of N latitudes and longitudes in decimal degrees
+    
+    Returns:
+        Array of N distances in meters
+    """
+    phi1 = math.radians(lat)
+    phi2 = np.radians(np.asarray(lats, dtype=np.float64))
+    dphi = phi2 - phi1
+    dl = np.radians(np.asarray(lons, dtype=np.float64) - lon)
+    a = np.sin(dphi / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def bounding_box_mask(lat: float, lon: float, radius_m: float, lats, lons) -> np.ndarray:
+    """
+    Cheap prefilter: which of N points fall inside the bounding box of a circle.
+    
+    Args:
+        lat, lon: Center in decimal degrees
+        radius_m: Circle radius in meters
+        lats, lons: Sequences (or arrays) of N latitudes and longitudes in decimal degrees
+    
+    Returns:
+        Boolean array of N flags (True = inside the box, may still be outside the circle)
+    """
+    lat_delta = math.degrees(radius_m / EARTH_RADIUS_METERS)
+    lon_delta = math.degrees(radius_m / (EARTH_RADIUS_METERS * max(math.cos(math.radians(lat)), 1e-12)))
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    return (np.abs(lats - lat) <= lat_delta) & (np.abs(lons - lon) <= lon_delta)
+
+
+def within_radius(lat: float, lon: float, radius_m: float, lats, lons) -> tuple:
+    """
+    Indices and distances of the points within radius_m of the center, nearest first.
+    
+    Args:
+        lat, lon: Center in decimal degrees
+        radius_m: Search radius in meters
+        lats, lons: Sequences (or arrays) of N latitudes and longitudes in decimal degrees
+    
+    Returns:
+        (indices, distances_m) arrays sorted by distance
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    candidates = np.flatnonzero(bounding_box_mask(lat, lon, radius_m, lats, lons))
+    distances = haversine_meters_many(lat, lon, lats[candidates], lons[candidates])
+    inside = distances <= radius_m
+    candidates, distances = candidates[inside], distances[inside]
+    order = np.argsort(distances, kind="stable")
+    return candidates[order], distances[order]
+
+
+def nearest_k(lat: float, lon: float, lats, lons, k: int) -> tuple:
+    """
+    Indices and distances of the k points nearest to the center, nearest first.
+    
+    Args:
+        lat, lon: Center in decimal degrees
+        lats, lons: Sequences (or arrays) of N latitudes and longitudes in decimal degrees
+        k: Number of points to return
+    
+    Returns:
+        (indices, distances_m) arrays sorted by distance
+    """
+    distances = haversine_meters_many(lat, lon, lats, lons)
+    if k <= 0 or distances.size == 0:
+        return np.array([], dtype=np.intp), np.array([], dtype=np.float64)
+    if k < distances.size:
+        top = np.argpartition(distances, k - 1)[:k]
+    else:
+        top = np.arange(distances.size)
+    order = top[np.argsort(distances[top], kind="stable")]
+    return order, distances[order]
+
+
+# Geohash helpers for Firestore range queries (same scheme as geofire-common)
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 10
+_BITS_PER_CHAR = 5
+_MAXIMUM_BITS_PRECISION = 22 * _BITS_PER_CHAR
+_EARTH_EQ_RADIUS = 6378137.0
+_EARTH_E2 = 0.00669447819799
+_EARTH_MERIDIONAL_CIRCUMFERENCE = 40007860.0
+_METERS_PER_DEGREE_LATITUDE = 110574.0
+
+
+def geohash_encode(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    """
+    Encode a coordinate as a geohash string.
+    
+    Args:
+        lat, lon: Latitude and longitude in decimal degrees
+        precision: Number of geohash characters
+    
+    Returns:
+        Geohash string
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    value = 0
+    even = True
+    while len(geohash) < precision:
+        coord, rng = (lon, lon_range) if even else (lat, lat_range)
+        mid = (rng[0] + rng[1]) / 2
+        if coord >= mid:
+            value = value * 2 + 1
+            rng[0] = mid
+        else:
+            value = value * 2
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == _BITS_PER_CHAR:
+            geohash.append(GEOHASH_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(geohash)
+
+
+def _meters_to_longitude_degrees(distance: float, lat: float) -> float:
+    radians = math.radians(lat)
+    num = math.cos(radians) * _EARTH_EQ_RADIUS * math.pi / 180
+    denom = 1 / math.sqrt(1 - _EARTH_E2 * math.sin(radians) ** 2)
+    delta_deg = num * denom
+    if delta_deg < 1e-12:
+        return 360.0 if distance > 0 else 0.0
+    return min(360.0, distance / delta_deg)
+
+
+def _wrap_longitude(lon: float) -> float:
+    if -180 <= lon <= 180:
+        return lon
+    adjusted = lon + 180
+    if adjusted > 0:
+        return (adjusted % 360) - 180
+    return 180 - (-adjusted % 360)
+
+
+def _bounding_box_bits(lat: float, radius_m: float) -> int:
+    lat_delta = radius_m / _METERS_PER_DEGREE_LATITUDE
+    lat_north = min(90.0, lat + lat_delta)
+    lat_south = max(-90.0, lat - lat_delta)
+    bits_lat = math.floor(min(math.log2(_EARTH_MERIDIONAL_CIRCUMFERENCE / 2 / radius_m), _MAXIMUM_BITS_PRECISION)) * 2
+
+    def longitude_bits(latitude):
+        degs = _meters_to_longitude_degrees(radius_m, latitude)
+        return max(1.0, math.log2(360 / degs)) if abs(degs) > 0.000001 else 1.0
+
+    bits_lon_north = math.floor(longitude_bits(lat_north)) * 2 - 1
+    bits_lon_south = math.floor(longitude_bits(lat_south)) * 2 - 1
+    return min(bits_lat, bits_lon_north, bits_lon_south, _MAXIMUM_BITS_PRECISION)
+
+
+def _geohash_range(geohash: str, bits: int) -> tuple:
+    precision = math.ceil(bits / _BITS_PER_CHAR)
+    if len(geohash) < precision:
+        return geohash, geohash + "~"
+    geohash = geohash[:precision]
+    base = geohash[:-1]
+    last_value = GEOHASH_BASE32.index(geohash[-1])
+    unused_bits = _BITS_PER_CHAR - (bits - len(base) * _BITS_PER_CHAR)
+    start_value = (last_value >> unused_bits) << unused_bits
+    end_value = start_value + (1 << unused_bits)
+    if end_value > 31:
+        return base + GEOHASH_BASE32[start_value], base + "~"
+    return base + GEOHASH_BASE32[start_value], base + GEOHASH_BASE32[end_value]
+
+
+def geohash_query_bounds(lat: float, lon: float, radius_m: float) -> list:
+    """
+    Compute the geohash ranges that cover a circle, for Firestore range queries.
+    
+    Each (start, end) range matches geohashes with start <= geohash < end.
+    Overlapping and adjacent ranges are merged, so the result is the minimal
+    set of queries to run.
+    
+    Args:
+        lat, lon: Center of the search in decimal degrees
+        radius_m: Search radius in meters
+    
+    Returns:
+        Sorted list of (start, end) geohash ranges
+    """
+    query_bits = max(1, _bounding_box_bits(lat, radius_m))
+    precision = math.ceil(query_bits / _BITS_PER_CHAR)
+
+    lat_delta = radius_m / _METERS_PER_DEGREE_LATITUDE
+    lat_north = min(90.0, lat + lat_delta)
+    lat_south = max(-90.0, lat - lat_delta)
+    lon_delta = max(
+        _meters_to_longitude_degrees(radius_m, lat_north),
+        _meters_to_longitude_degrees(radius_m, lat_south),
+    )
+    corners = [
+        (point_lat, _wrap_longitude(point_lon))
+        for point_lat in (lat, lat_north, lat_south)
+        for point_lon in (lon, lon - lon_delta, lon + lon_delta)
+    ]
+
+    ranges = sorted({
+        _geohash_range(geohash_encode(point_lat, point_lon, precision), query_bits)
+        for point_lat, point_lon in corners
+    })
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        if start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def encode_search_cursor(distance_km: float, doc_id: str) -> str:
+    """
+    Encode the position of the last search result returned into an opaque cursor.
+    
+    Args:
+        distance_km: Distance of the last result from the search center
+        doc_id: Firebase document ID of the last result (breaks distance ties)
+    
+    Returns:
+        URL-safe cursor string
+    """
+    raw = json.dumps([distance_km, doc_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> tuple:
+    """
+    Decode a cursor produced by encode_search_cursor.
+    
+    Returns:
+        (distance_km, doc_id)
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        distance_km, doc_id = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid search cursor")
+    if not isinstance(distance_km, (int, float)) or isinstance(distance_km, bool) or not isinstance(doc_id, str):
+        raise ValueError("Invalid search cursor")
+    return float(distance_km), doc_id
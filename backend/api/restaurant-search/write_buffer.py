@@ -0,0 +1,175 @@
+"""
+Process-wide buffer that coalesces Firestore document writes into batched commits
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from google.api_core.exceptions import NotFound
+from google.cloud.firestore import DELETE_FIELD, Increment
+
+# Firestore accepts at most 500 writes per batch
+MAX_BATCH_WRITES = 500
+
+# (op, collection, doc_id, data, merge) with op one of "set", "update" or "delete"
+Write = Tuple[str, str, str, Optional[Dict[str, Any]], bool]
+
+
+def _merge_fields(old: Dict[str, Any], new: Dict[str, Any], replace: bool) -> Dict[str, Any]:
+    """
+    Fields of two writes to the same document as one write.
+    Increments are applied to values written earlier; with replace (the earlier
+    write is a full set) deleted fields are dropped.
+    """
+    merged = dict(old)
+    for field, value in new.items():
+        previous = merged.get(field)
+        if value is DELETE_FIELD and replace:
+            merged.pop(field, None)
+        elif isinstance(value, Increment) and isinstance(previous, Increment):
+            merged[field] = Increment(previous.value + value.value)
+        elif isinstance(value, Increment) and isinstance(previous, (int, float)):
+            merged[field] = previous + value.value
+        else:
+            merged[field] = value
+    return merged
+
+
+class _PendingWrite:
+    def __init__(self, op: str, data: Optional[Dict[str, Any]], merge: bool):
+        self.op = op
+        self.data = data
+        self.merge = merge
+        self.waiters: List[asyncio.Future] = []
+
+    def absorb(self, op: str, data: Optional[Dict[str, Any]], merge: bool) -> bool:
+        """Fold a later write to the same document into this one; False if it cannot apply"""
+        if op == "delete" or (op == "set" and not merge):
+            self.op, self.data, self.merge = op, dict(data) if data is not None else None, merge
+        elif self.op == "delete":
+            if op == "set":
+                # Merging into a deleted document creates it with just these fields
+                self.op, self.data, self.merge = "set", dict(data), False
+            else:
+                # An update of a deleted document would fail, so it is dropped
+                return False
+        elif self.op == "set" and not self.merge:
+            self.data = _merge_fields(self.data, data, replace=True)
+        else:
+            # update + update stays an update; a merging set on either side makes a merging set
+            if op == "set":
+                self.op, self.merge = "set", True
+            self.data = _merge_fields(self.data, data, replace=False)
+        return True
+
+
+class BatchWriter:
+    """
+    Collects document writes and commits them as batched writes, every
+    `flush_interval_ms` or as soon as `max_batch_docs` documents are pending.
+    Repeat writes to a pending document are merged into one write. Each
+    write() returns a future that resolves when its write is committed (or
+    raises the commit error; an update queued after a delete of the same document
+    raises NotFound, as Firestore would). Batches are committed one at a time, in the order
+    their documents were first written; a batch that fails twice falls back to
+    committing its writes one by one.
+    """
+
+    def __init__(self, commit: Callable[[List[Write]], Awaitable[Any]],
+                 flush_interval_ms: float = 200, max_batch_docs: int = MAX_BATCH_WRITES):
+        self._commit = commit
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch_docs = max(1, min(max_batch_docs, MAX_BATCH_WRITES))
+        self._pending: Dict[Tuple[str, str], _PendingWrite] = {}
+        self._timer: Optional[asyncio.Task] = None
+        # Flushes started by a full buffer; referenced until done so none is collected mid-flight
+        self._full_flushes: Set[asyncio.Task] = set()
+        self._lock = asyncio.Lock()
+        self.stats = {"writes": 0, "merged": 0, "batches": 0, "documents": 0, "failed_batches": 0, "dropped": 0}
+
+    def write(self, op: str, collection: str, doc_id: str,
+              data: Optional[Dict[str, Any]] = None, merge: bool = False) -> asyncio.Future:
+        """Queue a set, update or delete of one document"""
+        self.stats["writes"] += 1
+        waiter = asyncio.get_running_loop().create_future()
+        key = (collection, doc_id)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = _PendingWrite(op, dict(data) if data is not None else None, merge)
+        elif pending.absorb(op, data, merge):
+            self.stats["merged"] += 1
+        else:
+            self.stats["dropped"] += 1
+            waiter.set_exception(NotFound(f"No document to update: {collection}/{doc_id}"))
+            return waiter
+        pending.waiters.append(waiter)
+
+        if len(self._pending) >= self.max_batch_docs:
+            task = asyncio.ensure_future(self.flush())
+            self._full_flushes.add(task)
+            task.add_done_callback(self._full_flushes.discard)
+        elif self._timer is None:
+            self._timer = asyncio.ensure_future(self._flush_later())
+        return waiter
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self):
+        """Commit everything pending now"""
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+            self._timer = None
+        async with self._lock:
+            while self._pending:
+                keys = list(self._pending)[:self.max_batch_docs]
+                batch = [(key, self._pending.pop(key)) for key in keys]
+                writes = [(pending.op, collection, doc_id, pending.data, pending.merge)
+                          for (collection, doc_id), pending in batch]
+                outcomes = await self._commit_batch(writes)
+                for (_, pending), outcome in zip(batch, outcomes):
+                    for waiter in pending.waiters:
+                        if waiter.done():
+                            continue
+                        if outcome is None:
+                            waiter.set_result(None)
+                        else:
+                            waiter.set_exception(outcome)
+
+    async def _commit_batch(self, writes: List[Write]) -> List[Optional[Exception]]:
+        """
+        Commit one batch, retrying it once. A batch that fails twice is committed
+        one write at a time so a single bad write only fails its own writers.
+        Returns the error of each write, None for those committed.
+        """
+        for attempt in range(2):
+            try:
+                await self._commit(writes)
+            except Exception as e:
+                print(f"Error committing batch of {len(writes)} Firestore writes (attempt {attempt + 1}): {e}")
+            else:
+                self.stats["batches"] += 1
+                self.stats["documents"] += len(writes)
+                return [None] * len(writes)
+
+        self.stats["failed_batches"] += 1
+        outcomes: List[Optional[Exception]] = []
+        for write in writes:
+            try:
+                await self._commit([write])
+            except Exception as e:
+                print(f"Error committing Firestore {write[0]} of {write[1]}/{write[2]}: {e}")
+                outcomes.append(e)
+            else:
+                self.stats["documents"] += 1
+                outcomes.append(None)
+        return outcomes
+
+    async def close(self):
+        """Flush pending writes on shutdown, after any flush already in flight"""
+        if self._full_flushes:
+            await asyncio.gather(*self._full_flushes, return_exceptions=True)
+        await self.flush()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {**self.stats, "pending": len(self._pending)}
@@ -5,7 +5,9 @@ from typing import Dict, Any, List
 from rapidfuzz import fuzz, process  # pip install rapidfuzz
 
 from backend.api_search.services.google_places import text_search
-from services.firestore import db
+from services.firestore import db, with_cold_details, DETAILS_SPLIT_FIELD
+from services.catalog import catalog
+from services.geo import nearest_within
 
 DEMO = os.getenv("DEMO_MODE", "false").lower() == "true"
 
@@ -46,8 +48,6 @@ class SingleSourceSearch:
     async def _search_db(self, payload) -> List[Dict[str, Any]]:
         """Return top 10 restaurants closest to the specified lat/lng within radius_m.
            Strategy: pull all docs within a reasonable radius, calculate distance, sort by distance."""
-        import math
-        
         # Extract location from payload
         lat = payload.lat
         lng = payload.lng
@@ -56,24 +56,16 @@ class SingleSourceSearch:
         if lat is None or lng is None:
             return []
         
-        # Pull all restaurants (we'll fetch in a thread to avoid blocking the event loop)
-        def _fetch_docs():
-            coll = db().collection("restaurants").limit(1000)  # manageable slice
-            return [d.to_dict() | {"_id": d.id} for d in coll.stream()]
+        # Serve from the in-memory catalog once its snapshot listener has loaded
+        if catalog.ready:
+            docs = catalog.documents()
+        else:
+            # Pull all restaurants (we'll fetch in a thread to avoid blocking the event loop)
+            def _fetch_docs():
+                coll = db().collection("restaurants").limit(1000)  # manageable slice
+                return [d.to_dict() | {"_id": d.id} for d in coll.stream()]
 
-        docs = await asyncio.to_thread(_fetch_docs)
-        
-        # Calculate distance and filter by radius
-        def haversine_distance(lat1, lon1, lat2, lon2):
-            """Calculate distance in meters between two points."""
-            R = 6371000  # Earth radius in meters
-            phi1 = math.radians(lat1)
-            phi2 = math.radians(lat2)
-            delta_phi = math.radians(lat2 - lat1)
-            delta_lambda = math.radians(lon2 - lon1)
-            a = math.sin(delta_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
-            c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-            return R * c
+            docs = await asyncio.to_thread(_fetch_docs)
         
         def parse_number(v):
             try:
@@ -96,7 +88,7 @@ class SingleSourceSearch:
             except Exception:
                 return None
 
-        candidates = []
+        located = []  # (doc, lat, lng) for every doc with a usable location
         for d in docs:
             # Prefer explicit lat/lng fields if present
             rest_lat = d.get("lat")
@@ -150,43 +142,52 @@ class SingleSourceSearch:
             except Exception:
                 continue
 
-            distance = haversine_distance(lat, lng, rest_lat, rest_lng)
-
-            if distance <= radius_m:
-                # Return all document fields plus computed distance metrics
-                item = dict(d)  # Copy all fields from the document
-                
-                # Recursively convert non-serializable types to JSON-safe formats
-                def serialize_value(value):
-                    """Recursively convert Firestore types to JSON-safe equivalents."""
-                    if value is None:
-                        return None
-                    
-                    # GeoPoint -> [lat, lng]
-                    if hasattr(value, "latitude") and hasattr(value, "longitude"):
-                        return [value.latitude, value.longitude]
-                    
-                    # Timestamp/datetime -> ISO string
-                    if hasattr(value, "isoformat"):
-                        return value.isoformat()
-                    
-                    # Recursively handle dicts
-                    if isinstance(value, dict):
-                        return {k: serialize_value(v) for k, v in value.items()}
-                    
-                    # Recursively handle lists and tuples
-                    if isinstance(value, (list, tuple)):
-                        return [serialize_value(v) for v in value]
-                    
-                    # Return as-is for primitives (str, int, float, bool)
-                    return value
-                
-                # Serialize all fields
-                item = serialize_value(item)
-                item["distance_m"] = round(distance, 1)
-                item["distance_km"] = round(distance / 1000, 2)
-                candidates.append(item)
-
-        # Sort and return top 10
-        candidates.sort(key=lambda x: x["distance_m"])
-        return candidates[:10]
+            located.append((d, rest_lat, rest_lng))
+
+        # Recursively convert non-serializable types to JSON-safe formats
+        def serialize_value(value):
+            """Recursively convert Firestore types to JSON-safe equivalents."""
+            if value is None:
+                return None
+            
+            # GeoPoint -> [lat, lng]
+            if hasattr(value, "latitude") and hasattr(value, "longitude"):
+                return [value.latitude, value.longitude]
+            
+            # Timestamp/datetime -> ISO string
+            if hasattr(value, "isoformat"):
+                return value.isoformat()
+            
+            # Recursively handle dicts
+            if isinstance(value, dict):
+                return {k: serialize_value(v) for k, v in value.items()}
+            
+            # Recursively handle lists and tuples
+            if isinstance(value, (list, tuple)):
+                return [serialize_value(v) for v in value]
+            
+            # Return as-is for primitives (str, int, float, bool)
+            return value
+
+        # Calculate every distance in one array operation, keep the top 10 within radius
+        indices, distances = nearest_within(
+            lat, lng, radius_m,
+            [rest_lat for _, rest_lat, _ in located],
+            [rest_lng for _, _, rest_lng in located],
+            k=10
+        )
+
+        # Details of split restaurants live in a sibling document; only the returned docs read it
+        nearest = [located[index][0] for index in indices.tolist()]
+        if any(d.get(DETAILS_SPLIT_FIELD) for d in nearest):
+            nearest = await asyncio.to_thread(with_cold_details, [(d["_id"], d) for d in nearest])
+
+        # Only the returned docs are serialized
+        candidates = []
+        for doc, distance in zip(nearest, distances.tolist()):
+            # Return all document fields plus computed distance metrics
+            item = serialize_value(dict(doc))
+            item["distance_m"] = round(distance, 1)
+            item["distance_km"] = round(distance / 1000, 2)
+            candidates.append(item)
+        return candidates
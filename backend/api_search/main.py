@@ -1,10 +1,26 @@
 from dotenv import load_dotenv
 load_dotenv()  # take environment variables from .env.
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routers import health, agent_places
+from services.catalog import catalog
 
-app = FastAPI(title="Agent Search API", version="1.1.0")
+CATALOG_INDEX_ENABLED = os.getenv("CATALOG_INDEX_ENABLED", "true").lower() == "true"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the restaurant catalog into memory; DB searches fall back to Firestore until it is ready
+    if CATALOG_INDEX_ENABLED:
+        try:
+            catalog.start()
+        except Exception as e:
+            print(f"Catalog not started: {e}")
+    yield
+    catalog.stop()
+
+app = FastAPI(title="Agent Search API", version="1.1.0", lifespan=lifespan)
 
 origins = [
     "http://localhost",
@@ -0,0 +1,47 @@
+import threading
+from services.firestore import db
+
+# In-memory copy of the "restaurants" collection, kept current by a Firestore
+# snapshot listener so DB searches do not read Firestore on every request.
+# Split restaurants hold only their hot fields here; readers merge the
+# restaurant_details documents of the results they return (with_cold_details).
+
+class RestaurantCatalog:
+    def __init__(self, collection_name: str = "restaurants"):
+        self.collection_name = collection_name
+        self._docs: dict[str, dict] = {}
+        self._lock = threading.Lock()  # snapshot callbacks run on a background thread
+        self._watch = None
+        self.ready = False
+
+    def start(self):
+        """Start the snapshot listener; its first snapshot is the full initial load."""
+        if self._watch is None:
+            self._watch = db().collection(self.collection_name).on_snapshot(self._on_snapshot)
+
+    def stop(self):
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+        self.ready = False
+
+    def _on_snapshot(self, docs, changes, read_time):
+        with self._lock:
+            for change in changes:
+                doc = change.document
+                if change.type.name == "REMOVED":
+                    self._docs.pop(doc.id, None)
+                else:
+                    # Same shape as the documents fetched by SingleSourceSearch._search_db
+                    self._docs[doc.id] = (doc.to_dict() or {}) | {"_id": doc.id}
+        self.ready = True
+
+    def documents(self) -> list[dict]:
+        with self._lock:
+            return list(self._docs.values())
+
+    def stats(self) -> dict:
+        return {"ready": self.ready, "restaurants": len(self._docs)}
+
+
+catalog = RestaurantCatalog()
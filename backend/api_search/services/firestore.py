@@ -8,6 +8,13 @@ load_dotenv()  # take environment variables from .env.
 GCP_PROJECT = os.environ.get("GCP_PROJECT")
 _db = None
 
+# restaurant-search keeps the heavy details fields of a restaurant in a sibling
+# document restaurant_details/{doc_id}, flagged by details_split on the restaurant
+DETAILS_COLLECTION = "restaurant_details"
+DETAILS_SPLIT_FIELD = "details_split"
+COLD_DETAILS_FIELDS = ("regular_opening_hours", "editorial_summary", "generative_summary",
+                       "review_summary", "photos", "photo_names")
+
 def db():
     global _db
     if _db is None:
@@ -21,21 +28,47 @@ def restaurant_by_place_ids(place_ids: list[str]) -> set[str]:
     """
     found = set()
     for chunk in [place_ids[i:i + 10] for i in range(0, len(place_ids), 10)]:
-        q = db().collection("restaurants").where("place_id", "in", chunk).stream()
+        # Only place_id is needed, so the rest of each document is not transferred
+        q = db().collection("restaurants").where("place_id", "in", chunk).select(["place_id"]).stream()
         for doc in q:
             found.add(doc.to_dict()["place_id"])
     return found
 
 
-def get_restaurants_by_place_ids(place_ids: list[str]) -> list[dict]:
+def with_cold_details(docs: list[tuple[str, dict]], fields: list[str] | None = None) -> list[dict]:
+    """
+    Merge the restaurant_details document into each split restaurant document.
+    Takes (doc_id, data) pairs; all details documents are read with one get_all.
+    Documents written before the split already hold every field and are returned as is.
+    """
+    cold_fields = [f for f in fields if f in COLD_DETAILS_FIELDS] if fields else None
+    split_ids = [doc_id for doc_id, data in docs if data.get(DETAILS_SPLIT_FIELD)]
+    cold = {}
+    if split_ids and cold_fields != []:
+        details = db().collection(DETAILS_COLLECTION)
+        for snapshot in db().get_all([details.document(doc_id) for doc_id in split_ids], field_paths=cold_fields):
+            if snapshot.exists:
+                cold[snapshot.id] = snapshot.to_dict()
+    return [data | cold.get(doc_id, {}) for doc_id, data in docs]
+
+
+def get_restaurants_by_place_ids(place_ids: list[str], fields: list[str] | None = None) -> list[dict]:
     """
-    Get full restaurant documents by place_ids.
-    Returns a list of restaurant dictionaries.
+    Get restaurant documents by place_ids, with their restaurant_details merged in.
+    Returns a list of restaurant dictionaries, limited to `fields` when given
+    (full documents otherwise).
     Query by place_id in chunks of 10 (Firestore 'in' clause limit).
     """
-    restaurants = []
+    docs = []
     for chunk in [place_ids[i:i + 10] for i in range(0, len(place_ids), 10)]:
-        q = db().collection("restaurants").where("place_id", "in", chunk).stream()
+        q = db().collection("restaurants").where("place_id", "in", chunk)
+        if fields:
+            # The split marker tells which documents have details to merge
+            q = q.select([*fields, DETAILS_SPLIT_FIELD])
+        q = q.stream()
         for doc in q:
-            restaurants.append(doc.to_dict())
-    return restaurants
\ No newline at end of file
+            docs.append((doc.id, doc.to_dict()))
+    restaurants = with_cold_details(docs, fields)
+    if fields:
+        return [{k: v for k, v in r.items() if k in fields} for r in restaurants]
+    return restaurants
@@ -0,0 +1,25 @@
+import math
+import numpy as np
+
+# Vectorized distance helpers (same math as restaurant-search utils.py, which
+# this service cannot import because each service is deployed on its own).
+
+EARTH_RADIUS_METERS = 6371000.0
+
+def haversine_meters_many(lat: float, lng: float, lats, lngs) -> np.ndarray:
+    """Great circle distances in meters from one center to N points, in one array operation."""
+    phi1 = math.radians(lat)
+    phi2 = np.radians(np.asarray(lats, dtype=np.float64))
+    dphi = phi2 - phi1
+    dl = np.radians(np.asarray(lngs, dtype=np.float64) - lng)
+    a = np.sin(dphi / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def nearest_within(lat: float, lng: float, radius_m: float, lats, lngs, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Indices and distances of the k points nearest to the center within radius_m, nearest first."""
+    distances = haversine_meters_many(lat, lng, lats, lngs)
+    inside = np.flatnonzero(distances <= radius_m)
+    # Sort on the 0.1 m rounded distance that is reported, keeping input order on ties
+    order = inside[np.argsort(np.round(distances[inside], 1), kind="stable")][:k]
+    return order, distances[order]
@@ -20,6 +20,12 @@ sys.modules['models'] = _models_pkg
 sys.modules['models.requests'] = _models_requests
 sys.modules['models.responses'] = _models_responses
 
+_services_pkg = importlib.import_module('backend.api_search.services')
+_services_firestore = importlib.import_module('backend.api_search.services.firestore')
+sys.modules['services'] = _services_pkg
+sys.modules['services.firestore'] = _services_firestore
+sys.modules['services.catalog'] = importlib.import_module('backend.api_search.services.catalog')
+
 _deps_mod = importlib.import_module('backend.api_search.deps')
 sys.modules['deps'] = _deps_mod
 
@@ -0,0 +1,46 @@
+import sys
+import os
+import types
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+# Also add the package dir so absolute imports like `services.*` resolve to `backend/api_search/services`
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from backend.api_search.services.catalog import RestaurantCatalog
+from backend.api_search.agents.single_source import SingleSourceSearch
+
+
+def _change(kind, doc_id, data=None):
+    document = types.SimpleNamespace(id=doc_id, to_dict=lambda: data)
+    return types.SimpleNamespace(type=types.SimpleNamespace(name=kind), document=document)
+
+
+def test_catalog_applies_snapshot_changes():
+    catalog = RestaurantCatalog()
+    assert catalog.ready is False
+
+    catalog._on_snapshot([], [_change("ADDED", "a", {"name": "A"}), _change("ADDED", "b", {"name": "B"})], None)
+    catalog._on_snapshot([], [_change("MODIFIED", "a", {"name": "A2"}), _change("REMOVED", "b")], None)
+
+    assert catalog.ready is True
+    assert catalog.documents() == [{"name": "A2", "_id": "a"}]
+    assert catalog.stats() == {"ready": True, "restaurants": 1}
+
+
+@pytest.mark.asyncio
+async def test_search_db_served_from_ready_catalog(monkeypatch):
+    catalog = RestaurantCatalog()
+    catalog._on_snapshot([], [_change("ADDED", "a", {"name": "Near", "lat": 43.6532, "lng": -79.3832})], None)
+
+    def fail_db():
+        raise AssertionError("Firestore must not be read when the catalog is ready")
+
+    monkeypatch.setattr('backend.api_search.agents.single_source.catalog', catalog)
+    monkeypatch.setattr('backend.api_search.agents.single_source.db', fail_db)
+
+    payload = types.SimpleNamespace(lat=43.6532, lng=-79.3832, radius_m=1000)
+    items = await SingleSourceSearch()._search_db(payload)
+    assert [item["name"] for item in items] == ["Near"]
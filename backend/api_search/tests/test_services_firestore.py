@@ -4,6 +4,7 @@ import os
 # Add project root to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
 
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 import pytest
 
@@ -23,6 +24,9 @@ class FakeQuery:
     def __init__(self, docs):
         self._docs = docs
 
+    def select(self, field_paths):
+        return FakeQuery([FakeDoc({k: v for k, v in d._d.items() if k in field_paths}, d.id) for d in self._docs])
+
     def stream(self):
         return iter(self._docs)
 
@@ -35,13 +39,35 @@ class FakeCollection:
         return FakeQuery(self._docs)
 
 
+class FakeSnapshot:
+    def __init__(self, id_, d):
+        self.id = id_
+        self._d = d
+        self.exists = d is not None
+
+    def to_dict(self):
+        return dict(self._d)
+
+
 class FakeDB:
-    def __init__(self, docs):
+    def __init__(self, docs, details=None):
         self._docs = docs
+        self._details = details or {}
+        self.get_all_calls = []
 
     def collection(self, name):
+        if name == firestore.DETAILS_COLLECTION:
+            return SimpleNamespace(document=lambda doc_id: SimpleNamespace(id=doc_id))
         return FakeCollection(self._docs)
 
+    def get_all(self, refs, field_paths=None):
+        self.get_all_calls.append(([ref.id for ref in refs], field_paths))
+        for ref in refs:
+            d = self._details.get(ref.id)
+            if d is not None and field_paths is not None:
+                d = {k: v for k, v in d.items() if k in field_paths}
+            yield FakeSnapshot(ref.id, d)
+
 
 def test_restaurant_by_place_ids_and_get_restaurants():
     docs = [FakeDoc({"place_id": "a", "name": "A"}), FakeDoc({"place_id": "b", "name": "B"})]
@@ -55,6 +81,32 @@ def test_restaurant_by_place_ids_and_get_restaurants():
         assert isinstance(restaurants, list)
         assert any(r["place_id"] == "a" for r in restaurants)
 
+        projected = firestore.get_restaurants_by_place_ids(["a", "b"], fields=["place_id"])
+        assert projected == [{"place_id": "a"}, {"place_id": "b"}]
+        assert fake_db.get_all_calls == []
+
+
+def test_get_restaurants_merges_split_details():
+    docs = [
+        FakeDoc({"place_id": "a", "name": "A", "details_split": True}, "a"),
+        FakeDoc({"place_id": "b", "name": "B", "photos": ["inline"]}, "auto-b"),
+        FakeDoc({"place_id": "c", "name": "C", "details_split": True}, "c"),
+    ]
+    fake_db = FakeDB(docs, details={"a": {"photos": ["p1"], "editorial_summary": "Cozy"}})
+
+    with patch('backend.api_search.services.firestore.db', return_value=fake_db):
+        restaurants = firestore.get_restaurants_by_place_ids(["a", "b", "c"])
+        # One read covers every split document; unsplit ones already hold their details
+        assert fake_db.get_all_calls == [(["a", "c"], None)]
+        assert restaurants[0] == {"place_id": "a", "name": "A", "details_split": True,
+                                  "photos": ["p1"], "editorial_summary": "Cozy"}
+        assert restaurants[1]["photos"] == ["inline"]
+        assert restaurants[2] == {"place_id": "c", "name": "C", "details_split": True}
+
+        projected = firestore.get_restaurants_by_place_ids(["a"], fields=["name", "photos"])
+        assert fake_db.get_all_calls[-1] == (["a", "c"], ["photos"])
+        assert projected[0] == {"name": "A", "photos": ["p1"]}
+
 
 def test_db_initialization():
     """Test that db() function initializes client only once"""
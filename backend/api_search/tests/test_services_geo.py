@@ -0,0 +1,26 @@
+import sys
+import os
+import math
+
+# Add project root to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')))
+
+import pytest
+
+from backend.api_search.services.geo import haversine_meters_many, nearest_within
+
+
+def test_haversine_meters_many_known_distance():
+    distances = haversine_meters_many(0.0, 0.0, [0.0, 0.0], [0.0, 1.0])
+    assert distances[0] == 0.0
+    assert 111000 < distances[1] < 112000
+
+
+def test_nearest_within_filters_sorts_and_limits():
+    lats = [43.70, 43.6533, 43.66, 45.0]
+    lngs = [-79.40, -79.3832, -79.3832, -75.0]
+
+    indices, distances = nearest_within(43.6532, -79.3832, 10000, lats, lngs, k=2)
+    assert indices.tolist() == [1, 2]
+    assert all(d <= 10000 for d in distances)
+    assert nearest_within(43.6532, -79.3832, 10000, [], [], k=2)[0].tolist() == []
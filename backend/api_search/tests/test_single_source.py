@@ -756,3 +756,46 @@ async def test_search_db_float_conversion_error(monkeypatch):
 
 
 
+
+
+@pytest.mark.asyncio
+async def test_search_db_merges_details_of_returned_split_docs(monkeypatch):
+    """Split restaurants get their restaurant_details merged in, read only for the returned docs"""
+    class FakeDoc:
+        def __init__(self, d, id_):
+            self._d = d
+            self.id = id_
+
+        def to_dict(self):
+            return dict(self._d)
+
+    docs = [
+        FakeDoc({'location': [43.7, -79.4], 'name': 'Split', 'details_split': True}, 'near'),
+        FakeDoc({'location': [45.0, -80.0], 'name': 'Far', 'details_split': True}, 'far'),
+    ]
+
+    class FakeColl:
+        def limit(self, n):
+            return self
+
+        def stream(self):
+            return iter(docs)
+
+    class FakeDB:
+        def collection(self, name):
+            return FakeColl()
+
+    merged = []
+
+    def fake_with_cold_details(pairs):
+        merged.append([doc_id for doc_id, _ in pairs])
+        return [d | {'photos': ['p1'], 'editorial_summary': 'Cozy'} for _, d in pairs]
+
+    monkeypatch.setattr('backend.api_search.agents.single_source.db', lambda: FakeDB())
+    monkeypatch.setattr('backend.api_search.agents.single_source.with_cold_details', fake_with_cold_details)
+
+    s = SingleSourceSearch()
+    p = Payload(source='db', lat=43.7, lng=-79.4, radius_m=1000)
+    res = await s.search(p)
+    assert merged == [['near']]
+    assert res['items'][0]['photos'] == ['p1'] and res['items'][0]['editorial_summary'] == 'Cozy'
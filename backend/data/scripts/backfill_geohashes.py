@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Backfill the `geohash` field on restaurant documents.
+
+The API's radius search runs geohash range queries, so every restaurant
+needs a `geohash` computed from its location. Documents uploaded from the
+CSV only carry `latitude`/`longitude`; those also get a `location` GeoPoint.
+Progress is checkpointed after every batch, so an interrupted run resumes.
+
+    python backfill_geohashes.py [--dry-run]
+"""
+
+import argparse
+from typing import Dict, Any, Optional, Tuple
+
+from upload_to_firebase import initialize_firebase
+from migrate_restaurant_ids import iter_pages, load_state, save_state
+from firebase_admin import firestore
+from google.cloud.firestore import GeoPoint
+from geohash_utils import geohash_encode
+
+DEFAULT_STATE_FILE = "backfill_geohashes_state.json"
+
+
+def resolve_coordinates(data: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """
+    Return (lat, lng) from the `location` GeoPoint or the CSV latitude/longitude fields.
+    """
+    location = data.get('location')
+    if location is not None and hasattr(location, 'latitude'):
+        return location.latitude, location.longitude
+    lat, lng = data.get('latitude'), data.get('longitude')
+    if lat is None or lng is None:
+        return None
+    return float(lat), float(lng)
+
+
+def backfill_geohashes(db, collection_name: str, batch_size: int, state_file: str, dry_run: bool = False) -> bool:
+    """
+    Write `geohash` (and a missing `location`) on every document, one batch per page.
+    """
+    state = load_state(state_file)
+    progress = state.setdefault('backfill', {'last_doc_id': None, 'updated': 0, 'unchanged': 0, 'no_location': 0})
+
+    print(f"🌐 Backfilling geohashes in '{collection_name}' (resuming after: {progress['last_doc_id']})")
+
+    for docs in iter_pages(db, collection_name, batch_size, progress['last_doc_id']):
+        batch = db.batch()
+        writes = 0
+        for doc in docs:
+            data = doc.to_dict() or {}
+            coordinates = resolve_coordinates(data)
+            if coordinates is None:
+                progress['no_location'] += 1
+                continue
+
+            lat, lng = coordinates
+            update = {}
+            geohash = geohash_encode(lat, lng)
+            if data.get('geohash') != geohash:
+                update['geohash'] = geohash
+            if not hasattr(data.get('location'), 'latitude'):
+                update['location'] = GeoPoint(lat, lng)
+
+            if update:
+                batch.update(doc.reference, update)
+                writes += 1
+            else:
+                progress['unchanged'] += 1
+
+        if writes and not dry_run:
+            batch.commit()
+        progress['updated'] += writes
+        progress['last_doc_id'] = docs[-1].id
+        if not dry_run:
+            save_state(state_file, state)
+        print(f"✅ Updated {progress['updated']} (unchanged {progress['unchanged']}, no location {progress['no_location']})")
+
+    print(f"🎉 Backfill complete: {progress['updated']} documents updated")
+    return True
+
+
+def main():
+    """
+    Parse arguments and run the backfill.
+    """
+    parser = argparse.ArgumentParser(description="Backfill geohash fields on restaurant documents")
+    parser.add_argument("--collection", default="restaurants", help="Firestore collection name")
+    parser.add_argument("--batch-size", type=int, default=400, help="Documents per batch (max 500)")
+    parser.add_argument("--state-file", default=DEFAULT_STATE_FILE, help="Checkpoint file for resuming")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+
+    print("🍽️  Restaurant Geohash Backfill")
+    print("=" * 50)
+
+    if not initialize_firebase():
+        return
+
+    backfill_geohashes(firestore.client(), args.collection, min(args.batch_size, 500), args.state_file, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Geohash encoding for the data scripts.
+
+Same scheme as geofire-common and the restaurant-search API (utils.geohash_encode),
+copied here so the scripts only need firebase-admin.
+"""
+
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 10
+_BITS_PER_CHAR = 5
+
+
+def geohash_encode(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    """
+    Encode a coordinate as a geohash string.
+    
+    Args:
+        lat, lon: Latitude and longitude in decimal degrees
+        precision: Number of geohash characters
+    
+    Returns:
+        Geohash string
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    value = 0
+    even = True
+    while len(geohash) < precision:
+        coord, rng = (lon, lon_range) if even else (lat, lat_range)
+        mid = (rng[0] + rng[1]) / 2
+        if coord >= mid:
+            value = value * 2 + 1
+            rng[0] = mid
+        else:
+            value = value * 2
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == _BITS_PER_CHAR:
+            geohash.append(GEOHASH_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(geohash)
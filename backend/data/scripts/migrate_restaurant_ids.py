@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Online migration that re-keys restaurant documents by place_id.
+
+Older documents in the `restaurants` collection use auto-generated IDs, so
+every lookup by place_id is a query. This script copies each of them to
+`restaurants/{place_id}` so the API can use direct document reads and
+batched get_all calls. Restaurants whose details were split off by the API
+(`details_split`) also have their `restaurant_details/{doc_id}` document moved
+to `restaurant_details/{place_id}`. It runs in three resumable steps:
+
+    python migrate_restaurant_ids.py copy     # copy legacy docs to place_id keys
+    python migrate_restaurant_ids.py verify   # check every copy matches its source
+    python migrate_restaurant_ids.py cleanup  # delete verified legacy docs
+
+The API keeps working throughout: FirebaseService reads the place_id key
+first and falls back to a place_id query for documents not yet copied.
+Progress is checkpointed to a state file after every batch, so an
+interrupted step resumes where it stopped.
+"""
+
+import argparse
+import json
+import os
+from typing import Dict, Any, Optional, List
+
+from upload_to_firebase import initialize_firebase
+from firebase_admin import firestore
+
+DEFAULT_STATE_FILE = "migrate_restaurant_ids_state.json"
+
+# Sibling collection holding the heavy details fields of split restaurants
+DETAILS_COLLECTION = "restaurant_details"
+DETAILS_SPLIT_FIELD = "details_split"
+
+# Each restaurant may need a second write for its details document (batches hold 500)
+MAX_BATCH_DOCS = 250
+
+# Fields the API manages itself; they may legitimately differ after a copy
+VOLATILE_FIELDS = {"search_timestamp", "last_updated"}
+
+
+def load_state(state_file: str) -> Dict[str, Any]:
+    """
+    Load migration progress from the state file (or start fresh).
+    """
+    if os.path.exists(state_file):
+        with open(state_file, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    return {}
+
+
+def save_state(state_file: str, state: Dict[str, Any]):
+    """
+    Atomically write migration progress to the state file.
+    """
+    tmp_file = f"{state_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as file:
+        json.dump(state, file, indent=2)
+    os.replace(tmp_file, state_file)
+
+
+def resolve_place_id(data: Dict[str, Any]) -> Optional[str]:
+    """
+    Return the Google place_id of a restaurant document.
+    Documents uploaded from the CSV only carry `google_place_id`.
+    """
+    place_id = data.get('place_id') or data.get('google_place_id')
+    if not place_id or '/' in place_id:
+        return None
+    return place_id
+
+
+def iter_pages(db, collection_name: str, batch_size: int, start_after: Optional[str]):
+    """
+    Page through every document in document-ID order, starting after a checkpoint.
+    """
+    while True:
+        query = db.collection(collection_name).order_by("__name__").limit(batch_size)
+        if start_after:
+            query = query.start_after({"__name__": start_after})
+        docs = list(query.stream())
+        if not docs:
+            return
+        yield docs
+        start_after = docs[-1].id
+
+
+def read_details(db, doc_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Batched read of `restaurant_details` documents, keyed by document ID.
+    """
+    if not doc_ids:
+        return {}
+    details = db.collection(DETAILS_COLLECTION)
+    snapshots = db.get_all([details.document(doc_id) for doc_id in doc_ids])
+    return {snap.id: snap.to_dict() for snap in snapshots if snap.exists}
+
+
+def copy_documents(db, collection_name: str, batch_size: int, state_file: str, dry_run: bool = False) -> bool:
+    """
+    Copy every legacy document to `collection/{place_id}`, one batch per page,
+    together with its details document if it has one.
+    Existing place_id documents are never overwritten.
+    """
+    state = load_state(state_file)
+    progress = state.setdefault('copy', {'last_doc_id': None, 'copied': 0, 'skipped': 0, 'invalid': 0})
+    progress.setdefault('details_copied', 0)
+    collection = db.collection(collection_name)
+    details_collection = db.collection(DETAILS_COLLECTION)
+
+    print(f"📤 Copying legacy documents in '{collection_name}' (resuming after: {progress['last_doc_id']})")
+
+    for docs in iter_pages(db, collection_name, batch_size, progress['last_doc_id']):
+        legacy = []
+        for doc in docs:
+            data = doc.to_dict() or {}
+            place_id = resolve_place_id(data)
+            if place_id is None:
+                progress['invalid'] += 1
+            elif doc.id != place_id:
+                legacy.append((doc, place_id, data))
+
+        # One batched read to find which targets already exist
+        targets = [collection.document(place_id) for _, place_id, _ in legacy]
+        existing = {snap.id for snap in db.get_all(targets) if snap.exists} if targets else set()
+        details = read_details(db, [doc.id for doc, _, data in legacy if data.get(DETAILS_SPLIT_FIELD)])
+
+        batch = db.batch()
+        writes = 0
+        for doc, place_id, data in legacy:
+            if place_id in existing:
+                progress['skipped'] += 1
+                continue
+            existing.add(place_id)  # Duplicates later in the page keep the first copy
+            batch.set(collection.document(place_id), {**data, 'place_id': place_id, 'legacy_doc_id': doc.id})
+            progress['copied'] += 1
+            writes += 1
+            if doc.id in details:
+                # Same batch, so a restaurant copy never lacks its details
+                batch.set(details_collection.document(place_id), details[doc.id])
+                progress['details_copied'] += 1
+                writes += 1
+
+        if writes and not dry_run:
+            batch.commit()
+        progress['last_doc_id'] = docs[-1].id
+        if not dry_run:
+            save_state(state_file, state)
+        print(f"✅ Copied {progress['copied']} (skipped {progress['skipped']}, invalid {progress['invalid']})")
+
+    progress['done'] = True
+    if not dry_run:
+        save_state(state_file, state)
+    print(f"🎉 Copy step complete: {progress['copied']} documents copied ({progress['details_copied']} with details)")
+    return True
+
+
+def copy_is_valid(source_id: str, source: Dict[str, Any], copy: Optional[Dict[str, Any]],
+                  source_details: Optional[Dict[str, Any]] = None,
+                  copy_details: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Check that a place_id document can replace its legacy source.
+    Untouched copies must carry every field of their source, and the same
+    details document. Copies written by the API, or refreshed by it since the
+    copy step, are authoritative only if they are at least as recent as the
+    source, so newer source data is never deleted.
+    """
+    if copy is None:
+        return False
+    source_updated = source.get('last_updated')
+    copy_updated = copy.get('last_updated')
+    if copy.get('legacy_doc_id') == source_id and copy_updated == source_updated:
+        return copy_details == source_details and all(
+            copy.get(key) == value
+            for key, value in source.items()
+            if key not in VOLATILE_FIELDS
+        )
+    if source_updated is None:
+        return True
+    if copy_updated is None:
+        return False
+    try:
+        return copy_updated >= source_updated
+    except TypeError:
+        # Timestamps that cannot be compared are not trusted
+        return False
+
+
+def verify_documents(db, collection_name: str, batch_size: int, state_file: str) -> bool:
+    """
+    Verify every legacy document has a matching copy under its place_id.
+    Verified legacy IDs are recorded for the cleanup step, along with those
+    whose details document is to be deleted too.
+    """
+    state = load_state(state_file)
+    if not state.get('copy', {}).get('done'):
+        print("❌ Run the copy step to completion before verifying.")
+        return False
+
+    progress = state.setdefault('verify', {'last_doc_id': None, 'verified': [], 'mismatched': []})
+    progress.setdefault('with_details', [])
+    collection = db.collection(collection_name)
+
+    print(f"🔍 Verifying copies in '{collection_name}' (resuming after: {progress['last_doc_id']})")
+
+    for docs in iter_pages(db, collection_name, batch_size, progress['last_doc_id']):
+        legacy = []
+        for doc in docs:
+            data = doc.to_dict() or {}
+            place_id = resolve_place_id(data)
+            if place_id is not None and doc.id != place_id:
+                legacy.append((doc, place_id, data))
+
+        targets = [collection.document(place_id) for _, place_id, _ in legacy]
+        copies = {snap.id: snap.to_dict() for snap in db.get_all(targets) if snap.exists} if targets else {}
+        split = [(doc.id, place_id) for doc, place_id, data in legacy if data.get(DETAILS_SPLIT_FIELD)]
+        source_details = read_details(db, [doc_id for doc_id, _ in split])
+        copy_details = read_details(db, [place_id for _, place_id in split])
+
+        for doc, place_id, data in legacy:
+            details = source_details.get(doc.id)
+            if copy_is_valid(doc.id, data, copies.get(place_id), details, copy_details.get(place_id)):
+                progress['verified'].append(doc.id)
+                if details is not None:
+                    progress['with_details'].append(doc.id)
+            else:
+                progress['mismatched'].append(doc.id)
+
+        progress['last_doc_id'] = docs[-1].id
+        save_state(state_file, state)
+
+    progress['done'] = True
+    save_state(state_file, state)
+    print(f"📊 Verified {len(progress['verified'])} documents, {len(progress['mismatched'])} mismatched")
+    if progress['mismatched']:
+        print("⚠️  Mismatched legacy documents will not be deleted. Re-run copy after fixing them.")
+    return not progress['mismatched']
+
+
+def cleanup_documents(db, collection_name: str, batch_size: int, state_file: str, dry_run: bool = False) -> bool:
+    """
+    Delete the legacy documents that passed verification, and their details documents.
+    """
+    state = load_state(state_file)
+    verify = state.get('verify', {})
+    if not verify.get('done'):
+        print("❌ Run the verify step to completion before cleaning up.")
+        return False
+
+    progress = state.setdefault('cleanup', {'deleted': 0})
+    pending: List[str] = verify['verified'][progress['deleted']:]
+    with_details = set(verify.get('with_details', []))
+    collection = db.collection(collection_name)
+    details_collection = db.collection(DETAILS_COLLECTION)
+
+    print(f"🧹 Deleting {len(pending)} verified legacy documents from '{collection_name}'")
+
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start:start + batch_size]
+        if not dry_run:
+            batch = db.batch()
+            for doc_id in chunk:
+                batch.delete(collection.document(doc_id))
+                if doc_id in with_details:
+                    batch.delete(details_collection.document(doc_id))
+            batch.commit()
+            progress['deleted'] += len(chunk)
+            save_state(state_file, state)
+        print(f"✅ Deleted {progress['deleted']}/{len(verify['verified'])}")
+
+    print("🎉 Cleanup complete. Set FIRESTORE_LEGACY_PLACE_ID_LOOKUP=false on the API to skip fallback queries.")
+    return True
+
+
+def main():
+    """
+    Parse arguments and run one migration step.
+    """
+    parser = argparse.ArgumentParser(description="Re-key restaurant documents by place_id")
+    parser.add_argument("step", choices=["copy", "verify", "cleanup"], help="Migration step to run")
+    parser.add_argument("--collection", default="restaurants", help="Firestore collection name")
+    parser.add_argument("--batch-size", type=int, default=MAX_BATCH_DOCS,
+                        help=f"Restaurants per batch (max {MAX_BATCH_DOCS})")
+    parser.add_argument("--state-file", default=DEFAULT_STATE_FILE, help="Checkpoint file for resuming")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+
+    print("🍽️  Restaurant place_id Migration")
+    print("=" * 50)
+
+    if not initialize_firebase():
+        return
+
+    db = firestore.client()
+    batch_size = min(args.batch_size, MAX_BATCH_DOCS)
+
+    if args.step == "copy":
+        copy_documents(db, args.collection, batch_size, args.state_file, args.dry_run)
+    elif args.step == "verify":
+        verify_documents(db, args.collection, batch_size, args.state_file)
+    else:
+        cleanup_documents(db, args.collection, batch_size, args.state_file, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,10 @@ except ImportError:
     import firebase_admin
     from firebase_admin import credentials, firestore
 
+from google.cloud.firestore import GeoPoint
+
+from geohash_utils import geohash_encode
+
 def initialize_firebase():
     """
     Initialize Firebase Admin SDK.
@@ -113,6 +117,7 @@ def read_restaurant_data(csv_file: str) -> List[Dict[str, Any]]:
                     'name': row.get('Restaurant Name', ''),
                     'price_range': price_range,
                     'google_place_id': row.get('google_place_id', ''),
+                    'place_id': row.get('google_place_id', ''),
                     'formatted_address': row.get('google_formatted_address', ''),
                     'latitude': lat,
                     'longitude': lng,
@@ -120,6 +125,11 @@ def read_restaurant_data(csv_file: str) -> List[Dict[str, Any]]:
                     'created_at': firestore.SERVER_TIMESTAMP
                 }
                 
+                # GeoPoint + geohash used by the API's radius search
+                if lat is not None and lng is not None:
+                    restaurant['location'] = GeoPoint(lat, lng)
+                    restaurant['geohash'] = geohash_encode(lat, lng)
+                
                 restaurants.append(restaurant)
                 
                 if row_num % 1000 == 0:
@@ -164,8 +174,10 @@ def upload_to_firestore(restaurants: List[Dict[str, Any]], collection_name: str
             batch = db.batch()
             
             for restaurant in batch_restaurants:
-                # Create a new document reference
-                doc_ref = db.collection(collection_name).document()
+                # Key documents by place_id so the API can read them directly
+                collection = db.collection(collection_name)
+                place_id = restaurant.get('place_id')
+                doc_ref = collection.document(place_id) if place_id else collection.document()
                 batch.set(doc_ref, restaurant)
             
             # Commit the batch